@@ -235,7 +235,7 @@ class FlowConverter:
         )
 
         try:
-            raw = self.llm_steps.chat(prompt)
+            raw = self.llm_steps.chat(prompt, expect_json=True)
             logger.debug(f"  LLM raw[:300]: {raw[:300]}")
             parsed = self.llm_steps.extract_json(raw)
 
@@ -311,7 +311,7 @@ class FlowConverter:
         )
 
         try:
-            raw = self.llm_steps.chat(prompt)
+            raw = self.llm_steps.chat(prompt, expect_json=True)
             parsed = self.llm_steps.extract_json(raw)
 
             if parsed is None:
@@ -359,7 +359,7 @@ class FlowConverter:
         prompt = STEPS_DEDUP_PROMPT.format(steps_text=steps_text)
 
         try:
-            raw = self.llm_steps.chat(prompt)
+            raw = self.llm_steps.chat(prompt, expect_json=True)
             parsed = self.llm_steps.extract_json(raw)
 
             if parsed is None:
@@ -451,7 +451,7 @@ class FlowConverter:
         )
 
         try:
-            raw = self.llm_entity.chat(prompt)
+            raw = self.llm_entity.chat(prompt, expect_json=True)
             parsed = self.llm_entity.extract_json(raw)
 
             if not isinstance(parsed, list) or not parsed:
@@ -114,7 +114,7 @@ class FlowRepairer:
             )
 
             # LLM 修复
-            raw = self.llm.chat(prompt)
+            raw = self.llm.chat(prompt, expect_json=True)
             raw = raw.strip()
             if raw.startswith("```"):
                 raw = raw.replace("```json", "").replace("```", "").strip()
@@ -3,19 +3,35 @@ llm_client.py — 独立 LLM 调用客户端
 
 复用项目已有的 VLM_API_KEY / VLM_API_URL / VLM_MODEL 环境变量配置。
 纯 requests 实现，无外部 SDK 依赖。
+temperature 为 0 的调用结果写入持久化响应缓存（见 response_cache.py）。
 """
 
 import json
 import logging
 import os
 import re
+import threading
 import time
 from typing import Dict, Optional
 
 import requests
 
+from .response_cache import cache_key_for, get_response_cache
+
 logger = logging.getLogger(__name__)
 
+# 进程内共享连接池，所有 LLMClient 实例复用
+_session = requests.Session()
+
+# 全局 LLM 并发上限（批量模式下多个 UTG 线程共享，见 set_llm_concurrency）
+_llm_semaphore = threading.BoundedSemaphore(int(os.getenv('LLM_MAX_CONCURRENCY', '8')))
+
+
+def set_llm_concurrency(limit: int) -> None:
+    """设置全局 LLM 并发请求上限（应在并发任务启动前调用）"""
+    global _llm_semaphore
+    _llm_semaphore = threading.BoundedSemaphore(max(1, limit))
+
 
 class LLMClient:
     """轻量 LLM 调用客户端"""
@@ -28,6 +44,7 @@ class LLMClient:
         temperature: float = 0.0,
         max_tokens: int = 4096,
         timeout: int = 120,
+        use_cache: bool = True,
     ):
         self.api_key = api_key or os.getenv('VLM_API_KEY')
         self.api_url = api_url or os.getenv(
@@ -37,12 +54,18 @@ class LLMClient:
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.timeout = timeout
+        self.use_cache = use_cache
 
         if not self.api_key:
             raise ValueError("VLM_API_KEY 未设置。请在 .env 中配置或通过参数传入。")
 
-    def chat(self, prompt: str, max_retries: int = 2) -> str:
-        """调用 LLM，返回文本响应"""
+    def chat(self, prompt: str, max_retries: int = 2, expect_json: bool = False) -> str:
+        """
+        调用 LLM，返回文本响应
+
+        响应缓存只保存可用的回复：空回复不缓存；expect_json=True 时只缓存（和复用）
+        extract_json 能解析的回复，避免一次格式错误的回复在每次重跑时被原样重放。
+        """
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}',
@@ -54,6 +77,12 @@ class LLMClient:
             "max_tokens": self.max_tokens,
         }
 
+        cache_key = cache_key_for(payload, self.use_cache)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None and self._cacheable(cached, expect_json):
+                return cached
+
         last_error = None
         for attempt in range(max_retries):
             try:
@@ -62,10 +91,11 @@ class LLMClient:
                     logger.info(f"  重试 {attempt + 1}/{max_retries}，等待 {wait}s...")
                     time.sleep(wait)
 
-                resp = requests.post(
-                    self.api_url, headers=headers, json=payload,
-                    timeout=self.timeout,
-                )
+                with _llm_semaphore:
+                    resp = _session.post(
+                        self.api_url, headers=headers, json=payload,
+                        timeout=self.timeout,
+                    )
                 if resp.status_code == 429:
                     last_error = "API 限流 (429)"
                     continue
@@ -73,8 +103,10 @@ class LLMClient:
                     last_error = f"服务器错误 ({resp.status_code})"
                     continue
                 resp.raise_for_status()
-                content = resp.json()['choices'][0]['message']['content']
-                return content.strip()
+                content = resp.json()['choices'][0]['message']['content'].strip()
+                if cache_key and self._cacheable(content, expect_json):
+                    get_response_cache().put(cache_key, content, self.model)
+                return content
 
             except requests.exceptions.RequestException as e:
                 last_error = str(e)
@@ -83,6 +115,12 @@ class LLMClient:
 
         raise RuntimeError(f"LLM 调用失败，已重试 {max_retries} 次: {last_error}")
 
+    @classmethod
+    def _cacheable(cls, content: str, expect_json: bool) -> bool:
+        if not content:
+            return False
+        return not expect_json or cls.extract_json(content) is not None
+
     @staticmethod
     def extract_json(text: str):
         """
@@ -2,18 +2,24 @@
 page_spec_extractor.py — 从 utg.json 的 ui_summary 中抽取页面类型 Spec
 
 三阶段流程：
-  Phase 1: 原始页面类型提取（每个 step 的 ui_summary → LLM → 页面类型短语）
+  Phase 1: 原始页面类型提取（step 的 ui_summary → LLM → 页面类型短语，按 App 分批打包、批次并发）
   Phase 2: 聚类归一化（按 app 分组 → LLM → 标准 page_type 名称）
   Phase 3: 构建 Spec（生成 instruction 模板 → page_spec.json）
+
+增量构建（指定 output_dir 时默认开启）：output_dir/spec_state.json 按 UTG 文件内容哈希记录 Phase 1 结果、
+按 App 聚类输入哈希记录 Phase 2 结果，并记录已生成的模板；重跑时只提取新增/变更的 UTG、
+只重新聚类受影响的 App、只为新页面类型生成模板。
 """
 
+import hashlib
 import json
 import logging
 import os
 import re
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from .llm_client import LLMClient
 
@@ -32,6 +38,18 @@ App 名称：{appName}
 
 只输出页面类型名称，不要其他内容。"""
 
+BATCH_PAGE_TYPE_EXTRACT_PROMPT = """你是一个 App 页面类型分类专家。判断以下 {step_count} 个页面各自的类型。
+
+App 名称：{appName}
+
+{steps_text}
+
+对每个页面，用 2-6 个中文词描述页面类型，聚焦页面功能。
+例如：搜索结果页、商品详情页、确认订单页、首页搜索框。
+
+按编号顺序输出 JSON 字符串数组，共 {step_count} 个元素（只输出 JSON，不要其他内容）：
+["搜索结果页", "商品详情页", ...]"""
+
 CLUSTER_PROMPT = """你是一个 App 页面类型分类专家。以下是 {appName} App 操作序列中提取出的所有原始页面类型描述，请将它们聚类并归一化为标准名称。
 
 原始列表：
@@ -74,6 +92,38 @@ App 名称：{appName}
 }}"""
 
 
+# Phase 1 批量模式：每次 LLM 调用打包的 step 数（1 = 逐 step 调用）与并发批次数
+PAGE_TYPE_BATCH_SIZE = int(os.getenv('PAGE_SPEC_BATCH_SIZE', '20'))
+PAGE_TYPE_WORKERS = int(os.getenv('PAGE_SPEC_WORKERS', '4'))
+
+# Phase 1 断点文件（位于 output_dir，Phase 1 完成后删除）
+CHECKPOINT_NAME = "raw_extractions.checkpoint.jsonl"
+
+
+def _clean_page_type(text: str) -> str:
+    """只取第一行，去除首尾标点"""
+    return text.split('\n')[0].strip().strip('。，,.')
+
+
+# 增量构建状态（位于 output_dir）
+STATE_NAME = "spec_state.json"
+STATE_VERSION = 1
+
+
+def _content_hash(value: Any) -> str:
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _step_key(app_name: str, thought: str, ui_summary: str) -> str:
+    """step 的 prompt 输入哈希：断点续跑的键，相同输入在一次运行中也只提取一次"""
+    return _content_hash([app_name, thought, ui_summary])
+
+
+def _template_key(app_name: str, page_type: str, page_description: str) -> str:
+    return _content_hash([app_name, page_type, page_description])
+
+
 class PageSpecExtractor:
     """页面类型 Spec 抽取器"""
 
@@ -82,8 +132,14 @@ class PageSpecExtractor:
         api_key: Optional[str] = None,
         api_url: Optional[str] = None,
         model: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
     ):
+        self.batch_size = max(1, batch_size or PAGE_TYPE_BATCH_SIZE)
+        self.workers = max(1, workers or PAGE_TYPE_WORKERS)
         self.llm = LLMClient(api_key=api_key, api_url=api_url, model=model, temperature=0.0, max_tokens=256)
+        self.llm_batch = LLMClient(api_key=api_key, api_url=api_url, model=model, temperature=0.0,
+                                   max_tokens=max(256, 32 * self.batch_size))
         self.llm_spec = LLMClient(api_key=api_key, api_url=api_url, model=model, temperature=0.1, max_tokens=512)
 
     # ── Phase 1 ─────────────────────────────────────────
@@ -105,9 +161,9 @@ class PageSpecExtractor:
                         break
         return sorted(set(utg_files))
 
-    def extract_raw_page_types(self, utg_files: List[Path]) -> List[Dict]:
-        """Phase 1: 提取原始页面类型"""
-        extractions = []
+    def _collect_steps(self, utg_files: List[Path]) -> Tuple[List[Dict], List[str]]:
+        """读取所有 UTG 中有 ui_summary 的 step（保持文件与 step 顺序），同时返回成功读取的文件"""
+        tasks, loaded_files = [], []
         for utg_path in utg_files:
             try:
                 with open(utg_path, 'r', encoding='utf-8') as f:
@@ -116,6 +172,7 @@ class PageSpecExtractor:
                 logger.warning(f"  跳过 {utg_path}: {e}")
                 continue
 
+            loaded_files.append(str(utg_path))
             app_name = data.get("appName", data.get("app_name", "未知"))
             step_data = data.get("stepData", [])
             logger.info(f"  [{app_name}] {utg_path.name} ({len(step_data)} steps)")
@@ -128,30 +185,215 @@ class PageSpecExtractor:
                 thought = (step.get("thought") or "").strip()
                 if not ui_summary:
                     continue
+                tasks.append({
+                    "key": _step_key(app_name, thought[:200], ui_summary[:500]),
+                    "file": str(utg_path),
+                    "appName": app_name,
+                    "stepId": step_id,
+                    "thought": thought[:200],
+                    "ui_summary": ui_summary[:500],
+                })
+        return tasks, loaded_files
+
+    @staticmethod
+    def _extraction_record(task: Dict, page_type: str) -> Dict:
+        return {
+            "appName": task["appName"],
+            "stepId": task["stepId"],
+            "raw_page_type": page_type,
+            "ui_summary": task["ui_summary"][:300],
+        }
 
-                prompt = PAGE_TYPE_EXTRACT_PROMPT.format(
-                    appName=app_name, thought=thought[:200] or "(无)", ui_summary=ui_summary[:500],
-                )
-                try:
-                    page_type = self.llm.chat(prompt).split('\n')[0].strip().strip('。，,.')
+    def _extract_single(self, task: Dict) -> str:
+        prompt = PAGE_TYPE_EXTRACT_PROMPT.format(
+            appName=task["appName"], thought=task["thought"] or "(无)", ui_summary=task["ui_summary"],
+        )
+        return _clean_page_type(self.llm.chat(prompt))
+
+    def _extract_batch(self, batch: List[Dict]) -> Dict[str, str]:
+        """
+        一次 LLM 调用提取同一 App 一批 step 的页面类型，返回 {step 键: 页面类型}。
+        整批返回格式异常时逐 step 重新提取；数组中个别元素无效时只补提取这些 step。
+        """
+        results = {}
+        fallback = batch
+        if len(batch) > 1:
+            steps_text = "\n".join(
+                f"[{i}] 用户操作意图：{task['thought'] or '(无)'}\n    页面 UI 描述：{task['ui_summary']}"
+                for i, task in enumerate(batch)
+            )
+            prompt = BATCH_PAGE_TYPE_EXTRACT_PROMPT.format(
+                appName=batch[0]["appName"], step_count=len(batch), steps_text=steps_text,
+            )
+            try:
+                parsed = self.llm_batch.extract_json(self.llm_batch.chat(prompt, expect_json=True))
+                if not isinstance(parsed, list) or len(parsed) != len(batch):
+                    raise ValueError(f"期望 {len(batch)} 个元素的 JSON 数组")
+            except Exception as e:
+                logger.warning(f"  [{batch[0]['appName']}] 批量提取失败 ({len(batch)} steps): {e}，回退逐 step 模式")
+            else:
+                fallback = []
+                for task, item in zip(batch, parsed):
+                    page_type = _clean_page_type(item) if isinstance(item, str) else ""
                     if page_type:
-                        extractions.append({
-                            "appName": app_name,
-                            "stepId": step_id,
-                            "raw_page_type": page_type,
-                            "ui_summary": ui_summary[:300],
-                        })
-                        logger.info(f"    Step {step_id}: {page_type}")
-                except Exception as e:
-                    logger.error(f"    Step {step_id}: LLM 提取失败: {e}")
-
-        logger.info(f"\nPhase 1 完成: 共提取 {len(extractions)} 条页面类型")
+                        results[task["key"]] = page_type
+                    else:
+                        fallback.append(task)
+                if fallback:
+                    logger.warning(f"  [{batch[0]['appName']}] 批量结果中 {len(fallback)} 条无效，逐 step 补提取")
+
+        for task in fallback:
+            try:
+                page_type = self._extract_single(task)
+            except Exception as e:
+                logger.error(f"    Step {task['stepId']}: LLM 提取失败: {e}")
+                continue
+            if page_type:
+                results[task["key"]] = page_type
+        return results
+
+    @staticmethod
+    def _load_checkpoint(path: Path) -> Dict[str, str]:
+        done = {}
+        if not path.exists():
+            return done
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    done[entry["key"]] = entry["raw_page_type"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue  # 中断时写了一半的行
+        return done
+
+    def extract_raw_page_types(self, utg_files: List[Path], checkpoint: Optional[str] = None) -> List[Dict]:
+        """
+        Phase 1: 提取原始页面类型
+
+        同一 App 的 step 每 batch_size 个打包为一次 LLM 调用，workers 个批次并发执行。
+        checkpoint 为 JSONL 断点文件：每完成一批追加一次，重跑时已提取的 step 直接复用。
+        """
+        by_file = self._extract_by_file(utg_files, checkpoint)
+        return [ext for entry in by_file.values() for ext in entry["extractions"]]
+
+    def _extract_by_file(self, utg_files: List[Path], checkpoint: Optional[str] = None) -> Dict[str, Dict]:
+        """Phase 1 提取，按文件分组：{文件路径: {"extractions": [...], "complete": 是否所有 step 都提取成功}}"""
+        tasks, loaded_files = self._collect_steps(utg_files)
+        done = self._load_checkpoint(Path(checkpoint)) if checkpoint else {}
+        if done:
+            logger.info(f"  从断点恢复 {len(done)} 条: {checkpoint}")
+
+        pending: Dict[str, Dict] = {}
+        for task in tasks:
+            if task["key"] not in done:
+                pending.setdefault(task["key"], task)
+        by_app = defaultdict(list)
+        for task in pending.values():
+            by_app[task["appName"]].append(task)
+        batches = [
+            items[i:i + self.batch_size]
+            for items in by_app.values()
+            for i in range(0, len(items), self.batch_size)
+        ]
+        logger.info(f"  {len(tasks)} 个 step，待提取 {len(pending)} 个 → {len(batches)} 批 "
+                    f"(每批 ≤{self.batch_size}，并发 {self.workers})")
+
+        ckpt_file = open(checkpoint, 'a', encoding='utf-8') if checkpoint and batches else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self._extract_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    results = future.result()
+                    done.update(results)
+                    for task in futures[future]:
+                        if task["key"] in results:
+                            logger.info(f"    [{task['appName']}] Step {task['stepId']}: {results[task['key']]}")
+                    if ckpt_file:
+                        for key, page_type in results.items():
+                            ckpt_file.write(json.dumps({"key": key, "raw_page_type": page_type}, ensure_ascii=False) + "\n")
+                        ckpt_file.flush()
+        finally:
+            if ckpt_file:
+                ckpt_file.close()
+
+        by_file = {name: {"extractions": [], "complete": True} for name in loaded_files}
+        for task in tasks:
+            entry = by_file[task["file"]]
+            if task["key"] in done:
+                entry["extractions"].append(self._extraction_record(task, done[task["key"]]))
+            else:
+                entry["complete"] = False
+
+        total = sum(len(entry["extractions"]) for entry in by_file.values())
+        logger.info(f"\nPhase 1 完成: 共提取 {total} 条页面类型")
+        return by_file
+
+    @staticmethod
+    def _state_file_key(utg_path: Path, data_path: Path) -> str:
+        """状态中的文件键：相对数据目录的路径"""
+        try:
+            return utg_path.resolve().relative_to(data_path).as_posix()
+        except ValueError:
+            return str(utg_path.resolve())
+
+    def _extract_incremental(self, utg_files: List[Path], data_dir: str, state: Dict[str, Any],
+                             checkpoint: Optional[str] = None) -> List[Dict]:
+        """
+        增量 Phase 1：内容哈希未变的文件复用 state["files"] 中的结果，只提取新增/变更的文件。
+        已删除的文件从状态中移除；有 step 提取失败的文件不记录，下次运行时重新提取。
+        """
+        data_path = Path(data_dir).resolve()
+        cached_files = state["files"]
+
+        hashes: Dict[str, str] = {}
+        changed: List[Path] = []
+        for utg_path in utg_files:
+            name = self._state_file_key(utg_path, data_path)
+            try:
+                hashes[name] = hashlib.sha1(utg_path.read_bytes()).hexdigest()
+            except OSError as e:
+                logger.warning(f"  跳过 {utg_path}: {e}")
+                continue
+            cached = cached_files.get(name)
+            if not cached or cached.get("hash") != hashes[name]:
+                changed.append(utg_path)
+
+        removed = [name for name in cached_files if name not in hashes]
+        logger.info(f"  增量: {len(hashes) - len(changed)} 个文件复用，{len(changed)} 个新增/变更，{len(removed)} 个已移除")
+
+        fresh = self._extract_by_file(changed, checkpoint) if changed else {}
+        changed_names = {str(p) for p in changed}
+
+        files: Dict[str, Dict] = {}
+        extractions: List[Dict] = []
+        for utg_path in utg_files:
+            name = self._state_file_key(utg_path, data_path)
+            if name not in hashes:
+                continue
+            if str(utg_path) in changed_names:
+                entry = fresh.get(str(utg_path))
+                if entry is None:
+                    continue  # 读取失败
+                extractions.extend(entry["extractions"])
+                if entry["complete"]:
+                    files[name] = {"hash": hashes[name], "extractions": entry["extractions"]}
+            else:
+                files[name] = cached_files[name]
+                extractions.extend(cached_files[name]["extractions"])
+
+        state["files"] = files
         return extractions
 
     # ── Phase 2 ─────────────────────────────────────────
 
-    def normalize_page_types(self, extractions: List[Dict]) -> Dict[str, Any]:
-        """Phase 2: 按 appName 聚类归一化"""
+    def normalize_page_types(self, extractions: List[Dict],
+                             cache: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
+        """
+        Phase 2: 按 appName 聚类归一化
+
+        cache 为增量状态中的 {appName: {"hash": 输入哈希, "page_types": [...]}}：
+        原始类型列表未变化的 App 直接复用，原地更新并移除已不存在的 App。
+        """
         by_app = defaultdict(list)
         for ext in extractions:
             by_app[ext["appName"]].append(ext["raw_page_type"])
@@ -159,43 +401,68 @@ class PageSpecExtractor:
         result = {"version": "1.0", "apps": {}}
 
         for app_name, raw_types in sorted(by_app.items()):
-            unique_types = list(dict.fromkeys(raw_types))
-            logger.info(f"\n[{app_name}] {len(unique_types)} 种原始页面类型 → 聚类中...")
-
-            prompt = CLUSTER_PROMPT.format(
-                appName=app_name,
-                raw_types=json.dumps(
-                    [{"type": t, "count": raw_types.count(t)} for t in unique_types],
-                    ensure_ascii=False,
-                ),
-            )
+            input_hash = _content_hash(raw_types)
+            cached = cache.get(app_name) if cache is not None else None
+            if cached and cached.get("hash") == input_hash:
+                result["apps"][app_name] = cached["page_types"]
+                logger.info(f"\n[{app_name}] 原始类型未变化，复用聚类结果 ({len(cached['page_types'])} 类)")
+                continue
+
+            page_types = self._normalize_app(app_name, raw_types)
+            result["apps"][app_name] = page_types or []
+            # 聚类失败的 App 不记录，下次运行时重试
+            if cache is not None and page_types:
+                cache[app_name] = {"hash": input_hash, "page_types": page_types}
+
+        if cache is not None:
+            for app_name in [name for name in cache if name not in by_app]:
+                del cache[app_name]
+
+        return result
+
+    def _normalize_app(self, app_name: str, raw_types: List[str]) -> Optional[List[Dict]]:
+        """单个 App 的聚类归一化，失败（含重试）返回 None"""
+        unique_types = list(dict.fromkeys(raw_types))
+        logger.info(f"\n[{app_name}] {len(unique_types)} 种原始页面类型 → 聚类中...")
+
+        prompt = CLUSTER_PROMPT.format(
+            appName=app_name,
+            raw_types=json.dumps(
+                [{"type": t, "count": raw_types.count(t)} for t in unique_types],
+                ensure_ascii=False,
+            ),
+        )
+        try:
+            raw = self.llm.chat(prompt, expect_json=True)
+            resp = self.llm.extract_json(raw)
+            page_types = resp.get("page_types", [])
+            for pt in page_types:
+                logger.info(f"  ✓ {pt['name']} (×{pt['count']})")
+            return page_types
+        except Exception as e:
+            logger.warning(f"  首次解析失败，重试中: {e}")
             try:
-                raw = self.llm.chat(prompt)
+                retry_prompt = prompt + "\n\n重要：只输出纯 JSON，不要 markdown 代码块，不要任何额外文字。确保 JSON 格式正确，不要尾随逗号。"
+                raw = self.llm.chat(retry_prompt, expect_json=True)
                 resp = self.llm.extract_json(raw)
                 page_types = resp.get("page_types", [])
-                result["apps"][app_name] = page_types
                 for pt in page_types:
-                    logger.info(f"  ✓ {pt['name']} (×{pt['count']})")
-            except Exception as e:
-                logger.warning(f"  首次解析失败，重试中: {e}")
-                try:
-                    retry_prompt = prompt + "\n\n重要：只输出纯 JSON，不要 markdown 代码块，不要任何额外文字。确保 JSON 格式正确，不要尾随逗号。"
-                    raw = self.llm.chat(retry_prompt)
-                    resp = self.llm.extract_json(raw)
-                    page_types = resp.get("page_types", [])
-                    result["apps"][app_name] = page_types
-                    for pt in page_types:
-                        logger.info(f"  ✓ {pt['name']} (×{pt['count']}) [重试成功]")
-                except Exception as e2:
-                    logger.error(f"  ✗ 聚类失败 (重试后): {e2}")
-                    result["apps"][app_name] = []
-
-        return result
+                    logger.info(f"  ✓ {pt['name']} (×{pt['count']}) [重试成功]")
+                return page_types
+            except Exception as e2:
+                logger.error(f"  ✗ 聚类失败 (重试后): {e2}")
+                return None
 
     # ── Phase 3 ─────────────────────────────────────────
 
-    def build_spec(self, normalized: Dict[str, Any]) -> Dict[str, Any]:
-        """Phase 3: 构建 Spec"""
+    def build_spec(self, normalized: Dict[str, Any],
+                   template_cache: Optional[Dict[str, List[Dict]]] = None) -> Dict[str, Any]:
+        """
+        Phase 3: 构建 Spec
+
+        template_cache 为增量状态中的 {模板输入哈希: templates}：已生成过的模板直接复用，
+        原地更新并只保留本次用到的条目。
+        """
         APP_CATEGORY_MAP = {
             "淘宝": "shopping", "天猫": "shopping", "京东": "shopping", "拼多多": "shopping",
             "华为商城": "shopping", "去哪儿旅行": "travel", "铁路12306": "travel", "12306": "travel",
@@ -206,6 +473,7 @@ class PageSpecExtractor:
         spec = {"version": "1.0", "description": "页面类型 Spec", "categories": {}}
         cat_apps = defaultdict(list)
         apps_data = normalized.get("apps", {})
+        used_templates = set()
 
         for app_name in apps_data:
             cat = APP_CATEGORY_MAP.get(app_name, "other")
@@ -229,24 +497,37 @@ class PageSpecExtractor:
 
             logger.info(f"\n[{category}] 生成指令模板...")
             for pt_name, pt_entry in cat_entry["page_types"].items():
-                templates = self._generate_templates(app_list[0], pt_name, pt_entry.get("aliases", [pt_name])[0])
+                page_description = pt_entry.get("aliases", [pt_name])[0]
+                used_templates.add(_template_key(app_list[0], pt_name, page_description))
+                templates = self._generate_templates(app_list[0], pt_name, page_description, cache=template_cache)
                 pt_entry["templates"] = templates
                 for t in templates:
                     logger.info(f"    {t['anomaly_mode']}: {t['template'][:60]}...")
 
             spec["categories"][category] = cat_entry
 
+        if template_cache is not None:
+            for key in [k for k in template_cache if k not in used_templates]:
+                del template_cache[key]
+
         return spec
 
-    def _generate_templates(self, app_name: str, page_type: str, page_description: str) -> List[Dict]:
+    def _generate_templates(self, app_name: str, page_type: str, page_description: str,
+                            cache: Optional[Dict[str, List[Dict]]] = None) -> List[Dict]:
+        """cache 命中时不调用 LLM；LLM 生成成功的模板写入 cache（兜底模板不写入，下次重试）"""
+        key = _template_key(app_name, page_type, page_description)
+        if cache is not None and key in cache:
+            return cache[key]
         prompt = SPEC_TEMPLATE_PROMPT.format(appName=app_name, page_type=page_type, page_description=page_description)
         anomaly_modes = ["dialog", "area_loading", "content_duplicate", "text_overlay",
                          "modify_text", "modify_text_ai", "modify_text_ocr", "modify_text_e2e", "image_broken"]
         try:
-            resp = self.llm_spec.extract_json(self.llm_spec.chat(prompt))
+            resp = self.llm_spec.extract_json(self.llm_spec.chat(prompt, expect_json=True))
             templates = resp.get("templates", [])
             valid = [t for t in templates if t.get("anomaly_mode") in anomaly_modes]
             if valid:
+                if cache is not None:
+                    cache[key] = valid
                 return valid
         except Exception as e:
             logger.warning(f"    LLM 模板生成失败: {e}")
@@ -264,10 +545,41 @@ class PageSpecExtractor:
         }
         return [{"anomaly_mode": mode, "template": fallback.get(mode, f"在{page_type}注入{mode}异常")} for mode in anomaly_modes]
 
+    # ── 增量状态 ────────────────────────────────────────
+
+    def _new_state(self) -> Dict[str, Any]:
+        return {"version": STATE_VERSION, "model": self.llm.model, "files": {}, "apps": {}, "templates": {}}
+
+    def _load_state(self, path: Path) -> Dict[str, Any]:
+        """读取增量状态；格式版本或模型不一致时从空状态开始（即全量重建）"""
+        if not path.exists():
+            return self._new_state()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"  增量状态读取失败，全量重建: {e}")
+            return self._new_state()
+        if state.get("version") != STATE_VERSION or state.get("model") != self.llm.model:
+            logger.info("  增量状态的版本或模型与本次不一致，全量重建")
+            return self._new_state()
+        for field in ("files", "apps", "templates"):
+            state.setdefault(field, {})
+        return state
+
+    @staticmethod
+    def _save_state(path: Path, state: Dict[str, Any]) -> None:
+        """先写临时文件再替换，中断时不会留下半个状态文件"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
     # ── 全流程 ──────────────────────────────────────────
 
     def run(self, data_dir: str, output_dir: Optional[str] = None,
-            skip_phase: int = 0, resume: Optional[str] = None) -> Dict[str, Any]:
+            skip_phase: int = 0, resume: Optional[str] = None, incremental: bool = True) -> Dict[str, Any]:
+        """incremental: 指定 output_dir 时复用 spec_state.json；False 时忽略已有状态全量重建（仍写入新状态）"""
         print(f"\n{'='*60}\n页面类型 Spec 抽取器\n  LLM: {self.llm.model}\n  数据目录: {data_dir}\n{'='*60}\n")
         output_path = Path(output_dir) if output_dir else Path.cwd()
         if output_dir:
@@ -275,6 +587,15 @@ class PageSpecExtractor:
 
         result = {}
 
+        state_path = output_path / STATE_NAME
+        state = None
+        if output_dir:
+            if incremental:
+                state = self._load_state(state_path)
+            else:
+                state = self._new_state()
+                (output_path / CHECKPOINT_NAME).unlink(missing_ok=True)
+
         if skip_phase < 1:
             print("\n>>> Phase 1: 原始页面类型提取")
             if resume and Path(resume).exists():
@@ -286,18 +607,26 @@ class PageSpecExtractor:
                 if not utg_files:
                     print("  ❌ 未找到 utg.json 文件")
                     return result
-                extractions = self.extract_raw_page_types(utg_files)
+                checkpoint = output_path / CHECKPOINT_NAME if output_dir else None
+                if state is not None:
+                    extractions = self._extract_incremental(utg_files, data_dir, state, checkpoint=checkpoint)
+                    self._save_state(state_path, state)
+                else:
+                    extractions = self.extract_raw_page_types(utg_files, checkpoint=checkpoint)
             result["raw_extractions"] = extractions
             if output_dir:
                 with open(output_path / "raw_extractions.json", 'w', encoding='utf-8') as f:
                     json.dump(extractions, f, ensure_ascii=False, indent=2)
+                (output_path / CHECKPOINT_NAME).unlink(missing_ok=True)
 
         if skip_phase < 2:
             print("\n>>> Phase 2: 聚类归一化")
             extractions = result.get("raw_extractions", [])
             if extractions:
-                normalized = self.normalize_page_types(extractions)
+                normalized = self.normalize_page_types(extractions, cache=state["apps"] if state is not None else None)
                 result["normalized"] = normalized
+                if state is not None:
+                    self._save_state(state_path, state)
                 if output_dir:
                     with open(output_path / "normalized_page_types.json", 'w', encoding='utf-8') as f:
                         json.dump(normalized, f, ensure_ascii=False, indent=2)
@@ -306,8 +635,10 @@ class PageSpecExtractor:
             print("\n>>> Phase 3: 构建 Spec")
             normalized = result.get("normalized", {})
             if normalized and normalized.get("apps"):
-                page_spec = self.build_spec(normalized)
+                page_spec = self.build_spec(normalized, template_cache=state["templates"] if state is not None else None)
                 result["page_spec"] = page_spec
+                if state is not None:
+                    self._save_state(state_path, state)
                 if output_dir:
                     with open(output_path / "page_spec.json", 'w', encoding='utf-8') as f:
                         json.dump(page_spec, f, ensure_ascii=False, indent=2)
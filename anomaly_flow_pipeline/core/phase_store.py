@@ -0,0 +1,177 @@
+"""
+phase_store.py — pipeline 阶段产物存储（按输入内容哈希寻址）
+
+run_pipeline 每次运行都新建时间戳目录并从 Phase 0 重新计算：同一 UTG / 模板几分钟前
+刚处理过，调整 Phase 3/4 的 prompt 时也要重新支付 Phase 0-2 的全部 LLM 调用。
+
+本模块以 阶段名 + 输入文件内容哈希 + 阶段配置 + 阶段相关源码哈希 作为键，
+保存阶段产物文件（phase0_preprocessed.json 等）与阶段结果摘要。
+命中时把产物复制到本次输出目录，从第一个输入或配置发生变化的阶段开始重新计算；
+下游阶段的输入是上游产物的内容，上游重新计算且结果变化时下游自然失效。
+
+只保存成功的阶段结果，每个阶段完成后立即写入：崩溃后重跑会复用已完成的阶段。
+
+环境变量：
+    PHASE_STORE=0        禁用（不读不写，等价于 run_pipeline --no-phase-store）
+    PHASE_STORE_DIR      存储目录（默认 anomaly_flow_pipeline/.cache/phases）
+
+存储目录可随时整体删除。
+
+使用方式：
+    store = get_phase_store()
+    key = store.key("preprocess", inputs=[utg_path, template_path],
+                    config={"model": model}, sources=[...])
+    result = store.fetch("preprocess", key, output_path)
+    if result is None:
+        result = ...  # 计算并写出 output_path
+        if result["success"]:
+            store.save("preprocess", key, output_path, result)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_STORE_DIR = Path(__file__).resolve().parents[1] / '.cache' / 'phases'
+
+# 键格式版本（键的组成方式变化时递增，使旧记录失效）
+STORE_VERSION = 1
+
+_ARTIFACT_NAME = 'artifact.json'
+_RESULT_NAME = 'result.json'
+
+# 不写入结果摘要的字段（内容即产物文件本身）
+_EXCLUDED_RESULT_KEYS = ('modified_utg',)
+
+
+def phase_store_enabled() -> bool:
+    """是否启用阶段存储（PHASE_STORE=0/false/off 时禁用）"""
+    return os.environ.get('PHASE_STORE', '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+class PhaseStore:
+    """
+    阶段产物存储（线程安全；多进程共享同一目录时依赖原子重命名）
+
+    目录结构：<root>/<phase>/<key>/{artifact.json, result.json}
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or os.environ.get('PHASE_STORE_DIR') or _DEFAULT_STORE_DIR)
+        # 文件摘要缓存：路径 → ((mtime_ns, size), sha256)，批量模式下模板与源码只读一次
+        self._digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+
+    def file_digest(self, path) -> Optional[str]:
+        """文件内容 SHA-256，文件不存在时返回 None"""
+        p = Path(path).resolve()
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._digests.get(str(p))
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        h = hashlib.sha256()
+        with open(p, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._digests[str(p)] = (signature, digest)
+        return digest
+
+    def key(
+        self,
+        phase: str,
+        inputs: Sequence[Any] = (),
+        config: Optional[Dict[str, Any]] = None,
+        sources: Sequence[Any] = (),
+    ) -> str:
+        """
+        计算阶段键
+
+        Args:
+            phase: 阶段名
+            inputs: 输入文件路径（取内容哈希，路径本身不参与）
+            config: 影响阶段结果的配置（需可 JSON 序列化）
+            sources: 阶段相关源码 / prompt 文件（改动后旧结果失效）
+        """
+        material = {
+            'version': STORE_VERSION,
+            'phase': phase,
+            'inputs': [self.file_digest(p) if p else None for p in inputs],
+            'config': config or {},
+            'sources': sorted(self.file_digest(p) or '' for p in sources),
+        }
+        raw = json.dumps(material, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, phase: str, key: str) -> Path:
+        return self.root / phase / key
+
+    def fetch(self, phase: str, key: str, output_path) -> Optional[Dict[str, Any]]:
+        """
+        命中时把产物复制到 output_path 并返回保存的阶段结果，未命中返回 None
+        """
+        entry = self._entry_dir(phase, key)
+        artifact = entry / _ARTIFACT_NAME
+        result_path = entry / _RESULT_NAME
+        if not (artifact.exists() and result_path.exists()):
+            return None
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(artifact, output_path)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"阶段存储读取失败 ({phase}/{key[:12]}): {e}")
+            return None
+        if 'output_path' in result:
+            result['output_path'] = str(output_path)
+        return result
+
+    def save(self, phase: str, key: str, output_path, result: Dict[str, Any]) -> None:
+        """保存阶段产物与结果摘要（先写临时目录再重命名，中断不会留下半条记录）"""
+        entry = self._entry_dir(phase, key)
+        if entry.exists():
+            return
+        tmp = entry.parent / f".tmp-{key[:12]}-{uuid.uuid4().hex[:8]}"
+        try:
+            tmp.mkdir(parents=True)
+            shutil.copyfile(output_path, tmp / _ARTIFACT_NAME)
+            summary = {k: v for k, v in result.items() if k not in _EXCLUDED_RESULT_KEYS}
+            with open(tmp / _RESULT_NAME, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, default=str)
+            os.replace(tmp, entry)
+        except OSError as e:
+            # 并发写入同一键时 os.replace 失败属正常情况
+            if not entry.exists():
+                logger.warning(f"阶段存储写入失败 ({phase}/{key[:12]}): {e}")
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+
+_store: Optional[PhaseStore] = None
+_store_lock = threading.Lock()
+
+
+def get_phase_store() -> PhaseStore:
+    """获取进程级共享的阶段存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PhaseStore()
+        return _store
@@ -9,16 +9,23 @@ quality_validator.py — 输出质量验证器（Phase 3）
 4. 可读性 — 无晦涩表述、口语化程度
 5. 流程合理性 — 符合业务页面拓扑
 
-纯 Python 实现，仅最后一项可读性检查可选 LLM。
+规则维度为纯 Python 实现，先串行执行；
+LLM 维度（价格一致性判别、整体校验）随后并发执行，
+Phase 3 耗时接近最慢的单次 LLM 调用而非各调用之和。
+结果中的 timing 字段给出各维度耗时与 LLM 调用次数。
 """
 
 import json
 import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 
 from .llm_client import LLMClient
+from .rule_pack import get_rule_pack
 from ..prompts import (
     PRICE_CONSISTENCY_PROMPT,
     HOLISTIC_VALIDATION_PROMPT,
@@ -37,13 +44,6 @@ SCREEN_KEY_ORDER = [
     "cart", "checkout", "payment", "orders", "orderDetail",
 ]
 
-OBSCURE_PATTERNS = [
-    r'\bexception\b', r'\berror\b', r'\bnull\b', r'\bundefined\b',
-    r'HTTP\s*\d{3}', r'状态码', r'异常码',
-    r'数据库查询', r'后端返回',
-    r'JSON\s*解析', r'请求失败',
-]
-
 REQUIRED_FIELDS = ["order", "action"]
 
 # ── 价格一致性 Few-Shot Prompt ──────────────────────────
@@ -57,6 +57,10 @@ class QualityValidator:
             llm: 可选 LLM 客户端。不传时按需从环境变量创建。
         """
         self._llm = llm
+        # 规则检查使用的正则来自共享规则包（rules/text_rules.json，进程内编译一次）
+        self._rules = get_rule_pack()
+        # 各 LLM 维度在独立线程中执行，调用计数按线程记录
+        self._usage = threading.local()
 
     def _get_llm(self) -> Optional[LLMClient]:
         """获取 LLM 客户端（延迟初始化）"""
@@ -67,13 +71,38 @@ class QualityValidator:
                 return None
         return self._llm
 
-    def validate(self, flow_data: Dict, template_path: Optional[str] = None) -> Dict[str, Any]:
+    def _chat(self, llm: LLMClient, prompt: str, expect_json: bool = False) -> str:
+        """调用 LLM 并记录当前线程的调用次数与 prompt 长度"""
+        self._usage.calls = getattr(self._usage, "calls", 0) + 1
+        self._usage.prompt_chars = getattr(self._usage, "prompt_chars", 0) + len(prompt)
+        return llm.chat(prompt, expect_json=expect_json)
+
+    def _run_dimension(self, kind: str, fn, *args) -> Tuple[Dict, Dict]:
+        """执行单个维度，返回 (维度结果, 耗时与 LLM 调用统计)"""
+        self._usage.calls = 0
+        self._usage.prompt_chars = 0
+        t0 = time.time()
+        dim_result = fn(*args)
+        stats = {
+            "type": kind,
+            "elapsed": round(time.time() - t0, 3),
+            "llm_calls": self._usage.calls,
+            "prompt_chars": self._usage.prompt_chars,
+        }
+        return dim_result, stats
+
+    def validate(self, flow_data: Dict, template_path: Optional[str] = None,
+                 skip_llm_on_schema_failure: bool = False) -> Dict[str, Any]:
         """
         执行全维度验证。
 
+        先串行执行规则维度，再并发执行 LLM 维度（价格一致性判别、整体校验）。
+
         Args:
             flow_data: Flow JSON 数据
             template_path: 模板路径（可选，用于推导字段约束 + 拓扑 screenKeys）
+            skip_llm_on_schema_failure: Schema 未通过时跳过 LLM 维度（结果必然不通过，
+                                        可省去 LLM 调用；默认关闭以保留整体校验诊断供修复使用）
 
         Returns:
             {
@@ -87,6 +116,10 @@ class QualityValidator:
                     "topology": {"passed": bool, "issues": [...]},
                 },
                 "summary": str,
+                "timing": {
+                    "rule_phase": float, "llm_phase": float, "total": float,
+                    "dimensions": {name: {"type", "elapsed", "llm_calls", "prompt_chars"}},
+                },
             }
         """
         result = {
@@ -95,6 +128,7 @@ class QualityValidator:
             "dimensions": {},
             "summary": "",
         }
+        t_start = time.time()
 
         steps = flow_data.get("mainFlow", {}).get("steps", [])
 
@@ -112,34 +146,72 @@ class QualityValidator:
                         if required not in template_step_fields:
                             template_step_fields.append(required)
 
-        # 各维度验证
-        schema_result = self._validate_schema(steps, template_step_fields)
-        consistency_result = self._validate_consistency(steps)
-        coherence_result = self._validate_coherence(steps)
-        readability_result = self._validate_readability(steps)
-        redundancy_result = self._validate_redundancy(steps)
-        clarity_result = self._validate_clarity(steps)
-        page_stack_result = self._validate_page_stack(steps)
-        completeness_result = self._validate_flow_completeness(steps, template)
-        holistic_result = self._validate_holistic(flow_data)
-
-        topology_result = {"passed": True, "issues": [], "score": 1.0}
+        # ── 规则维度（串行，纯 Python） ──────────────────
+        rule_tasks = {
+            "schema": (self._validate_schema, steps, template_step_fields),
+            "consistency_rules": (self._check_consistency_rules, steps),
+            "coherence": (self._validate_coherence, steps),
+            "readability": (self._validate_readability, steps),
+            "redundancy": (self._validate_redundancy, steps),
+            "clarity": (self._validate_clarity, steps),
+            "page_stack": (self._validate_page_stack, steps),
+            "completeness": (self._validate_flow_completeness, steps, template),
+        }
         if template and template_step_fields and "targetPage" in template_step_fields:
-            topology_result = self._validate_topology(steps, template)
+            rule_tasks["topology"] = (self._validate_topology, steps, template)
+
+        rule_results: Dict[str, Any] = {}
+        timing: Dict[str, Dict] = {}
+        for name, (fn, *args) in rule_tasks.items():
+            rule_results[name], timing[name] = self._run_dimension("rule", fn, *args)
+        rule_results.setdefault("topology", {"passed": True, "issues": [], "score": 1.0})
+        t_rules = time.time()
+
+        # ── LLM 维度（并发） ────────────────────────────
+        llm_tasks = {
+            "consistency": (self._judge_price_consistency, steps, rule_results.pop("consistency_rules")),
+            "holistic": (self._validate_holistic, flow_data),
+        }
+        llm_results: Dict[str, Dict] = {}
+        if skip_llm_on_schema_failure and not rule_results["schema"]["passed"]:
+            logger.info("  Schema 未通过，跳过 LLM 维度")
+            for name in llm_tasks:
+                llm_results[name] = {
+                    "passed": False, "score": 0.0,
+                    "issues": ["Schema 未通过，跳过 LLM 校验"], "skipped": True,
+                }
+                timing[name] = {"type": "llm", "elapsed": 0.0, "llm_calls": 0, "prompt_chars": 0}
+        else:
+            # 在主线程完成 LLM 客户端初始化，避免并发线程重复创建
+            self._get_llm()
+            with ThreadPoolExecutor(max_workers=len(llm_tasks)) as pool:
+                futures = {
+                    name: pool.submit(self._run_dimension, "llm", fn, *args)
+                    for name, (fn, *args) in llm_tasks.items()
+                }
+                for name, future in futures.items():
+                    llm_results[name], timing[name] = future.result()
+        t_llm = time.time()
 
         dimensions = {
-            "schema": schema_result,
-            "consistency": consistency_result,
-            "coherence": coherence_result,
-            "readability": readability_result,
-            "redundancy": redundancy_result,
-            "clarity": clarity_result,
-            "page_stack": page_stack_result,
-            "completeness": completeness_result,
-            "holistic": holistic_result,
-            "topology": topology_result,
+            "schema": rule_results["schema"],
+            "consistency": llm_results["consistency"],
+            "coherence": rule_results["coherence"],
+            "readability": rule_results["readability"],
+            "redundancy": rule_results["redundancy"],
+            "clarity": rule_results["clarity"],
+            "page_stack": rule_results["page_stack"],
+            "completeness": rule_results["completeness"],
+            "holistic": llm_results["holistic"],
+            "topology": rule_results["topology"],
         }
         result["dimensions"] = dimensions
+        result["timing"] = {
+            "rule_phase": round(t_rules - t_start, 3),
+            "llm_phase": round(t_llm - t_rules, 3),
+            "total": round(t_llm - t_start, 3),
+            "dimensions": timing,
+        }
 
         # 综合评分
         total_score = sum(d.get("score", 0) for d in dimensions.values())
@@ -160,6 +232,12 @@ class QualityValidator:
             result["summary"] = "全部验证通过"
 
         logger.info(f"  质量评分: {result['score']}/1.0 {'✅' if result['passed'] else '❌'}")
+        logger.info(
+            f"  验证耗时: 规则 {result['timing']['rule_phase']:.2f}s, "
+            f"LLM {result['timing']['llm_phase']:.2f}s "
+            f"(consistency {timing['consistency']['elapsed']:.2f}s, "
+            f"holistic {timing['holistic']['elapsed']:.2f}s)"
+        )
         if all_issues:
             for issue in all_issues:
                 logger.info(f"    ⚠ {issue}")
@@ -246,52 +324,53 @@ class QualityValidator:
                  若仍有多个价格 → Few-Shot LLM 判别是否为真实不一致；
                  若 LLM 不可用 → 跳过价格检查（保守策略）。
         """
+        return self._judge_price_consistency(steps, self._check_consistency_rules(steps))
+
+    def _check_consistency_rules(self, steps: List[Dict]) -> Dict:
+        """
+        一致性检查的规则部分：品牌、数量、价格提取。
+
+        Returns:
+            {"issues": [...], "all_prices": [(order, raw, numeric)], "price_numerics": set}
+        """
         issues = []
+        rules = self._rules
 
         # ── 品牌检查（纯规则） ──────────────────────────
         product_names = set()
+        product_name_rule = rules.group("validator.product_name")
         for step in steps:
             action = step.get("action", "")
-            for m in re.finditer(
-                    r'[\u4e00-\u9fff\w]+\s*[\u4e00-\u9fff\w]+(?:Pro|Max|Ultra|\d+[\w]*)*',
-                    action):
-                if len(m.group()) > 3:
-                    product_names.add(m.group())
+            for hit in product_name_rule.finditer(action):
+                if len(hit.text) > 3:
+                    product_names.add(hit.text)
 
         brands_found = set()
+        brand_rule = rules.group("validator.brand")
         for name in product_names:
-            for brand in ["华为", "iPhone", "Apple", "小米", "三星", "荣耀", "OPPO", "vivo"]:
-                if brand in name:
-                    brands_found.add(brand)
+            brands_found |= brand_rule.labels_in(name)
         if len(brands_found) > 1:
             issues.append(f"步骤中出现多个品牌: {', '.join(brands_found)}")
 
         # ── 数量一致性检查 ──────────────────────────────
         # 提取各步骤中的商品数量表述，追踪数量变化链
         quantity_history: List[tuple] = []  # [(order, quantity, context)]
-        quantity_patterns = [
-            r'(?:共|已选|已添加)\s*(\d+)\s*件',
-            r'(\d+)\s*件\s*商品',
-            r'去结算\s*[（(]\s*(\d+)\s*[）)]',
-            r'购物车中有\s*(\d+)\s*件',
-            r'数量[：:]\s*(\d+)',
-            r'共\s*(\d+)\s*件',
-        ]
+        quantity_rule = rules.group("validator.quantity")
+        quantity_change_rule = rules.group("validator.quantity_change")
 
         for step in steps:
             action = step.get("action", "")
             order = step.get("order", 0)
-            for pat in quantity_patterns:
-                m = re.search(pat, action)
-                if m:
-                    qty = int(m.group(1))
-                    # 获取数量附近的上下文（±30字）
-                    idx = m.start()
-                    start = max(0, idx - 30)
-                    end = min(len(action), idx + len(m.group()) + 30)
-                    ctx = action[start:end].strip()
-                    quantity_history.append((order, qty, ctx))
-                    break  # 每个步骤只取第一个匹配
+            # 每个步骤只取优先级最高的匹配
+            hit = quantity_rule.search(action)
+            if hit:
+                qty = int(hit.value)
+                # 获取数量附近的上下文（±30字）
+                idx = hit.start
+                start = max(0, idx - 30)
+                end = min(len(action), idx + len(hit.text) + 30)
+                ctx = action[start:end].strip()
+                quantity_history.append((order, qty, ctx))
 
         # 检查数量突变
         for i in range(1, len(quantity_history)):
@@ -307,7 +386,7 @@ class QualityValidator:
                     if prev_order < so < curr_order:
                         a = s.get("action", "")
                         steps_between += a
-                        if re.search(r'添加|删除|移出|清空|增加|减少|加购|勾选|取消', a):
+                        if quantity_change_rule.matches(a):
                             action_between = s.get("action", "")
 
             # 如果没有合理解释的数量变化 > 1，标记
@@ -328,19 +407,28 @@ class QualityValidator:
         all_prices: List[tuple] = []
         price_numerics: set = set()
 
+        price_rule = rules.group("validator.price")
         for step in steps:
             action = step.get("action", "")
             order = step.get("order", 0)
 
-            for m in re.finditer(r'¥?\s*(\d+[\.\d]*)\s*元', action):
-                raw = m.group(0)
+            for hit in price_rule.finditer(action):
+                raw = hit.text
                 try:
-                    numeric = float(m.group(1))
+                    numeric = float(hit.value)
                 except ValueError:
                     continue
                 all_prices.append((order, raw, numeric))
                 price_numerics.add(numeric)
 
+        return {"issues": issues, "all_prices": all_prices, "price_numerics": price_numerics}
+
+    def _judge_price_consistency(self, steps: List[Dict], rule_state: Dict) -> Dict:
+        """一致性检查的 LLM 部分：多个价格时由 Few-Shot LLM 判别是否为真实不一致"""
+        issues = list(rule_state["issues"])
+        all_prices = rule_state["all_prices"]
+        price_numerics = rule_state["price_numerics"]
+
         # 如果只有一个价格（或没有），直接通过
         if len(price_numerics) <= 1:
             passed = len(issues) == 0
@@ -382,7 +470,7 @@ class QualityValidator:
         )
 
         try:
-            llm_result = llm.chat(prompt).strip()
+            llm_result = self._chat(llm, prompt).strip()
             logger.info(f"  价格一致性 LLM 判断: {llm_result}")
 
             if llm_result.startswith("不一致"):
@@ -448,6 +536,8 @@ class QualityValidator:
         issues = []
         total_checks = 0
         violations = 0
+        obscure_rule = self._rules.group("validator.obscure")
+        subject_rule = self._rules.group("validator.subject")
 
         for step in steps:
             action = step.get("action", "")
@@ -457,13 +547,12 @@ class QualityValidator:
             total_checks += 1
 
             # 晦涩表述
-            for pattern in OBSCURE_PATTERNS:
-                if re.search(pattern, action, re.IGNORECASE):
-                    violations += 1
-                    issues.append(
-                        f"Step {step['order']}: 含晦涩表述 (匹配: {pattern})"
-                    )
-                    break
+            hit = obscure_rule.search(action)
+            if hit:
+                violations += 1
+                issues.append(
+                    f"Step {step['order']}: 含晦涩表述 (匹配: {hit.label})"
+                )
 
             # 句长
             if len(action) > MAX_ACTION_LENGTH:
@@ -473,7 +562,7 @@ class QualityValidator:
                 )
 
             # 缺少主语（用户/系统）
-            if not re.search(r'用户|系统|页面', action):
+            if not subject_rule.matches(action):
                 violations += 1
                 issues.append(
                     f"Step {step['order']}: 缺少主语（用户/系统/页面）"
@@ -496,6 +585,8 @@ class QualityValidator:
             return {"passed": True, "issues": [], "score": 1.0}
 
         # 提取操作动词和操作目标
+        verb_rule = self._rules.group("validator.op_verb")
+        target_rule = self._rules.group("validator.op_target")
         ops: List[tuple] = []
         for step in steps:
             action = step.get("action", "")
@@ -503,12 +594,12 @@ class QualityValidator:
             # 从 "用户在XX上YY" 中提取动词
             verb = ""
             target = ""
-            m = re.search(r'用户在\S*上(?:依次)?\s*(\S+)', action)
+            m = verb_rule.search(action)
             if m:
-                verb = m.group(1)
-            m2 = re.search(r'(?:点击|输入|滑动|选择|切换)(\S+)', action)
+                verb = m.value
+            m2 = target_rule.search(action)
             if m2:
-                target = m2.group(1)
+                target = m2.value
             ops.append((order, verb, target, action))
 
         # 连续同操作检测
@@ -557,28 +648,19 @@ class QualityValidator:
         """
         issues = []
         violations = 0
-
-        ambiguity_patterns = [
-            (r'或\s*[（(]', '二选一结构（"A或B"）'),
-            (r'[（(]\S+[）)]\s*或\s*[（(]', '二选一结构'),
-            (r'可能[是会]?', '不确定表述 "可能"'),
-            (r'大概[是会]?', '不确定表述 "大概"'),
-            (r'不确定', '不确定表述'),
-            (r'也许是', '不确定表述'),
-        ]
+        ambiguity_rule = self._rules.group("validator.ambiguity")
 
         for step in steps:
             action = step.get("action", "")
             order = step.get("order", 0)
-            for pat, label in ambiguity_patterns:
-                m = re.search(pat, action)
-                if m:
-                    violations += 1
-                    issues.append(
-                        f"Step {order}: 含{label} — "
-                        f"\"{action[m.start():m.start()+40]}...\""
-                    )
-                    break  # 每步只报一次
+            # 每步只报一次（优先级最高的歧义类型）
+            hit = ambiguity_rule.search(action)
+            if hit:
+                violations += 1
+                issues.append(
+                    f"Step {order}: 含{hit.label} — "
+                    f"\"{action[hit.start:hit.start+40]}...\""
+                )
 
         passed = violations == 0
         score = max(0, 1.0 - violations * 0.2)
@@ -596,29 +678,22 @@ class QualityValidator:
         violations = 0
         stack: List[str] = ["home"]  # 初始页面
 
-        push_patterns = [r'进入\s*(\S+页)', r'跳转至\s*(\S+页?)',
-                         r'前往\s*(\S+页)', r'打开\s*(\S+页)']
-        pop_patterns = [r'返回', r'退回', r'退出(?!\s*登录)']
+        push_rule = self._rules.group("validator.page_push")
+        pop_rule = self._rules.group("validator.page_pop")
 
         for step in steps:
             action = step.get("action", "")
             order = step.get("order", 0)
 
             # 检测 push
-            pushed = False
-            for pat in push_patterns:
-                m = re.search(pat, action)
-                if m:
-                    page = m.group(1) if m.lastindex else "未知页面"
-                    stack.append(page)
-                    pushed = True
-                    break
-
-            if pushed:
+            m = push_rule.search(action)
+            if m:
+                page = m.value if m.value is not None else "未知页面"
+                stack.append(page)
                 continue
 
             # 检测 pop
-            is_pop = any(re.search(pat, action) for pat in pop_patterns)
+            is_pop = pop_rule.matches(action)
             if is_pop:
                 if len(stack) <= 1:
                     violations += 1
@@ -709,12 +784,6 @@ class QualityValidator:
                 "detail": {},
             }
 
-        # 整体校验需要较大输出空间，用独立 LLM 客户端
-        try:
-            llm_holistic = LLMClient(temperature=0.0)
-        except Exception:
-            llm_holistic = llm
-
         # 构建步骤文本
         step_lines = []
         for s in steps:
@@ -731,7 +800,7 @@ class QualityValidator:
         )
 
         try:
-            raw = llm_holistic.chat(prompt)
+            raw = self._chat(llm, prompt, expect_json=True)
             # 清理可能的 markdown 包裹
             raw = raw.strip()
             if raw.startswith("```"):
@@ -739,7 +808,7 @@ class QualityValidator:
                 raw = re.sub(r'\s*```$', '', raw)
                 raw = raw.strip()
 
-            parsed = llm_holistic.extract_json(raw)
+            parsed = llm.extract_json(raw)
 
             if not isinstance(parsed, dict):
                 return {
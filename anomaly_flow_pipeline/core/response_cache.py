@@ -0,0 +1,233 @@
+"""
+response_cache.py — LLM 响应持久化缓存
+
+与 ui_semantic_patch/app/utils/response_cache.py 格式一致（可通过 LLM_CACHE_PATH
+指向同一文件共享缓存），纯标准库实现。以 SQLite 存储响应文本，
+键为请求 payload 的规范化摘要：
+
+    model + messages（图片 base64 替换为 SHA-256 摘要）+ temperature + max_tokens
+
+仅缓存确定性调用（temperature == 0），采样调用直接透传。
+
+环境变量：
+    LLM_CACHE=0            绕过缓存（不读不写）
+    LLM_CACHE_PATH         SQLite 文件路径（默认 anomaly_flow_pipeline/.cache/llm_responses.sqlite）
+    LLM_CACHE_TTL          记录有效期，单位秒（默认 7 天，0 表示永不过期）
+    LLM_CACHE_MAX_ENTRIES  最大记录数，超出后按最近访问时间淘汰（默认 20000）
+
+使用方式：
+    key = cache_key_for(payload)
+    content = get_response_cache().get(key) if key else None
+    if content is None:
+        content = ...  # 调用 API
+        if key:
+            get_response_cache().put(key, content, payload['model'])
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / '.cache' / 'llm_responses.sqlite'
+_DEFAULT_TTL = 7 * 24 * 3600
+_DEFAULT_MAX_ENTRIES = 20000
+# 每写入多少条检查一次淘汰
+_EVICT_INTERVAL = 100
+
+
+def cache_enabled() -> bool:
+    """是否启用响应缓存（LLM_CACHE=0/false/off 时绕过）"""
+    return os.environ.get('LLM_CACHE', '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+def _normalize_content(content):
+    """将消息中的 data URL 图片替换为内容摘要，避免键中包含整张图片"""
+    if not isinstance(content, list):
+        return content
+    normalized = []
+    for part in content:
+        if isinstance(part, dict) and part.get('type') == 'image_url':
+            url = (part.get('image_url') or {}).get('url', '')
+            digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+            normalized.append({'type': 'image_url', 'image_sha256': digest})
+        else:
+            normalized.append(part)
+    return normalized
+
+
+class ResponseCache:
+    """
+    SQLite 响应缓存（线程安全；多进程可共享同一文件）
+
+    Args:
+        db_path: SQLite 文件路径
+        ttl: 记录有效期（秒），0 或 None 表示永不过期
+        max_entries: 最大记录数
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        if db_path is None:
+            db_path = os.environ.get('LLM_CACHE_PATH') or _DEFAULT_CACHE_PATH
+        if ttl is None:
+            ttl = float(os.environ.get('LLM_CACHE_TTL', _DEFAULT_TTL))
+        if max_entries is None:
+            max_entries = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', _DEFAULT_MAX_ENTRIES))
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY,'
+                ' model TEXT,'
+                ' response TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)'
+            )
+
+    @staticmethod
+    def is_cacheable(payload: Dict) -> bool:
+        """仅缓存确定性调用（temperature 为 0）"""
+        return float(payload.get('temperature', 1.0) or 0.0) == 0.0
+
+    @staticmethod
+    def make_key(payload: Dict) -> str:
+        """根据请求 payload 生成缓存键"""
+        messages = [
+            {**msg, 'content': _normalize_content(msg.get('content'))}
+            for msg in payload.get('messages', [])
+        ]
+        normalized = {k: v for k, v in payload.items() if k != 'messages'}
+        normalized['messages'] = messages
+        raw = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取响应，未命中或已过期返回 None"""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    'SELECT response, created_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row and self.ttl and now - row[1] > self.ttl:
+                    with self._conn:
+                        self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                with self._conn:
+                    self._conn.execute(
+                        'UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key)
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"响应缓存读取失败: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, model: str = '') -> None:
+        """写入响应"""
+        now = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO responses (key, model, response, created_at, accessed_at)'
+                        ' VALUES (?, ?, ?, ?, ?)',
+                        (key, model, response, now, now)
+                    )
+                self._puts += 1
+                if self._puts % _EVICT_INTERVAL == 0:
+                    self._evict_locked(now)
+            except sqlite3.Error as e:
+                logger.warning(f"响应缓存写入失败: {e}")
+
+    def _evict_locked(self, now: float) -> None:
+        """删除过期记录，并按最近访问时间淘汰超出上限的记录（需持有锁）"""
+        with self._conn:
+            if self.ttl:
+                self._conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl,))
+            count = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM responses WHERE key IN ('
+                    ' SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)',
+                    (overflow,)
+                )
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM responses')
+
+    def stats(self) -> Dict[str, int]:
+        """当前进程内的命中统计"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    获取进程级共享的响应缓存
+
+    Returns:
+        ResponseCache 实例；LLM_CACHE=0 或缓存文件不可用时返回 None
+    """
+    global _response_cache
+    if not cache_enabled():
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            try:
+                _response_cache = ResponseCache()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"响应缓存不可用，已绕过: {e}")
+                return None
+        return _response_cache
+
+
+def cache_key_for(payload: Dict, use_cache: bool = True) -> Optional[str]:
+    """
+    返回 payload 的缓存键；不应缓存时返回 None
+
+    调用方据此决定是否读写缓存：
+        key = cache_key_for(payload)
+        cached = get_response_cache().get(key) if key else None
+    """
+    if not use_cache or not ResponseCache.is_cacheable(payload):
+        return None
+    if get_response_cache() is None:
+        return None
+    return ResponseCache.make_key(payload)
@@ -12,6 +12,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .llm_client import LLMClient
+from .rule_pack import get_rule_pack
 
 
 LLM_EXTRACT_PROMPT = """你是 App 业务建模数据抽取专家。请从 UTG 操作轨迹中抽取 topics.fields 和一个 mockInstance。
@@ -208,76 +209,67 @@ class UTGTopicDataExtractor:
             utg_text=text[:8000],
         )
         try:
-            return self.llm.extract_json(self.llm.chat(prompt))
+            return self.llm.extract_json(self.llm.chat(prompt, expect_json=True))
         except Exception as e:
             return {"fields": [], "values": {}, "businessIdFields": [], "warnings": [f"LLM 抽取失败: {e}"]}
 
     def _extract_values(self, text: str, utg: Dict[str, Any]) -> Dict[str, Any]:
         values: Dict[str, Any] = {}
+        # 各字段的正则与词表来自共享规则包（rules/text_rules.json 的 topic.* 组）
+        rules = get_rule_pack()
 
-        if "华为" in text:
-            values["brand"] = "华为"
-        elif re.search(r"iPhone|Apple|苹果", text, re.IGNORECASE):
-            values["brand"] = "Apple"
-        elif "小米" in text:
-            values["brand"] = "小米"
-        elif "三星" in text:
-            values["brand"] = "三星"
-
-        model = self._first_match(text, [
-            r"华为\s*(畅享\d+X?)",
-            r"(畅享\d+X?)",
-            r"(iPhone\s*\d+\s*(?:Pro|Pro Max)?)",
-            r"(Pura\s*\d+\s*Pro)",
-        ])
+        brand = rules.group("topic.brand").search(text)
+        if brand:
+            values["brand"] = brand.label
+
+        model = self._first_match(text, "topic.model")
         if model:
             values["model"] = model.replace(" ", "")
 
-        storage = self._first_match(text, [r"(\d+\s*GB)", r"(\d+\s*TB)"])
+        storage = self._first_match(text, "topic.storage")
         if storage:
             values["storage"] = storage.replace(" ", "")
 
-        color = self._first_match(text, [r"(雪域白)", r"(沙漠钛金属)", r"(白色钛金属)", r"(黑色钛金属)", r"(钛灰)", r"(岩石青)"])
+        color = self._first_match(text, "topic.color")
         if color:
             values["color"] = color
 
-        max_price = self._first_number(text, [r"价格上限\s*(\d+(?:\.\d+)?)\s*元", r"(\d+(?:\.\d+)?)\s*以内"])
+        max_price = self._first_number(text, "topic.max_price")
         if max_price is not None:
             values["maxPrice"] = max_price
 
-        subsidy_price = self._first_number(text, [r"国补后价\s*(\d+(?:\.\d+)?)\s*元"])
+        subsidy_price = self._first_number(text, "topic.subsidy_price")
         if subsidy_price is not None:
             values["subsidyPrice"] = subsidy_price
 
-        subsidy_amount = self._first_number(text, [r"已补贴\s*(\d+(?:\.\d+)?)\s*元"])
+        subsidy_amount = self._first_number(text, "topic.subsidy_amount")
         if subsidy_amount is not None:
             values["subsidyAmount"] = subsidy_amount
 
-        submit_price = self._first_number(text, [r"提交订单\s*(\d+(?:\.\d+)?)\s*元"])
-        list_price = self._first_number(text, [r"售价\s*(\d+(?:\.\d+)?)\s*元", r"补贴价\s*(\d+(?:\.\d+)?)\s*元"])
+        submit_price = self._first_number(text, "topic.submit_price")
+        list_price = self._first_number(text, "topic.list_price")
         if submit_price is not None:
             values["price"] = submit_price
         elif list_price is not None:
             values["price"] = list_price
 
-        if "百亿补贴" in text:
-            values["promotionTag"] = "百亿补贴"
-        elif "国家补贴" in text:
-            values["promotionTag"] = "国家补贴"
+        promotion = rules.group("topic.promotion_tag").search(text)
+        if promotion:
+            values["promotionTag"] = promotion.label
 
-        quantity = self._first_number(text, [r"数量\s*(\d+)\s*件", r"已选数量\s*(\d+)\s*件"])
+        quantity = self._first_number(text, "topic.quantity")
         if quantity is not None:
             values["quantity"] = int(quantity)
 
-        delivery_method = self._first_match(text, [r"配送方式为([^，。；]+)"])
+        delivery_method = self._first_match(text, "topic.delivery_method")
         if delivery_method:
             values["deliveryMethod"] = delivery_method
 
-        delivery_time = self._first_match(text, [r"送货上门时间([^；，。]+)"])
+        delivery_time = self._first_match(text, "topic.delivery_time")
         if delivery_time:
             values["deliveryTime"] = delivery_time
 
-        if "默认地址" in text:
+        if rules.group("topic.address").matches(text):
             values["address"] = "默认地址"
 
         values.setdefault("processor", "")
@@ -456,7 +448,7 @@ class UTGTopicDataExtractor:
                 extracted=json.dumps({"fields": fields, "mockInstance": instance}, ensure_ascii=False),
             )
             try:
-                llm_result = self.llm.extract_json(self.llm.chat(prompt))
+                llm_result = self.llm.extract_json(self.llm.chat(prompt, expect_json=True))
                 result["llm"] = llm_result
                 if llm_result.get("passed") is False:
                     result["passed"] = False
@@ -477,21 +469,13 @@ class UTGTopicDataExtractor:
         return "\n".join(p for p in parts if p)
 
     @staticmethod
-    def _first_match(text: str, patterns: List[str]) -> Optional[str]:
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
+    def _first_match(text: str, group: str) -> Optional[str]:
+        """规则组中优先级最高的命中值（组内模式按优先级逐条扫描，取第一个命中）"""
+        return get_rule_pack().group(group).first_value(text)
 
     @staticmethod
-    def _first_number(text: str, patterns: List[str]) -> Optional[float]:
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = float(match.group(1))
-                return int(value) if value.is_integer() else value
-        return None
+    def _first_number(text: str, group: str) -> Optional[float]:
+        return get_rule_pack().group(group).first_number(text)
 
     @staticmethod
     def _slug(value: Any) -> str:
@@ -430,7 +430,7 @@ class UTGAnomalyInjector:
         prompt = DECISION_PROMPT.format(
             anomaly_scenario=anomaly_scenario, steps_text=steps_text,
         )
-        raw = self.llm.chat(prompt)
+        raw = self.llm.chat(prompt, expect_json=True)
         parsed = self.llm.extract_json(raw)
 
         injection_step = parsed.get("injection_step")
@@ -588,7 +588,7 @@ class UTGAnomalyInjector:
                     rewritten=rewritten,
                     scenario=scenario,
                 )
-                raw = self.llm_validate.chat(prompt)
+                raw = self.llm_validate.chat(prompt, expect_json=True)
                 parsed = self.llm_validate.extract_json(raw)
                 if not parsed.get("is_valid", True):
                     llm_issues = parsed.get("issues", [])
@@ -191,7 +191,7 @@ class UTGPreprocessor:
                 pairs_text=pairs_text,
             )
             logger.info(f"  批量语义去重: {len(candidates)} 对 → 1 次 LLM")
-            raw = self.llm.chat(prompt)
+            raw = self.llm.chat(prompt, expect_json=True)
             parsed = self.llm.extract_json(raw)
 
             if isinstance(parsed, list) and len(parsed) == len(candidates):
@@ -332,7 +332,7 @@ class UTGPreprocessor:
 
         try:
             logger.info(f"  批量重写: {len(effective_steps)} 步 → 1 次 LLM")
-            raw = self.llm.chat(prompt)
+            raw = self.llm.chat(prompt, expect_json=True)
             parsed = self.llm.extract_json(raw)
 
             if isinstance(parsed, list) and len(parsed) == len(effective_steps):
@@ -435,7 +435,7 @@ class UTGPreprocessor:
         )
 
         try:
-            raw = self.llm.chat(prompt)
+            raw = self.llm.chat(prompt, expect_json=True)
             parsed = self.llm.extract_json(raw)
             issues = parsed.get("issues", [])
             result["issues_found"] = len(issues)
@@ -518,7 +518,7 @@ class UTGPreprocessor:
         )
 
         try:
-            raw = self.llm.chat(prompt)
+            raw = self.llm.chat(prompt, expect_json=True)
             parsed = self.llm.extract_json(raw)
             missing = parsed.get("missing_pages", [])
 
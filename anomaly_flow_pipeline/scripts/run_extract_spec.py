@@ -9,6 +9,8 @@ run_extract_spec.py — 页面类型 Spec 抽取 CLI 入口
         --data-dir path/to/utg_data \\
         --output-dir ./output
 
+    # 中断后用同一 --output-dir 重跑即从 Phase 1 断点续跑；
+    # 语料新增/变更后重跑只处理变化部分（--full 强制全量重建）
     # 从已有 raw_extractions.json 恢复（跳过 Phase 1）
     python -m anomaly_flow_pipeline.scripts.run_extract_spec \\
         --data-dir path/to/utg_data \\
@@ -45,6 +47,9 @@ def main():
     parser.add_argument("--skip-phase", type=int, default=0, choices=[0, 1, 2], help="跳过前 N 个阶段")
     parser.add_argument("--verbose", "-v", action="store_true", help="详细日志")
     parser.add_argument("--model", default=None, help="VLM 模型名")
+    parser.add_argument("--batch-size", type=int, default=None, help="Phase 1 每次 LLM 调用打包的 step 数（默认 20，1 为逐 step）")
+    parser.add_argument("--workers", type=int, default=None, help="Phase 1 并发批次数（默认 4）")
+    parser.add_argument("--full", action="store_true", help="忽略输出目录中的增量状态，全量重建")
     args = parser.parse_args()
 
     level = logging.DEBUG if args.verbose else logging.INFO
@@ -57,8 +62,9 @@ def main():
     if args.output_dir:
         Path(args.output_dir).mkdir(parents=True, exist_ok=True)
 
-    extractor = PageSpecExtractor(model=args.model)
-    result = extractor.run(data_dir=args.data_dir, output_dir=args.output_dir, skip_phase=args.skip_phase, resume=args.resume)
+    extractor = PageSpecExtractor(model=args.model, batch_size=args.batch_size, workers=args.workers)
+    result = extractor.run(data_dir=args.data_dir, output_dir=args.output_dir, skip_phase=args.skip_phase, resume=args.resume,
+                           incremental=not args.full)
 
     page_spec = result.get("page_spec")
     if page_spec:
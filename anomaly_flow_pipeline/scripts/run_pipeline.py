@@ -9,6 +9,9 @@ run_pipeline.py — 一键端到端 pipeline 入口
   Phase 3: 质量验证
   Phase 4: 报告输出
 
+Phase 0-2 的产物按 输入内容哈希 + 配置 + 阶段源码 记录在阶段存储中（见 core/phase_store.py），
+输入与配置未变时直接复用，从第一个发生变化的阶段开始重新计算。
+
 用法:
     # 完整流程
     python -m anomaly_flow_pipeline.scripts.run_pipeline \\
@@ -33,15 +36,32 @@ run_pipeline.py — 一键端到端 pipeline 入口
     python -m anomaly_flow_pipeline.scripts.run_pipeline \\
         --utg path/to/utg_info.json \\
         --scenario "加载失败" --verbose
+
+    # 批量模式：目录下所有 utg_info.json 并发执行，汇总到 pipeline_report.json
+    python -m anomaly_flow_pipeline.scripts.run_pipeline \\
+        --utg-dir path/to/utgs \\
+        --scenario "搜索列表加载失败" \\
+        --template example_data/shopping-flow-search-and-buy_new.json \\
+        --workers 8 --llm-concurrency 16
+
+    # 续跑中断的运行（写入原目录；批量模式跳过已完成的 UTG）
+    python -m anomaly_flow_pipeline.scripts.run_pipeline \\
+        --utg-dir path/to/utgs \\
+        --scenario "搜索列表加载失败" \\
+        --template example_data/shopping-flow-search-and-buy_new.json \\
+        --resume ./outputs/batch_20250101_120000
 """
 
 import argparse
 import json
 import logging
+import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Sequence
 
 # 将项目根目录加入 sys.path
 _project_root = Path(__file__).resolve().parents[2]
@@ -61,6 +81,21 @@ from anomaly_flow_pipeline.core.utg_anomaly_injector import UTGAnomalyInjector
 from anomaly_flow_pipeline.core.flow_converter import FlowConverter
 from anomaly_flow_pipeline.core.quality_validator import QualityValidator
 from anomaly_flow_pipeline.core.flow_repairer import FlowRepairer
+from anomaly_flow_pipeline.core.llm_client import set_llm_concurrency
+from anomaly_flow_pipeline.core.phase_store import PhaseStore, get_phase_store, phase_store_enabled
+
+_package_root = Path(__file__).resolve().parents[1]
+_DEFAULT_SCHEMA = _package_root / "schema" / "model-schema.json"
+
+# 各阶段结果依赖的源码（改动后该阶段的已存结果失效）；prompts/ 对所有阶段生效
+_PROMPT_SOURCES = sorted((_package_root / "prompts").glob("*.py"))
+PHASE_SOURCES = {
+    "preprocess": [_package_root / "core" / "utg_preprocessor.py",
+                   _package_root / "core" / "utg_loader.py"] + _PROMPT_SOURCES,
+    "injection": [_package_root / "core" / "utg_anomaly_injector.py",
+                  _package_root / "core" / "utg_loader.py"] + _PROMPT_SOURCES,
+    "conversion": [_package_root / "core" / "flow_converter.py"] + _PROMPT_SOURCES,
+}
 
 
 def report_phase(phase_name: str, elapsed: float, details: Dict[str, Any]):
@@ -76,65 +111,55 @@ def report_phase(phase_name: str, elapsed: float, details: Dict[str, Any]):
             print(f"    {key}: {value}")
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="anomaly_flow_pipeline — 端到端异常注入 Flow 生成管道"
-    )
-    parser.add_argument("--utg", required=True, help="utg_info.json 路径")
-    parser.add_argument("--scenario", default=None, help="异常场景描述（单场景）")
-    parser.add_argument("--scenarios", default=None, help="多个异常场景 JSON 数组字符串")
-    parser.add_argument("--template", required=True,
-                        help="Flow 模板路径（推荐 shopping-flow-search-and-buy_new.json）")
-    parser.add_argument("--output-dir", "-o", default=None, help="输出目录")
-    parser.add_argument("--no-preprocess", action="store_true",
-                        help="跳过 Phase 0 预处理")
-    parser.add_argument("--no-neighbor-adjust", action="store_true",
-                        help="跳过 Phase 1 相邻步微调")
-    parser.add_argument("--no-validation", action="store_true",
-                        help="跳过 Phase 3 质量验证")
-    parser.add_argument("--schema", default=None,
-                        help="model-schema.json 路径（默认 schema/model-schema.json）")
-    parser.add_argument("--no-compress-steps", action="store_true",
-                        help="禁用 Phase 2 相邻同页面步骤合并（默认启用合并）")
-    parser.add_argument("--model", default=None, help="VLM 模型名")
-    parser.add_argument("--verbose", "-v", action="store_true", help="详细日志")
-    args = parser.parse_args()
-
-    level = logging.DEBUG if args.verbose else logging.INFO
-    logging.basicConfig(level=level, format="[%(levelname)s] %(message)s", stream=sys.stdout)
-
-    # 参数校验
-    utg_path = Path(args.utg)
-    template_path = Path(args.template)
-    if not utg_path.exists():
-        print(f"❌ UTG 文件不存在: {utg_path}")
-        sys.exit(1)
-    if not template_path.exists():
-        print(f"❌ 模板文件不存在: {template_path}")
-        sys.exit(1)
-
-    scenarios = []
-    if args.scenario:
-        scenarios.append(args.scenario)
-    if args.scenarios:
-        try:
-            extra = json.loads(args.scenarios)
-            if isinstance(extra, list):
-                scenarios.extend(extra)
-        except json.JSONDecodeError:
-            print(f"❌ --scenarios 格式错误: {args.scenarios}")
-            sys.exit(1)
-    if not scenarios:
-        print("❌ 请提供 --scenario 或 --scenarios")
-        sys.exit(1)
-
-    # 输出目录 — 始终追加时间戳避免覆盖
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    if args.output_dir:
-        output_dir = Path(args.output_dir) / f"pipeline_{timestamp}"
-    else:
-        output_dir = Path(f"./outputs/pipeline_{timestamp}")
+def run_phase(
+    store: Optional[PhaseStore],
+    phase: str,
+    output_path: Path,
+    compute: Callable[[], Dict[str, Any]],
+    inputs: Sequence[Any],
+    config: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    执行可复用阶段：阶段存储命中时复制已有产物到 output_path 并返回保存的结果
+    （带 reused=True），否则调用 compute 计算，成功后写入阶段存储。
+    """
+    if store is None:
+        return compute()
+    key = store.key(phase, inputs=inputs, config=config, sources=PHASE_SOURCES[phase])
+    cached = store.fetch(phase, key, output_path)
+    if cached is not None:
+        print(f"  ↺ 输入与配置未变化，复用已有结果 ({key[:12]})")
+        cached["reused"] = True
+        return cached
+    result = compute()
+    if result.get("success") and output_path.exists():
+        store.save(phase, key, output_path, result)
+    return result
+
+
+def run_single_pipeline(
+    utg_path: Path,
+    template_path: Path,
+    scenarios: List[str],
+    output_dir: Path,
+    schema: Optional[str] = None,
+    model: Optional[str] = None,
+    preprocess: bool = True,
+    neighbor_adjust: bool = True,
+    validation: bool = True,
+    compress_steps: bool = True,
+    reuse_phases: bool = True,
+) -> Dict[str, Any]:
+    """
+    对单个 UTG 执行 Phase 0-5，输出写入 output_dir
+
+    reuse_phases 为 True（且未设置 PHASE_STORE=0）时，Phase 0-2 通过阶段存储复用此前运行的结果。
+
+    Returns:
+        quality_report（同时保存为 output_dir/pipeline_report.json）
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
 
     # 质量报告
     quality_report = {
@@ -147,14 +172,18 @@ def main():
     }
 
     current_utg = str(utg_path)
+    store = get_phase_store() if reuse_phases and phase_store_enabled() else None
+    # 与 LLMClient 的默认值一致；FlowConverter 不接收 --model，始终使用环境变量中的模型
+    resolved_model = model or os.getenv('VLM_MODEL', 'gpt-4o')
+    env_model = os.getenv('VLM_MODEL', 'gpt-4o')
 
     print("=" * 60)
     print(f"  anomaly_flow_pipeline — 端到端流程")
     print(f"  UTG:        {utg_path.name}")
     print(f"  模板:       {template_path.name}")
-    print(f"  Schema:     {Path(args.schema).name if args.schema else 'model-schema.json'}")
+    print(f"  Schema:     {Path(schema).name if schema else 'model-schema.json'}")
     print(f"  异常场景:   {scenarios}")
-    print(f"  合并同页:   {'✓' if not args.no_compress_steps else '✗'}")
+    print(f"  合并同页:   {'✓' if compress_steps else '✗'}")
     print(f"  输出目录:   {output_dir}")
     print("=" * 60)
     print()
@@ -162,14 +191,18 @@ def main():
     # ═══════════════════════════════════════════════════════
     # Phase 0: 预处理
     # ═══════════════════════════════════════════════════════
-    if not args.no_preprocess:
+    if preprocess:
         print(">>> Phase 0: UTG 预处理")
         t0 = time.time()
-        preprocessor = UTGPreprocessor(model=args.model)
-        pre_result = preprocessor.run(
-            utg_path=str(utg_path),
-            template_path=str(template_path),
-            output_path=str(output_dir / "phase0_preprocessed.json"),
+        pre_result = run_phase(
+            store, "preprocess", output_dir / "phase0_preprocessed.json",
+            lambda: UTGPreprocessor(model=model).run(
+                utg_path=str(utg_path),
+                template_path=str(template_path),
+                output_path=str(output_dir / "phase0_preprocessed.json"),
+            ),
+            inputs=[utg_path, template_path],
+            config={"model": resolved_model},
         )
         t1 = time.time()
 
@@ -179,6 +212,8 @@ def main():
             "steps_after": pre_result.get("steps_after", 0),
             "error": pre_result.get("error"),
         }
+        if pre_result.get("reused"):
+            phase0_report["reused"] = True
         quality_report["phases"]["preprocess"] = phase0_report
         report_phase("Phase 0 预处理", t1 - t0, phase0_report)
 
@@ -199,24 +234,35 @@ def main():
     # ═══════════════════════════════════════════════════════
     print(">>> Phase 1: 异常注入")
     t0 = time.time()
-    injector = UTGAnomalyInjector(model=args.model)
 
-    if len(scenarios) == 1:
-        inject_result = injector.inject(
-            utg_path=current_utg,
-            anomaly_scenario=scenarios[0],
-            output_path=str(output_dir / "phase1_injected.json"),
-            enable_neighbor_adjust=not args.no_neighbor_adjust,
-            enable_validation=not args.no_validation,
-        )
-    else:
-        inject_result = injector.inject_multiple(
+    def _inject() -> Dict[str, Any]:
+        injector = UTGAnomalyInjector(model=model)
+        if len(scenarios) == 1:
+            return injector.inject(
+                utg_path=current_utg,
+                anomaly_scenario=scenarios[0],
+                output_path=str(output_dir / "phase1_injected.json"),
+                enable_neighbor_adjust=neighbor_adjust,
+                enable_validation=validation,
+            )
+        return injector.inject_multiple(
             utg_path=current_utg,
             anomaly_scenarios=scenarios,
             output_path=str(output_dir / "phase1_injected.json"),
-            enable_neighbor_adjust=not args.no_neighbor_adjust,
-            enable_validation=not args.no_validation,
+            enable_neighbor_adjust=neighbor_adjust,
+            enable_validation=validation,
         )
+
+    inject_result = run_phase(
+        store, "injection", output_dir / "phase1_injected.json", _inject,
+        inputs=[current_utg],
+        config={
+            "scenarios": scenarios,
+            "neighbor_adjust": neighbor_adjust,
+            "validation": validation,
+            "model": resolved_model,
+        },
+    )
     t1 = time.time()
 
     phase1_report = {
@@ -225,6 +271,8 @@ def main():
         "error": inject_result.get("error"),
         "anomaly_scenarios": scenarios,
     }
+    if inject_result.get("reused"):
+        phase1_report["reused"] = True
     quality_report["phases"]["injection"] = phase1_report
     report_phase("Phase 1 异常注入", t1 - t0, phase1_report)
 
@@ -242,14 +290,18 @@ def main():
     # ═══════════════════════════════════════════════════════
     print(">>> Phase 2: Flow 转换")
     t0 = time.time()
-    converter = FlowConverter()
-    convert_result = converter.convert(
-        utg_path=injected_utg,
-        template_path=str(template_path),
-        output_path=str(output_dir / "phase2_flow.json"),
-        schema_path=args.schema,
-        enable_data_binding=True,
-        compress_steps=not args.no_compress_steps,
+    convert_result = run_phase(
+        store, "conversion", output_dir / "phase2_flow.json",
+        lambda: FlowConverter().convert(
+            utg_path=injected_utg,
+            template_path=str(template_path),
+            output_path=str(output_dir / "phase2_flow.json"),
+            schema_path=schema,
+            enable_data_binding=True,
+            compress_steps=compress_steps,
+        ),
+        inputs=[injected_utg, template_path, schema or _DEFAULT_SCHEMA],
+        config={"compress_steps": compress_steps, "model": env_model},
     )
     t1 = time.time()
 
@@ -259,6 +311,8 @@ def main():
         "bound_mock_id": convert_result.get("bound_mock_id"),
         "error": convert_result.get("error"),
     }
+    if convert_result.get("reused"):
+        phase2_report["reused"] = True
     quality_report["phases"]["conversion"] = phase2_report
     report_phase("Phase 2 Flow 转换", t1 - t0, phase2_report)
     print()
@@ -266,7 +320,8 @@ def main():
     # ═══════════════════════════════════════════════════════
     # Phase 3: 质量验证
     # ═══════════════════════════════════════════════════════
-    if not args.no_validation and convert_result["success"]:
+    validation_result: Dict[str, Any] = {}
+    if validation and convert_result["success"]:
         print(">>> Phase 3: 质量验证")
         t0 = time.time()
 
@@ -292,6 +347,7 @@ def main():
                 k: {"passed": v["passed"], "issues": v["issues"]}
                 for k, v in validation_result.get("dimensions", {}).items()
             },
+            "timing": validation_result.get("timing", {}),
         }
         quality_report["phases"]["validation"] = phase3_report
         report_phase("Phase 3 质量验证", t1 - t0, phase3_report)
@@ -308,11 +364,11 @@ def main():
     # ═══════════════════════════════════════════════════════
     # Phase 4: 基于验证报告自动修复
     # ═══════════════════════════════════════════════════════
-    if not args.no_validation and not validation_result.get("passed", True):
+    if validation and not validation_result.get("passed", True):
         print(">>> Phase 4: 自动修复")
         t0 = time.time()
 
-        repairer = FlowRepairer(model=args.model)
+        repairer = FlowRepairer(model=model)
         repair_result = repairer.repair(
             flow_path=str(output_dir / "phase2_flow.json"),
             validation_report=quality_report,
@@ -341,7 +397,7 @@ def main():
     # ═══════════════════════════════════════════════════════
     print(">>> Phase 5: 报告输出")
     quality_report["outputs"] = {
-        "preprocessed": str(output_dir / "phase0_preprocessed.json") if not args.no_preprocess else None,
+        "preprocessed": str(output_dir / "phase0_preprocessed.json") if preprocess else None,
         "injected": str(output_dir / "phase1_injected.json"),
         "flow": str(output_dir / "phase2_flow.json"),
         "repaired": str(output_dir / "phase4_repaired.json") if quality_report.get("phases", {}).get("repair", {}).get("success") else None,
@@ -353,9 +409,6 @@ def main():
     print(f"  ✓ 报告已保存: {report_path}")
     print()
 
-    # ═══════════════════════════════════════════════════════
-    # 完成
-    # ═══════════════════════════════════════════════════════
     print("=" * 60)
     print(f"  Pipeline 完成")
     print(f"  输出目录: {output_dir}")
@@ -366,6 +419,316 @@ def main():
         print(f"  质量评分: {quality_report['phases']['validation']['score']}/1.0")
     print("=" * 60)
 
+    return quality_report
+
+
+def discover_utgs(utg_dir: Path, pattern: str = "**/utg_info.json") -> List[Path]:
+    """在目录中查找待处理的 UTG 文件（按路径排序，保证批次顺序稳定）"""
+    return sorted(p for p in utg_dir.glob(pattern) if p.is_file())
+
+
+def _utg_output_name(index: int, utg_path: Path, utg_dir: Path) -> str:
+    """批量模式下每个 UTG 的输出子目录名：序号 + 相对路径"""
+    rel = utg_path.relative_to(utg_dir)
+    name = "__".join(rel.parent.parts) or rel.stem
+    return f"{index:03d}_{name}"
+
+
+# 不影响产物内容、续跑时允许变化的 pipeline 参数
+_RESUME_IGNORED_KWARGS = ("reuse_phases",)
+
+
+def _batch_run_config(
+    utg_dir: Path,
+    template_path: Path,
+    scenarios: List[str],
+    pattern: str,
+    pipeline_kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    影响批量运行产物的配置，写入汇总报告，续跑时与原运行比对
+
+    模板按内容摘要记录（路径不变但内容被修改也视为不同配置），
+    未指定 --model 时记录实际使用的 VLM_MODEL。
+    """
+    options = {k: v for k, v in pipeline_kwargs.items() if k not in _RESUME_IGNORED_KWARGS}
+    if options.get("model") is None:
+        options["model"] = os.getenv("VLM_MODEL", "gpt-4o")
+    if options.get("schema") is not None:
+        options["schema"] = get_phase_store().file_digest(options["schema"])
+    return {
+        "input_dir": str(Path(utg_dir).resolve()),
+        "pattern": pattern,
+        "template": get_phase_store().file_digest(template_path),
+        "scenarios": list(scenarios),
+        "options": options,
+    }
+
+
+def _resume_mismatch(report_path: Path, run_config: Dict[str, Any]) -> Optional[str]:
+    """续跑目录的原运行配置与本次不一致时返回说明，一致时返回 None"""
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get("run_config")
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError, AttributeError) as e:
+        return f"无法读取原汇总报告 {report_path}: {e}"
+    if previous is None:
+        return "原汇总报告未记录运行配置，无法确认与本次一致"
+    changed = sorted(k for k in set(previous) | set(run_config) if previous.get(k) != run_config.get(k))
+    if changed:
+        return f"运行配置与原运行不一致: {', '.join(changed)}"
+    return None
+
+
+def run_batch_pipeline(
+    utg_dir: Path,
+    template_path: Path,
+    scenarios: List[str],
+    output_dir: Path,
+    pattern: str = "**/utg_info.json",
+    workers: int = 4,
+    llm_concurrency: int = 8,
+    resume: bool = False,
+    **pipeline_kwargs,
+) -> Dict[str, Any]:
+    """
+    批量模式：对目录下所有 UTG 并发执行完整 pipeline
+
+    每个 UTG 在独立线程中运行（各阶段内部为同步 LLM 调用），
+    所有线程共享全局 LLM 并发上限（见 llm_client.set_llm_concurrency）。
+    每完成一个 UTG 即更新 output_dir/pipeline_report.json 汇总报告。
+    resume 为 True 时跳过输出子目录中已有 pipeline_report.json（即已完整跑完）的 UTG；
+    原汇总报告记录的运行配置（场景、模板内容、模型等，见 _batch_run_config）
+    与本次不一致时拒绝续跑，返回空字典。
+
+    Returns:
+        汇总报告
+    """
+    utg_paths = discover_utgs(utg_dir, pattern)
+    if not utg_paths:
+        print(f"❌ 在 {utg_dir} 中未找到匹配 {pattern} 的 UTG")
+        return {}
+
+    report_path = output_dir / "pipeline_report.json"
+    run_config = _batch_run_config(utg_dir, template_path, scenarios, pattern, pipeline_kwargs)
+    if resume:
+        mismatch = _resume_mismatch(report_path, run_config)
+        if mismatch:
+            print(f"❌ 拒绝续跑 {output_dir}: {mismatch}")
+            print("   请使用与原运行相同的参数，或去掉 --resume 重新运行")
+            return {}
+
+    set_llm_concurrency(llm_concurrency)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    batch_report: Dict[str, Any] = {
+        "pipeline": "anomaly_flow_pipeline.run_pipeline (batch)",
+        "input_dir": str(utg_dir),
+        "template": str(template_path),
+        "scenarios": scenarios,
+        "timestamp": time.strftime("%Y%m%d_%H%M%S"),
+        "workers": workers,
+        "llm_concurrency": llm_concurrency,
+        "run_config": run_config,
+        "total": len(utg_paths),
+        "completed": 0,
+        "succeeded": 0,
+        "failed": 0,
+        "results": [],
+    }
+    report_lock = threading.Lock()
+
+    def _write_report() -> None:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(batch_report, f, ensure_ascii=False, indent=2)
+
+    def _load_finished(utg_output: Path) -> Optional[Dict[str, Any]]:
+        report_file = utg_output / "pipeline_report.json"
+        if not resume or not report_file.exists():
+            return None
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _run_one(index: int, utg_path: Path) -> Dict[str, Any]:
+        utg_output = output_dir / _utg_output_name(index, utg_path, utg_dir)
+        t0 = time.time()
+        report = _load_finished(utg_output)
+        resumed = report is not None
+        try:
+            if report is None:
+                report = run_single_pipeline(
+                    utg_path, template_path, scenarios, utg_output, **pipeline_kwargs
+                )
+            success = bool(report.get("phases", {}).get("conversion", {}).get("success"))
+            error = None if success else report["phases"]["conversion"].get("error")
+        except Exception as e:
+            logging.getLogger(__name__).exception(f"UTG 处理失败: {utg_path}")
+            report, success, error = None, False, f"{type(e).__name__}: {e}"
+        return {
+            "resumed": resumed,
+            "utg": str(utg_path),
+            "output_dir": str(utg_output),
+            "success": success,
+            "elapsed": round(time.time() - t0, 1),
+            "score": ((report or {}).get("phases", {}).get("validation") or {}).get("score"),
+            "error": error,
+            "report": report,
+        }
+
+    print("=" * 60)
+    print(f"  anomaly_flow_pipeline — 批量模式")
+    print(f"  UTG 目录:   {utg_dir} ({len(utg_paths)} 个)")
+    print(f"  并发:       {workers} 个 UTG / {llm_concurrency} 个 LLM 请求")
+    print(f"  输出目录:   {output_dir}")
+    print("=" * 60)
+    print()
+
+    batch_start = time.time()
+    _write_report()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(_run_one, i, utg_path): utg_path
+            for i, utg_path in enumerate(utg_paths)
+        }
+        for future in as_completed(futures):
+            entry = future.result()
+            with report_lock:
+                batch_report["results"].append(entry)
+                batch_report["completed"] += 1
+                batch_report["succeeded" if entry["success"] else "failed"] += 1
+                batch_report["elapsed"] = round(time.time() - batch_start, 1)
+                _write_report()
+                done = batch_report["completed"]
+            status = "✅" if entry["success"] else "❌"
+            note = "（已完成，跳过）" if entry["resumed"] else f"({entry['elapsed']:.1f}s)"
+            print(f"[{done}/{len(utg_paths)}] {status} {entry['utg']} {note}")
+
+    batch_report["results"].sort(key=lambda r: r["output_dir"])
+    _write_report()
+
+    print()
+    print("=" * 60)
+    print(f"  批量完成: {batch_report['succeeded']}/{batch_report['total']} 成功, "
+          f"耗时 {batch_report['elapsed']:.1f}s")
+    print(f"  汇总报告: {report_path}")
+    print("=" * 60)
+    return batch_report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="anomaly_flow_pipeline — 端到端异常注入 Flow 生成管道"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--utg", help="utg_info.json 路径")
+    source.add_argument("--utg-dir", help="批量模式：包含多个 UTG 的目录")
+    parser.add_argument("--pattern", default="**/utg_info.json",
+                        help="批量模式下的 UTG 文件匹配模式（默认 **/utg_info.json）")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="批量模式下同时处理的 UTG 数（默认 4）")
+    parser.add_argument("--llm-concurrency", type=int, default=8,
+                        help="批量模式下全局 LLM 并发请求上限（默认 8）")
+    parser.add_argument("--scenario", default=None, help="异常场景描述（单场景）")
+    parser.add_argument("--scenarios", default=None, help="多个异常场景 JSON 数组字符串")
+    parser.add_argument("--template", required=True,
+                        help="Flow 模板路径（推荐 shopping-flow-search-and-buy_new.json）")
+    parser.add_argument("--output-dir", "-o", default=None, help="输出目录")
+    parser.add_argument("--no-preprocess", action="store_true",
+                        help="跳过 Phase 0 预处理")
+    parser.add_argument("--no-neighbor-adjust", action="store_true",
+                        help="跳过 Phase 1 相邻步微调")
+    parser.add_argument("--no-validation", action="store_true",
+                        help="跳过 Phase 3 质量验证")
+    parser.add_argument("--schema", default=None,
+                        help="model-schema.json 路径（默认 schema/model-schema.json）")
+    parser.add_argument("--no-compress-steps", action="store_true",
+                        help="禁用 Phase 2 相邻同页面步骤合并（默认启用合并）")
+    parser.add_argument("--model", default=None, help="VLM 模型名")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="绕过 LLM 响应缓存（等价于 LLM_CACHE=0）")
+    parser.add_argument("--no-phase-store", action="store_true",
+                        help="不复用也不记录 Phase 0-2 阶段产物（等价于 PHASE_STORE=0）")
+    parser.add_argument("--resume", default=None, metavar="RUN_DIR",
+                        help="续跑已有输出目录（如 outputs/pipeline_20250101_120000），不新建时间戳目录；"
+                             "批量模式跳过已完成的 UTG")
+    parser.add_argument("--verbose", "-v", action="store_true", help="详细日志")
+    args = parser.parse_args()
+
+    if args.no_llm_cache:
+        os.environ["LLM_CACHE"] = "0"
+
+    level = logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=level, format="[%(levelname)s] %(message)s", stream=sys.stdout)
+
+    # 参数校验
+    template_path = Path(args.template)
+    if args.utg and not Path(args.utg).exists():
+        print(f"❌ UTG 文件不存在: {args.utg}")
+        sys.exit(1)
+    if args.utg_dir and not Path(args.utg_dir).is_dir():
+        print(f"❌ UTG 目录不存在: {args.utg_dir}")
+        sys.exit(1)
+    if not template_path.exists():
+        print(f"❌ 模板文件不存在: {template_path}")
+        sys.exit(1)
+
+    scenarios = []
+    if args.scenario:
+        scenarios.append(args.scenario)
+    if args.scenarios:
+        try:
+            extra = json.loads(args.scenarios)
+            if isinstance(extra, list):
+                scenarios.extend(extra)
+        except json.JSONDecodeError:
+            print(f"❌ --scenarios 格式错误: {args.scenarios}")
+            sys.exit(1)
+    if not scenarios:
+        print("❌ 请提供 --scenario 或 --scenarios")
+        sys.exit(1)
+
+    # 输出目录 — 续跑时沿用原目录，否则追加时间戳避免覆盖
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    prefix = "batch" if args.utg_dir else "pipeline"
+    if args.resume:
+        output_dir = Path(args.resume)
+        if not output_dir.is_dir():
+            print(f"❌ 续跑目录不存在: {output_dir}")
+            sys.exit(1)
+    elif args.output_dir:
+        output_dir = Path(args.output_dir) / f"{prefix}_{timestamp}"
+    else:
+        output_dir = Path(f"./outputs/{prefix}_{timestamp}")
+
+    pipeline_kwargs = dict(
+        schema=args.schema,
+        model=args.model,
+        preprocess=not args.no_preprocess,
+        neighbor_adjust=not args.no_neighbor_adjust,
+        validation=not args.no_validation,
+        compress_steps=not args.no_compress_steps,
+        reuse_phases=not args.no_phase_store,
+    )
+
+    if args.utg_dir:
+        batch_report = run_batch_pipeline(
+            Path(args.utg_dir), template_path, scenarios, output_dir,
+            pattern=args.pattern,
+            workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+            resume=bool(args.resume),
+            **pipeline_kwargs,
+        )
+        if not batch_report or batch_report["failed"]:
+            sys.exit(1)
+    else:
+        run_single_pipeline(Path(args.utg), template_path, scenarios, output_dir, **pipeline_kwargs)
+
 
 if __name__ == "__main__":
     main()
@@ -37,6 +37,9 @@ from typing import Dict, List, Optional, Tuple
 
 import requests
 
+# 复用 keep-alive 连接（独立脚本，不引入 app 依赖）
+_session = requests.Session()
+
 # 确保能导入 app 模块
 _project_root = Path(__file__).resolve().parents[1]
 if str(_project_root) not in sys.path:
@@ -361,7 +364,7 @@ def expand_instruction(
                 print(f"    ⏳ 重试 {attempt + 1}/3 (等待 {wait}s)...")
                 time.sleep(wait)
 
-            resp = requests.post(api_url, headers=headers, json=payload, timeout=60)
+            resp = _session.post(api_url, headers=headers, json=payload, timeout=60)
             resp.raise_for_status()
             data = resp.json()
             instruction = data['choices'][0]['message']['content'].strip()
@@ -17,6 +17,7 @@ from .schemas import (
     EditOp,
     RenderResult,
     RenderConfig,
+    PipelineJob,
     # 注入决策
     InjectionDecision,
     InjectionContext,
@@ -41,6 +42,7 @@ __all__ = [
     'EditOp',
     'RenderResult',
     'RenderConfig',
+    'PipelineJob',
     'InjectionDecision',
     'InjectionContext',
     'StepRecord',
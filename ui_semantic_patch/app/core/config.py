@@ -59,6 +59,11 @@ class AppConfig:
             / "gt-category"
         )
         
+        # 本地缓存目录（Stage 1 检测结果等，可通过 UI_PATCH_CACHE_DIR 覆盖）
+        self.CACHE_DIR: Path = Path(
+            os.environ.get("UI_PATCH_CACHE_DIR", self._ui_semantic_dir / ".cache")
+        )
+        
         # ========== 脚本目录 ==========
         self.SCRIPTS_DIR: Path = self._ui_semantic_dir / "scripts"
         self.INJECTION_SCRIPTS_DIR: Path = self.SCRIPTS_DIR / "injection"
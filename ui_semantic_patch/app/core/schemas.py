@@ -573,6 +573,31 @@ class RenderConfig(BaseModel):
     e2e_full_image: bool = Field(default=False, description="E2E整图编辑")
 
 
+class PipelineJob(BaseModel):
+    """
+    单个流水线任务（批量入口 run_pipeline_batch 的输入）
+
+    属性:
+        screenshot_path: 原始截图路径
+        instruction: 异常指令
+        anomaly_mode: 异常模式
+        gt_category: GT类别（可选）
+        gt_sample: GT样本（可选）
+        reference_path: 参考图片路径（可选）
+        output_dir: 任务输出目录（可选，默认由批量入口分配）
+    """
+    screenshot_path: str = Field(..., description="原始截图路径")
+    instruction: str = Field(..., description="异常指令")
+    anomaly_mode: str = Field(default="dialog", description="异常模式")
+    gt_category: Optional[str] = Field(default=None, description="GT类别")
+    gt_sample: Optional[str] = Field(default=None, description="GT样本")
+    reference_path: Optional[str] = Field(default=None, description="参考图片路径")
+    target_component: Optional[str] = Field(default=None, description="目标组件ID")
+    edit_plan_path: Optional[str] = Field(default=None, description="编辑计划JSON路径")
+    e2e_full_image: bool = Field(default=False, description="E2E整图编辑")
+    output_dir: Optional[str] = Field(default=None, description="任务输出目录")
+
+
 class PipelineResult(BaseModel):
     """
     流水线执行结果
@@ -12,12 +12,12 @@ generate_filename_descriptions.py - 基于文件名生成异常描述
 import json
 import os
 import base64
-import requests
 import re
 from pathlib import Path
 from typing import Dict, List
 
 from app.core.config import config
+from app.utils.http_client import get_http_client
 
 # 环境变量（从集中配置获取）
 VLM_API_KEY = os.environ.get('VLM_API_KEY')
@@ -145,7 +145,7 @@ class FilenameDescriptionGenerator:
                 'max_tokens': 800
             }
 
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
 
             content_text = response.json()['choices'][0]['message']['content']
@@ -57,6 +57,7 @@ from app.generators.prompts import (
     PROMPT_LOADING_TIMEOUT,
     CATEGORY_TO_PROMPT,
 )
+from app.utils.http_client import get_http_client
 
 
 # ============================================================
@@ -159,7 +160,7 @@ def call_vlm_analyze(
                 print(f"    ⏳ 等待 {wait}s 后重试 ({attempt}/{max_retries})...")
                 time.sleep(wait)
 
-            response = requests.post(api_url, headers=headers, json=payload, timeout=120)
+            response = get_http_client().post(api_url, headers=headers, json=payload, timeout=120)
 
             # 429 限流
             if response.status_code == 429:
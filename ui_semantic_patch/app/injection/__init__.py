@@ -3,6 +3,7 @@
 
 该模块实现基于操作序列的异常注入决策功能：
 - SequenceAnalyzer: 增量式语义分析器（逐帧 VLM 图像分析）
+- FrameDeduplicator: 截图近重复帧分组（感知哈希）
 - UTGLoader: UTG 数据加载器（解析 utg.json）
 - UTGDecisionMaker: UTG 文本决策器（全量 ui_summary 文本 LLM 决策）
 - UTGAnomalyInjector: UTG 异常注入器（独立模块，决策注入步 + 改写 ui_summary）
@@ -14,6 +15,7 @@
 """
 
 from .sequence_analyzer import SequenceAnalyzer
+from .frame_dedup import FrameDeduplicator
 from .anomaly_recommender import AnomalyRecommender
 from .anomaly_mapping_resolver import AnomalyMappingResolver
 from .sequence_rewriter import SequenceRewriter
@@ -37,6 +39,7 @@ except ImportError:
 
 __all__ = [
     'SequenceAnalyzer',
+    'FrameDeduplicator',
     'AnomalyRecommender',
     'AnomalyMappingResolver',
     'SequenceRewriter',
@@ -0,0 +1,116 @@
+"""
+截图帧近重复检测（感知哈希）
+
+操作轨迹中常有连续的近乎相同的帧（滚动抖动、加载中状态），逐帧 VLM 分类
+会为它们重复付费。本模块用差值哈希（dHash）对截图生成指纹，按时间顺序把
+与组代表帧足够相似的连续帧归为一组，每组只需分类代表帧。
+
+相当于 UTGPreprocessor.deduplicate 的截图版本（前者基于 ui_summary 文本指纹）。
+
+相似度 = 1 - 汉明距离 / 哈希位数；相似度 ≥ threshold 视为近重复。
+threshold 默认读取环境变量 FRAME_DEDUP_THRESHOLD（默认 0.95），≥ 1 时禁用去重。
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image
+
+_DEFAULT_THRESHOLD = 0.95
+_DEFAULT_HASH_SIZE = 16
+
+
+def dhash(image_path: str, hash_size: int = _DEFAULT_HASH_SIZE) -> int:
+    """
+    计算截图的差值哈希
+
+    灰度缩放到 (hash_size+1) × hash_size，逐行比较相邻像素亮度，
+    得到 hash_size² 位指纹。对轻微的压缩噪声、抗锯齿差异不敏感。
+    """
+    with Image.open(image_path) as img:
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_similarity(a: int, b: int, bits: int) -> float:
+    """两个指纹的相似度（1 - 汉明距离 / 位数）"""
+    return 1.0 - bin(a ^ b).count('1') / bits
+
+
+class FrameDeduplicator:
+    """
+    连续近重复帧分组
+
+    Example:
+        dedup = FrameDeduplicator(threshold=0.95)
+        groups = dedup.group(screenshots)   # [[0], [1, 2, 3], [4], ...]
+        stats = dedup.stats(groups)
+    """
+
+    def __init__(self, threshold: float = None, hash_size: int = _DEFAULT_HASH_SIZE):
+        if threshold is None:
+            threshold = float(os.environ.get('FRAME_DEDUP_THRESHOLD', _DEFAULT_THRESHOLD))
+        self.threshold = threshold
+        self.hash_size = hash_size
+        self.bits = hash_size * hash_size
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold < 1.0
+
+    def group(self, screenshots: List[Path]) -> List[List[int]]:
+        """
+        按时间顺序分组：与当前组代表帧（组内第一帧）相似度 ≥ threshold 的
+        连续帧并入该组。与代表帧而非上一帧比较，避免缓慢滚动时逐帧漂移。
+
+        Returns:
+            [[帧下标, ...], ...]，每组第一个下标为代表帧
+        """
+        if not screenshots:
+            return []
+        if not self.enabled:
+            return [[i] for i in range(len(screenshots))]
+
+        groups = []
+        rep_hash = None
+        for i, path in enumerate(screenshots):
+            try:
+                h = dhash(str(path), self.hash_size)
+            except OSError as e:
+                print(f"  ⚠ 帧指纹计算失败 {Path(path).name}: {e}")
+                groups.append([i])
+                rep_hash = None
+                continue
+            if rep_hash is not None and hash_similarity(h, rep_hash, self.bits) >= self.threshold:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+                rep_hash = h
+        return groups
+
+    def stats(self, groups: List[List[int]], offset: int = 0) -> Dict:
+        """
+        去重统计（写入 decision_log）
+
+        Args:
+            groups: group() 的结果
+            offset: 帧下标偏移（对序列子段分组时换算回原序列下标）
+        """
+        total = sum(len(g) for g in groups)
+        merged = [f"Step{g[0] + offset}~Step{g[-1] + offset}" for g in groups if len(g) > 1]
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "hash_size": self.hash_size,
+            "total_frames": total,
+            "representatives": len(groups),
+            "removed": total - len(groups),
+            "merged_groups": merged,
+        }
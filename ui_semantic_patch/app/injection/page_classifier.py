@@ -11,11 +11,15 @@ import json
 import re
 import os
 import time
-import base64
 import requests
 from pathlib import Path
 from typing import Optional
 
+from app.utils.common import is_json_reply
+from app.utils.response_cache import cache_key_for, get_response_cache
+from app.utils.http_client import get_http_client, backoff_delay
+from app.utils.image_payload import build_image_payload
+
 
 # VLM 两级分类提示词（v2）
 VLM_CLASSIFICATION_PROMPT = """
@@ -220,14 +224,8 @@ class PageClassifier:
             'Authorization': f'Bearer {self.api_key}'
         }
 
-        # 编码图片
-        with open(image_path, 'rb') as f:
-            image_base64 = base64.b64encode(f.read()).decode('utf-8')
-
-        # 判断图片格式
-        ext = Path(image_path).suffix.lower()
-        mime_map = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.webp': 'image/webp'}
-        mime_type = mime_map.get(ext, 'image/png')
+        # 编码图片（缩放 + 重新压缩，分类只需页面布局）
+        image = build_image_payload(image_path)
 
         # 构建带序列上下文的 prompt
         prompt_text = VLM_CLASSIFICATION_PROMPT
@@ -254,7 +252,7 @@ class PageClassifier:
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:{mime_type};base64,{image_base64}"
+                                "url": image.data_url
                             }
                         },
                         {
@@ -268,17 +266,23 @@ class PageClassifier:
             "max_tokens": 512
         }
 
+        cache_key = cache_key_for(payload)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None and is_json_reply(cached):
+                return cached
+
         base_wait = 5
         last_error = None
 
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
-                    wait_time = min(base_wait * (2 ** (attempt - 1)), 60)
+                    wait_time = backoff_delay(attempt, base_wait)
                     print(f"    ⏳ 等待 {wait_time}s 后重试 ({attempt + 1}/{max_retries})...")
                     time.sleep(wait_time)
 
-                response = requests.post(
+                response = get_http_client().post(
                     self.api_url,
                     headers=headers,
                     json=payload,
@@ -296,7 +300,11 @@ class PageClassifier:
 
                 response.raise_for_status()
                 result = response.json()
-                return result['choices'][0]['message']['content']
+                content = result['choices'][0]['message']['content']
+                # 只缓存可解析的回复，格式错误的回复不会在重跑时被原样重放
+                if cache_key and is_json_reply(content):
+                    get_response_cache().put(cache_key, content, self.model)
+                return content
 
             except requests.exceptions.RequestException as e:
                 print(f"    ⚠ API 请求失败: {e}")
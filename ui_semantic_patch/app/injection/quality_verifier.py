@@ -14,8 +14,11 @@ from typing import Dict, List, Optional, Tuple
 
 import requests
 
-from app.utils.common import encode_image, get_mime_type
+from app.utils.common import is_json_reply
+from app.utils.response_cache import cache_key_for, get_response_cache
 from .verification_prompts import build_verification_prompt, get_expected_scenario
+from app.utils.http_client import get_http_client, backoff_delay
+from app.utils.image_payload import build_image_payload
 
 
 # 验证通过阈值
@@ -223,25 +226,22 @@ class QualityVerifier:
             'Authorization': f'Bearer {self.api_key}'
         }
 
-        # 编码图片
-        base64_image = encode_image(str(base_screenshot))
-        generated_b64 = encode_image(str(generated_image))
-
-        base_mime = get_mime_type(str(base_screenshot))
-        gen_mime = get_mime_type(str(generated_image))
+        # 编码图片（两张图按相同参数缩放，保持可比）
+        base_image = build_image_payload(str(base_screenshot))
+        generated = build_image_payload(str(generated_image))
 
         # 构建消息内容（两张图片）
         content = [
             {
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:{base_mime};base64,{base64_image}"
+                    "url": base_image.data_url
                 }
             },
             {
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:{gen_mime};base64,{generated_b64}"
+                    "url": generated.data_url
                 }
             },
             {
@@ -262,17 +262,24 @@ class QualityVerifier:
             "max_tokens": 2048
         }
 
+        cache_key = cache_key_for(payload)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None and is_json_reply(cached):
+                print(f"      ✓ 验证结果缓存命中")
+                return cached
+
         base_wait = 5
         last_error = None
 
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
-                    wait_time = min(base_wait * (2 ** (attempt - 1)), 60)
+                    wait_time = backoff_delay(attempt, base_wait)
                     print(f"      ⏳ 等待 {wait_time}s 后重试 ({attempt + 1}/{max_retries})...")
                     time.sleep(wait_time)
 
-                response = requests.post(
+                response = get_http_client().post(
                     self.api_url,
                     headers=headers,
                     json=payload,
@@ -290,7 +297,11 @@ class QualityVerifier:
 
                 response.raise_for_status()
                 result = response.json()
-                return result['choices'][0]['message']['content']
+                content = result['choices'][0]['message']['content']
+                # 只缓存可解析的回复，格式错误的回复不会在重跑时被原样重放
+                if cache_key and is_json_reply(content):
+                    get_response_cache().put(cache_key, content, self.model)
+                return content
 
             except requests.exceptions.RequestException as e:
                 print(f"      ⚠ VLM 请求失败: {e}")
@@ -8,11 +8,18 @@
 2. 根据 page_type + key_elements + user_waiting 匹配规则
 3. 按优先级排序，选择最优规则
 4. 生成异常注入配置（anomaly_mode, instruction, gt_category 等）
+
+加载 / reload() 时构建规则索引：app_category、page_type → 候选规则的倒排表，
+以及全部 requires_elements 关键词表。match() 只对候选规则打分，
+关键词命中对每帧只计算一次，规则表增长到数千条时单帧匹配仍在亚毫秒级。
 """
 
 import json
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
+
+# key_elements 拼接分隔符（关键词中不会出现，避免跨元素误匹配）
+_ELEMENT_SEP = "\x00"
 
 
 # 规则表默认路径
@@ -37,16 +44,64 @@ class RuleEngine:
         if not path.exists():
             raise FileNotFoundError(f"规则表文件不存在: {path}")
 
-        with open(path, 'r', encoding='utf-8') as f:
+        self._rules_path = path
+        self._load()
+
+        print(f"  [规则引擎] 加载 {len(self._rules)} 条规则, "
+              f"{len(self._app_categories)} 个 APP 类别")
+
+    def _load(self):
+        """读取规则表并重建索引"""
+        with open(self._rules_path, 'r', encoding='utf-8') as f:
             self._data = json.load(f)
 
         self._rules: List[Dict] = self._data.get("rules", [])
         self._app_categories: Dict = self._data.get("app_categories", {})
         self._page_types: Dict = self._data.get("page_types", {})  # 保留兼容旧格式
         self._fallback: Dict = self._data.get("fallback", {})
+        self._build_index()
 
-        print(f"  [规则引擎] 加载 {len(self._rules)} 条规则, "
-              f"{len(self._app_categories)} 个 APP 类别")
+    def _build_index(self):
+        """
+        构建规则索引
+
+        - _by_category / _by_page_type: 取值 → 规则下标集合
+        - _any_category / _any_page_type: 未限定该维度的规则（对任何取值都是候选）
+        - _rule_elements: 每条规则去重后的 (requires_elements 关键词, 重复次数)
+        """
+        self._all_indices: Set[int] = set(range(len(self._rules)))
+        self._by_category: Dict[str, Set[int]] = {}
+        self._by_page_type: Dict[str, Set[int]] = {}
+        self._any_category: Set[int] = set()
+        self._any_page_type: Set[int] = set()
+        self._rule_elements: List[tuple] = []
+
+        for i, rule in enumerate(self._rules):
+            categories = rule.get("app_categories", [])
+            if categories:
+                for category in categories:
+                    self._by_category.setdefault(category, set()).add(i)
+            else:
+                self._any_category.add(i)
+
+            page_types = rule.get("page_types", [])
+            if page_types:
+                for page_type in page_types:
+                    self._by_page_type.setdefault(page_type, set()).add(i)
+            else:
+                self._any_page_type.add(i)
+
+            elements = rule.get("requires_elements", [])
+            self._rule_elements.append(tuple((e, elements.count(e)) for e in dict.fromkeys(elements)))
+
+    def _candidates(self, app_category: str, page_type: str) -> List[int]:
+        """通过 app_category / page_type 硬过滤的规则下标（保持规则表顺序）"""
+        candidates = self._all_indices
+        if app_category:
+            candidates = self._by_category.get(app_category, set()) | self._any_category
+        if page_type:
+            candidates = candidates & (self._by_page_type.get(page_type, set()) | self._any_page_type)
+        return sorted(candidates)
 
     def match(
         self,
@@ -71,18 +126,13 @@ class RuleEngine:
             return []
 
         matched = []
+        # 关键词 → 是否出现在任一 key_element 中（子串匹配，每帧每个关键词只判断一次）
+        joined_elements = _ELEMENT_SEP.join(key_elements) if key_elements else ""
+        element_hits: Dict[str, bool] = {}
 
-        for rule in self._rules:
-            # 1. app_category 硬过滤（v2 新增）
-            rule_categories = rule.get("app_categories", [])
-            if app_category and rule_categories and app_category not in rule_categories:
-                continue
-
-            # 2. page_type 硬过滤
-            rule_page_types = rule.get("page_types", [])
-            if page_type and rule_page_types and page_type not in rule_page_types:
-                continue
-
+        # 1-2. app_category / page_type 硬过滤（索引查表）
+        for i in self._candidates(app_category, page_type):
+            rule = self._rules[i]
             score = rule.get("priority", 0)
 
             # 3. user_waiting 加分
@@ -92,10 +142,13 @@ class RuleEngine:
             # 4. key_elements 加分
             required_elements = rule.get("requires_elements", [])
             if required_elements and key_elements:
-                element_match = sum(
-                    1 for e in required_elements
-                    if any(e in elem for elem in key_elements)
-                )
+                element_match = 0
+                for e, count in self._rule_elements[i]:
+                    hit = element_hits.get(e)
+                    if hit is None:
+                        hit = element_hits[e] = e in joined_elements
+                    if hit:
+                        element_match += count
                 score += element_match * 10
 
             matched.append({
@@ -185,10 +238,6 @@ class RuleEngine:
         return dict(self._page_types)
 
     def reload(self):
-        """重新加载规则表"""
-        with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
-            self._data = json.load(f)
-        self._rules = self._data.get("rules", [])
-        self._page_types = self._data.get("page_types", {})
-        self._fallback = self._data.get("fallback", {})
+        """重新加载规则表（同时重建索引）"""
+        self._load()
         print(f"  [规则引擎] 重新加载: {len(self._rules)} 条规则")
@@ -11,14 +11,26 @@
     2. RuleEngine 匹配规则（page_type → anomaly_mode）
     3. TimingValidator 时序验证
     4. 输出 injection_point + anomaly_config
+
+并行模式（classify_workers > 1，或环境变量 CLASSIFY_WORKERS）：
+  1. 所有帧无上下文并发分类（可命中分类器缓存）
+  2. 页面类型发生切换的帧带上一帧结果并发复核（序列上下文）
+  3. 按时间顺序执行规则匹配与候选对比
+
+近重复帧去重（两种模式均生效）：
+  连续的近乎相同帧（感知哈希相似度 ≥ dedup_threshold）只分类代表帧，
+  其余帧沿用代表帧的分类结果；统计写入结果的 frame_dedup 字段。
 """
 
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional
 
 from app.utils.history_manager import HistoryManager, StepRecord
+from .frame_dedup import FrameDeduplicator
 from .page_classifier import PageClassifier
 from .rule_engine import RuleEngine
 
@@ -41,7 +53,10 @@ class SequenceAnalyzer:
         page_classifier: PageClassifier,
         task_description: str = "",
         min_steps_before_inject: int = 2,
-        max_history_steps: int = 10
+        max_history_steps: int = 10,
+        classify_workers: int = None,
+        reconcile_context: bool = True,
+        dedup_threshold: float = None,
     ):
         """
         初始化语义分析器
@@ -52,12 +67,20 @@ class SequenceAnalyzer:
             task_description: 任务描述（用于日志）
             min_steps_before_inject: 最少分析多少步后才考虑注入
             max_history_steps: 最大历史步数
+            classify_workers: 并发分类线程数（默认读取 CLASSIFY_WORKERS，1 表示逐帧串行）
+            reconcile_context: 并行模式下是否对页面切换帧做带上下文的复核
+            dedup_threshold: 近重复帧相似度阈值（默认读取 FRAME_DEDUP_THRESHOLD，≥ 1 禁用）
         """
         self.rule_engine = rule_engine
         self.classifier = page_classifier
         self.task_description = task_description
         self.min_steps_before_inject = min_steps_before_inject
         self.history_manager = HistoryManager(max_history_steps)
+        if classify_workers is None:
+            classify_workers = int(os.environ.get('CLASSIFY_WORKERS', 1))
+        self.classify_workers = max(1, classify_workers)
+        self.reconcile_context = reconcile_context
+        self.deduplicator = FrameDeduplicator(threshold=dedup_threshold)
 
     def analyze_step(
         self,
@@ -104,6 +127,12 @@ class SequenceAnalyzer:
             self._record_step(screenshot_path, step_index, result)
             return result
 
+        page_info = self._classify_step(screenshot_path, step_index, total_steps)
+        return self._decide_step(screenshot_path, step_index, total_steps,
+                                 page_info, expected_anomaly_mode)
+
+    def _classify_step(self, screenshot_path: Path, step_index: int, total_steps: int) -> Dict:
+        """VLM 页面分类（以历史中上一帧的结论作为序列上下文）"""
         # ===== Step 1: VLM 页面分类（v2 两级 + 序列上下文） =====
         # 获取上一帧的分类结果，作为序列上下文传递给 VLM
         prev_records = self.history_manager.get_recent_records()
@@ -118,11 +147,21 @@ class SequenceAnalyzer:
                 }
         step_ctx = f"{step_index + 1}/{total_steps}步"
 
-        page_info = self.classifier.classify(
+        return self.classifier.classify(
             str(screenshot_path),
             prev_page_info=prev_info,
             step_context=step_ctx,
         )
+
+    def _decide_step(
+        self,
+        screenshot_path: Path,
+        step_index: int,
+        total_steps: int,
+        page_info: Dict,
+        expected_anomaly_mode: str = None,
+    ) -> Dict:
+        """根据页面分类结果做规则匹配与内容验证，输出单步决策（返回格式同 analyze_step）"""
         app_category = page_info.get("app_category", "")
         page_type = page_info.get("page_type", "travel_loading")
         key_elements = page_info.get("key_elements", [])
@@ -276,11 +315,37 @@ class SequenceAnalyzer:
 
         candidates = []
 
+        # 近重复帧分组（只对需要分类的帧）：rep_of[i] = 所在组的代表帧
+        start_step = min(self.min_steps_before_inject, total_steps)
+        groups = self.deduplicator.group(screenshots[start_step:])
+        dedup_stats = self.deduplicator.stats(groups, offset=start_step)
+        rep_of = {start_step + i: start_step + g[0] for g in groups for i in g}
+        if dedup_stats["removed"]:
+            print(f"近重复帧去重 (阈值 {self.deduplicator.threshold}): "
+                  f"{dedup_stats['total_frames']} → {dedup_stats['representatives']} 帧, "
+                  f"合并 {', '.join(dedup_stats['merged_groups'])}")
+
+        # 并行模式：先并发完成所有代表帧的 VLM 分类，再按顺序做规则匹配
+        page_infos = {}
+        if self.classify_workers > 1:
+            page_infos = self._classify_parallel(screenshots, rep_of)
+
         for i, screenshot in enumerate(screenshots):
             print(f"\n--- Step {i}/{total_steps-1}: {screenshot.name} ---")
 
-            result = self.analyze_step(screenshot, i, total_steps,
-                                        expected_anomaly_mode=expected_anomaly_mode)
+            if i < start_step:
+                result = self.analyze_step(screenshot, i, total_steps,
+                                           expected_anomaly_mode=expected_anomaly_mode)
+            else:
+                rep = rep_of.get(i, i)
+                if rep not in page_infos:
+                    page_infos[rep] = self._classify_step(screenshot, i, total_steps)
+                elif rep != i:
+                    print(f"  近重复帧，沿用 Step {rep} 的分类结果")
+                result = self._decide_step(screenshot, i, total_steps, page_infos[rep],
+                                           expected_anomaly_mode=expected_anomaly_mode)
+                if rep != i:
+                    result["dedup_of"] = rep
 
             print(f"  [{result.get('app_category', '?')}/{result.get('page_type', '?')}]")
             print(f"  决策: {result['decision']}")
@@ -334,6 +399,7 @@ class SequenceAnalyzer:
                 "vlm_user_waiting": best.get("vlm_user_waiting", False),
                 "reasoning": best.get("think", ""),
                 "candidates_count": len(candidates),
+                "frame_dedup": dedup_stats,
                 "history": [r.to_dict() for r in self.history_manager.records]
             }
 
@@ -360,9 +426,68 @@ class SequenceAnalyzer:
             "page_type": "fallback",
             "matched_rule_id": "fallback",
             "reasoning": "遍历完整个序列，无规则匹配，使用 fallback 配置",
+            "frame_dedup": dedup_stats,
             "history": [r.to_dict() for r in self.history_manager.records]
         }
 
+    def _classify_parallel(self, screenshots: List[Path], rep_of: Dict[int, int]) -> Dict[int, Dict]:
+        """
+        并发分类所有需要分析的代表帧
+
+        第一遍无上下文分类（同一截图可命中分类器缓存）；第二遍只复核
+        页面类型与上一帧不同的帧，带上一帧的第一遍结果作为序列上下文，
+        用于区分"刚切换过来的新页面"与"停留在原页面"。
+
+        Args:
+            rep_of: {帧下标: 代表帧下标}，只分类代表帧
+
+        Returns:
+            {代表帧下标: page_info}（前 min_steps_before_inject 帧不分类）
+        """
+        total_steps = len(screenshots)
+        indices = sorted(set(rep_of.values()))
+        if not indices:
+            return {}
+        for i in indices:
+            if not screenshots[i].exists():
+                raise FileNotFoundError(f"截图不存在: {screenshots[i]}")
+
+        start = time.time()
+        workers = min(self.classify_workers, len(indices))
+        print(f"并行分类: {len(indices)} 帧, {workers} 线程")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {i: executor.submit(self.classifier.classify, str(screenshots[i]))
+                       for i in indices}
+            page_infos = {i: futures[i].result() for i in indices}
+
+            # 第二遍：页面切换帧带序列上下文复核（上下文取自第一遍结果，彼此独立可并发）
+            reconciled = []
+            if self.reconcile_context:
+                futures = {}
+                for i in indices:
+                    prev = page_infos.get(rep_of.get(i - 1, -1))
+                    if not prev or prev.get("page_type") == page_infos[i].get("page_type"):
+                        continue
+                    prev_info = {
+                        "app_category": prev.get("app_category", ""),
+                        "page_type": prev.get("page_type", ""),
+                        "reasoning": prev.get("reasoning", ""),
+                    }
+                    futures[i] = executor.submit(
+                        self.classifier.classify,
+                        str(screenshots[i]),
+                        prev_page_info=prev_info,
+                        step_context=f"{i + 1}/{total_steps}步",
+                    )
+                for i, future in futures.items():
+                    page_infos[i] = future.result()
+                    reconciled.append(i)
+
+        print(f"并行分类完成: {time.time() - start:.1f}s"
+              + (f", 上下文复核 {len(reconciled)} 帧 {reconciled}" if self.reconcile_context else ""))
+        return page_infos
+
     def _record_step(self, screenshot_path: Path, step_index: int, result: Dict,
                       page_info: Dict = None):
         """记录分析步骤到历史"""
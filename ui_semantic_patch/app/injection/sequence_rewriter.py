@@ -332,6 +332,9 @@ class SequenceRewriter:
         """
         调用已有的 run_pipeline.py 生成异常截图
 
+        子进程继承当前环境变量：若设置了 OMNI_WORKER_ADDRESS，
+        Stage 1 会路由到常驻 OmniParser 服务，不再重复加载模型。
+
         Args:
             screenshot_path: 基准截图路径
             instruction: 生成指令
@@ -37,6 +37,9 @@ import requests
 
 logger = logging.getLogger(__name__)
 
+# 复用 keep-alive 连接（本模块独立加载，不引入 app.utils.http_client）
+_session = requests.Session()
+
 
 # ── 独立模块加载器 ────────────────────────────────────────
 # 避免通过 app.injection.__init__ 间接导入（该 init 会级联导入其他有
@@ -169,7 +172,7 @@ class LLMClient:
                     logger.info(f"  重试 {attempt + 1}/{max_retries}，等待 {wait}s...")
                     time.sleep(wait)
 
-                resp = requests.post(
+                resp = _session.post(
                     self.api_url, headers=headers, json=payload,
                     timeout=self.timeout,
                 )
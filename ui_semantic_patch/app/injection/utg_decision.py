@@ -18,6 +18,9 @@ from typing import Dict, List, Optional
 
 import requests
 
+from app.utils.http_client import get_http_client, backoff_delay
+from app.utils.common import is_json_reply
+from app.utils.response_cache import cache_key_for, get_response_cache
 from .utg_loader import UTGLoader
 
 logger = logging.getLogger(__name__)
@@ -261,18 +264,27 @@ class UTGDecisionMaker:
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {self.api_key}'}
         payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}],
                     "temperature": self.temperature, "max_tokens": self.max_tokens}
+        cache_key = cache_key_for(payload)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None and is_json_reply(cached):
+                return cached
         last_error = None
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
-                    time.sleep(min(5 * (2 ** (attempt - 1)), 60))
-                resp = requests.post(self.api_url, headers=headers, json=payload, timeout=180)
+                    time.sleep(backoff_delay(attempt))
+                resp = get_http_client().post(self.api_url, headers=headers, json=payload, timeout=180)
                 if resp.status_code == 429:
                     last_error = "API 限流 (429)"; continue
                 elif resp.status_code >= 500:
                     last_error = f"服务器错误 ({resp.status_code})"; continue
                 resp.raise_for_status()
-                return resp.json()['choices'][0]['message']['content']
+                content = resp.json()['choices'][0]['message']['content']
+                # 只缓存可解析的回复，格式错误的回复不会在重跑时被原样重放
+                if cache_key and is_json_reply(content):
+                    get_response_cache().put(cache_key, content, self.model)
+                return content
             except requests.exceptions.RequestException as e:
                 last_error = str(e)
                 if attempt == max_retries - 1:
@@ -18,7 +18,6 @@ area_loading_renderer.py - 区域加载异常渲染器（独立模块）
 
 import json
 import base64
-import requests
 import re
 import os
 from typing import Dict, Tuple, Optional
@@ -28,7 +27,9 @@ from datetime import datetime
 
 from .base import BaseRenderer, RenderResult
 from app.generators.prompts import PROMPT_AREA_LOADING_STYLE, PROMPT_AREA_LOADING_ICON
-from app.utils.semantic_dialog_generator import generate_image
+from app.utils.semantic_dialog_generator import generate_image, get_image_model_signature
+from app.utils.http_client import get_http_client
+from app.utils.asset_cache import cache_enabled as asset_cache_enabled, get_asset_cache
 
 
 class AreaLoadingRenderer(BaseRenderer):
@@ -186,11 +187,22 @@ class AreaLoadingRenderer(BaseRenderer):
                 "app_type": "ecommerce"               # 应用类型
             }
         """
-        # 使用缓存避免重复分析
+        # 使用缓存避免重复分析（进程内按路径，磁盘按图片内容）
         cache_key = str(screenshot_path)
         if use_cache and cache_key in self._style_cache:
             return self._style_cache[cache_key]
 
+        disk_key = None
+        if use_cache and asset_cache_enabled():
+            disk_key = get_asset_cache().make_key(
+                'app_style', reference=screenshot_path, model=self.vlm_model,
+                extra=PROMPT_AREA_LOADING_STYLE,
+            )
+            style = get_asset_cache().get_json(disk_key)
+            if style:
+                self._style_cache[cache_key] = style
+                return style
+
         # 编码图片
         with open(screenshot_path, 'rb') as f:
             image_base64 = base64.b64encode(f.read()).decode('utf-8')
@@ -219,7 +231,7 @@ class AreaLoadingRenderer(BaseRenderer):
         }
 
         try:
-            response = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
 
             content = response.json()['choices'][0]['message']['content']
@@ -229,6 +241,8 @@ class AreaLoadingRenderer(BaseRenderer):
             if json_match:
                 style = json.loads(json_match.group(0))
                 self._style_cache[cache_key] = style
+                if disk_key:
+                    get_asset_cache().put_json(disk_key, style)
                 return style
 
             raise ValueError("无法解析 VLM 返回的风格信息")
@@ -263,6 +277,17 @@ class AreaLoadingRenderer(BaseRenderer):
         if self._reference_features:
             return self._reference_features
 
+        disk_key = None
+        if asset_cache_enabled():
+            disk_key = get_asset_cache().make_key(
+                'reference_icon', reference=self.reference_icon_path, model=self.vlm_model,
+                extra=PROMPT_AREA_LOADING_ICON,
+            )
+            features = get_asset_cache().get_json(disk_key)
+            if features:
+                self._reference_features = features
+                return features
+
         try:
             with open(self.reference_icon_path, 'rb') as f:
                 image_base64 = base64.b64encode(f.read()).decode('utf-8')
@@ -290,7 +315,7 @@ class AreaLoadingRenderer(BaseRenderer):
                 'max_tokens': 400
             }
 
-            response = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
 
             content = response.json()['choices'][0]['message']['content']
@@ -300,6 +325,8 @@ class AreaLoadingRenderer(BaseRenderer):
             if json_match:
                 features = json.loads(json_match.group(0))
                 self._reference_features = features
+                if disk_key:
+                    get_asset_cache().put_json(disk_key, features)
                 return features
 
             raise ValueError("无法解析参考图标特征")
@@ -324,6 +351,8 @@ class AreaLoadingRenderer(BaseRenderer):
         1. DashScope 要求最小 512×512，所以固定生成 512 尺寸
         2. 生成后缩小到目标尺寸，保证高质量和自适应
         3. 所有的尺寸比例计算都是相对的（symbol 30%, padding 10% 等）
+        4. 512 原图按风格签名写入素材缓存（asset_cache），相同风格复用并缩放，
+           不再重复调用图像生成
 
         Args:
             anomaly_type: timeout / network_error / loading / image_broken / empty_data
@@ -339,6 +368,23 @@ class AreaLoadingRenderer(BaseRenderer):
         # DashScope 最小要求 512×512，我们固定用 512 生成高质量图标
         generation_size = 512
 
+        # 素材缓存：文案由 anomaly_type + app_type 决定，布局比例固定，按目标尺寸分桶
+        asset_key = None
+        if asset_cache_enabled():
+            asset_key = get_asset_cache().make_key(
+                'loading_icon',
+                anomaly_type=anomaly_type,
+                app_style=app_style,
+                reference=self.reference_icon_path,
+                size=target_size,
+                model=get_image_model_signature(),
+                extra={'app_type': app_type},
+            )
+            cached = get_asset_cache().get_image(asset_key, size=(target_size, target_size))
+            if cached is not None:
+                print(f"    ✓ 复用缓存图标 ({asset_key[:12]}) → {target_size}px")
+                return cached
+
         # 获取文案内容
         content = self._get_content_text(anomaly_type, app_type)
 
@@ -414,6 +460,8 @@ Generate the icon image now."""
 
             # 确保背景透明
             icon = self._ensure_transparent_bg(icon)
+            if asset_key:
+                get_asset_cache().put_image(asset_key, icon)
 
             # 缩小到目标尺寸（如果生成尺寸 > 目标尺寸）
             if target_size < generation_size:
@@ -18,7 +18,6 @@ import os
 import re
 import json
 import base64
-import requests
 from typing import Dict, List, Tuple, Optional
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 from pathlib import Path
@@ -26,6 +25,7 @@ from datetime import datetime
 
 from .base import BaseRenderer, RenderResult
 from app.generators.prompts import PROMPT_CONTENT_DUPLICATE_PANEL
+from app.utils.http_client import get_http_client
 
 # 图像生成 API Key（优先使用 IMAGE_GEN_API_KEY，回退到 DASHSCOPE_API_KEY）
 IMAGE_GEN_API_KEY = os.environ.get('IMAGE_GEN_API_KEY') or os.environ.get('DASHSCOPE_API_KEY')
@@ -431,7 +431,7 @@ class ContentDuplicateRenderer(BaseRenderer):
                 'max_tokens': 1000
             }
 
-            response = requests.post(
+            response = get_http_client().post(
                 self.vlm_api_url,
                 headers=headers,
                 json=payload,
@@ -686,7 +686,7 @@ Requirements:
                 if results and len(results) > 0:
                     img_url = results[0].get('url')
                     if img_url:
-                        img_resp = requests.get(img_url, timeout=30)
+                        img_resp = get_http_client().get(img_url, timeout=30)
                         if img_resp.status_code == 200:
                             from io import BytesIO
                             generated_img = Image.open(BytesIO(img_resp.content))
@@ -784,7 +784,7 @@ Requirements:
                 'max_tokens': 1000
             }
 
-            response = requests.post(
+            response = get_http_client().post(
                 self.vlm_api_url,
                 headers=headers,
                 json=payload,
@@ -14,7 +14,8 @@ from typing import Optional, Tuple
 
 from .base import BaseRenderer, RenderResult
 from app.utils.gt_manager import GTManager
-from app.utils.semantic_dialog_generator import SemanticDialogGenerator
+from app.utils.semantic_dialog_generator import SemanticDialogGenerator, get_image_model_signature
+from app.utils.asset_cache import cache_enabled as asset_cache_enabled, get_asset_cache
 
 
 class PatchRenderer(BaseRenderer):
@@ -294,15 +295,36 @@ class PatchRenderer(BaseRenderer):
         else:
             print("  ⚠ VLM 语义生成失败，使用默认内容")
 
-        # 生成弹窗图像
-        dialog_img = generator.generate_dialog_ai_from_meta(
-            meta_semantic=visual_style_prompt,
-            meta_features=meta_features,
-            reference_path=ref_path,
-            width=dialog_width,
-            height=dialog_height,
-            target_content=target_content,
-        )
+        # 生成弹窗图像（相同 GT 样本 + 风格 + 文案 + 尺寸分桶时复用素材缓存）
+        asset_key = None
+        asset_cache_hit = False
+        dialog_img = None
+        if asset_cache_enabled():
+            asset_key = get_asset_cache().make_key(
+                'dialog',
+                anomaly_type=meta_features.get('anomaly_type', 'promotional_dialog'),
+                app_style=meta_features,
+                reference=ref_path,
+                size=(dialog_width, dialog_height),
+                model=get_image_model_signature(),
+                extra={'meta_semantic': visual_style_prompt, 'content': target_content},
+            )
+            dialog_img = get_asset_cache().get_image(asset_key, size=(dialog_width, dialog_height))
+            if dialog_img is not None:
+                print(f"  ✓ 复用缓存弹窗 ({asset_key[:12]}) → {dialog_width}x{dialog_height}")
+                asset_cache_hit = True
+
+        if dialog_img is None:
+            dialog_img = generator.generate_dialog_ai_from_meta(
+                meta_semantic=visual_style_prompt,
+                meta_features=meta_features,
+                reference_path=ref_path,
+                width=dialog_width,
+                height=dialog_height,
+                target_content=target_content,
+            )
+            if dialog_img and asset_key:
+                get_asset_cache().put_image(asset_key, dialog_img)
 
         if not dialog_img:
             logger.warning("弹窗图像生成失败，返回原始截图")
@@ -425,6 +447,7 @@ class PatchRenderer(BaseRenderer):
             ),
             'dialog_position_type': dialog_position,
             'ui_components_count': len(ui_json.get('components', [])),
+            'asset_cache_hit': asset_cache_hit,
         }
         if position_result.get('matched_component'):
             matched = position_result['matched_component']
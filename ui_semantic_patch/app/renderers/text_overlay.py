@@ -19,10 +19,11 @@ import json
 import logging
 import os
 import re
-import requests
+import sys
 import base64
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Union
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 from datetime import datetime
 
@@ -32,10 +33,23 @@ from .base import BaseRenderer, RenderResult
 from app.core.schemas import TextStyle, EditOp
 from app.core.config import config
 from app.utils.common import encode_image, get_mime_type, extract_json
+from app.utils.http_client import get_http_client
 
 # PaddleOCR 离线模型路径配置（使用集中配置）
 _PADDLEOCR_MODEL_DIR = config.PADDLEOCR_MODEL_DIR
 
+# 复用 Stage 1 OCR 文本行的最低置信度，低于此值时对卡片区域重新 OCR
+_STAGE1_OCR_MIN_CONF = 0.8
+
+
+def _get_ocr_service():
+    """OmniParser 的共享 OCR 服务（与 Stage 1 共用按模型配置缓存的引擎实例）"""
+    omniparser_path = str(config.OMNIPARSER_PATH)
+    if omniparser_path not in sys.path:
+        sys.path.insert(0, omniparser_path)
+    from util import ocr_service
+    return ocr_service
+
 
 # ==================== 数据结构 ====================
 
@@ -270,7 +284,8 @@ class TextOverlayRenderer(BaseRenderer):
                     ocr_plan = self._refine_ops_with_ocr(
                         ai_plan,
                         screenshot_path,
-                        include_button_changes=True
+                        include_button_changes=True,
+                        ocr_layer=ui_json.get('ocr')
                     )
                     if ocr_plan:
                         print("  ✓ modify_text_ai 已切换为 OCR 精定位灰化策略")
@@ -298,7 +313,9 @@ class TextOverlayRenderer(BaseRenderer):
             card_plan = self._plan_modify_text_ai_edits(screenshot_path, ui_json, instruction)
             if card_plan is not None:
                 # OCR 精定位：只保留 OCR 匹配到的文字级操作
-                ocr_plan = self._refine_ops_with_ocr(card_plan, screenshot_path)
+                ocr_plan = self._refine_ops_with_ocr(
+                    card_plan, screenshot_path, ocr_layer=ui_json.get('ocr')
+                )
                 if ocr_plan:
                     return ocr_plan
                 print("  ⚠ OCR 精定位无匹配结果")
@@ -699,43 +716,59 @@ class TextOverlayRenderer(BaseRenderer):
 
     # ==================== OCR 精定位 ====================
 
+    def _resolve_paddle_ocr_config(self) -> Optional[dict]:
+        """
+        确定裁切 OCR 使用的 PaddleOCR 模型配置（优先中文模型），只解析路径不加载模型
+
+        Returns:
+            模型配置（同时记录到 _paddle_ocr_config），本地模型不存在时返回 None
+        """
+        if hasattr(self, '_paddle_ocr_config'):
+            return self._paddle_ocr_config
+        # 优先使用中文模型
+        det_model_dir = _PADDLEOCR_MODEL_DIR / "det" / "ch" / "ch_PP-OCRv4_det_infer"
+        rec_model_dir = _PADDLEOCR_MODEL_DIR / "rec" / "ch" / "ch_PP-OCRv4_rec_infer"
+        cls_model_dir = _PADDLEOCR_MODEL_DIR / "cls" / "ch_ppocr_mobile_v2.0_cls_infer"
+
+        # 如果中文模型不存在，回退到英文模型
+        if not det_model_dir.exists():
+            det_model_dir = _PADDLEOCR_MODEL_DIR / "det" / "en_PP-OCRv3_det_infer"
+            print("    ⓘ PaddleOCR 中文检测模型不存在，使用英文检测模型")
+
+        if not rec_model_dir.exists():
+            rec_model_dir = _PADDLEOCR_MODEL_DIR / "rec" / "en_PP-OCRv4_rec_infer"
+            print("    ⓘ PaddleOCR 中文识别模型不存在，使用英文识别模型")
+
+        if not det_model_dir.exists() or not rec_model_dir.exists():
+            print(f"    ⚠ PaddleOCR 本地模型不存在: {det_model_dir}, {rec_model_dir}")
+            self._paddle_ocr_config = None
+            return None
+
+        # 字典需与识别模型一致：英文识别模型使用英文字典（与 Stage 1 配置相同，可共用引擎）
+        self._paddle_ocr_config = {
+            'det_model_dir': det_model_dir,
+            'rec_model_dir': rec_model_dir,
+            'cls_model_dir': cls_model_dir,
+            'lang': 'ch' if 'ch' in rec_model_dir.name else 'en',
+        }
+        return self._paddle_ocr_config
+
     def _get_paddle_ocr(self):
-        """懒加载 PaddleOCR（中文模式，离线模式），不可用时返回 None"""
+        """
+        懒加载 PaddleOCR（优先中文模型，离线模式），不可用时返回 None
+
+        引擎由共享 OCR 服务按模型配置缓存，多个渲染器实例与 Stage 1
+        使用相同模型时共用同一实例；本实例只记录模型配置（_paddle_ocr_config）。
+        """
         if hasattr(self, '_paddle_ocr_instance'):
             return self._paddle_ocr_instance
+        if self._resolve_paddle_ocr_config() is None:
+            self._paddle_ocr_instance = None
+            return None
         try:
-            from paddleocr import PaddleOCR
-            import torch
-
-            # 优先使用中文模型
-            det_model_dir = _PADDLEOCR_MODEL_DIR / "det" / "ch" / "ch_PP-OCRv4_det_infer"
-            rec_model_dir = _PADDLEOCR_MODEL_DIR / "rec" / "ch" / "ch_PP-OCRv4_rec_infer"
-            cls_model_dir = _PADDLEOCR_MODEL_DIR / "cls" / "ch_ppocr_mobile_v2.0_cls_infer"
-
-            # 如果中文模型不存在，回退到英文模型
-            if not det_model_dir.exists():
-                det_model_dir = _PADDLEOCR_MODEL_DIR / "det" / "en_PP-OCRv3_det_infer"
-                print("    ⓘ PaddleOCR 中文检测模型不存在，使用英文检测模型")
-
-            if not rec_model_dir.exists():
-                rec_model_dir = _PADDLEOCR_MODEL_DIR / "rec" / "en_PP-OCRv4_rec_infer"
-                print("    ⓘ PaddleOCR 中文识别模型不存在，使用英文识别模型")
-
-            if not det_model_dir.exists() or not rec_model_dir.exists():
-                print(f"    ⚠ PaddleOCR 本地模型不存在: {det_model_dir}, {rec_model_dir}")
-                self._paddle_ocr_instance = None
-                return None
-
-            use_gpu = torch.cuda.is_available()
-            self._paddle_ocr_instance = PaddleOCR(
-                det_model_dir=str(det_model_dir),
-                rec_model_dir=str(rec_model_dir),
-                cls_model_dir=str(cls_model_dir),
-                use_angle_cls=False,
-                use_gpu=use_gpu,
-                show_log=False,
-                lang='ch'  # 使用中文模式
-            )
+            det_model_dir = self._paddle_ocr_config['det_model_dir']
+            rec_model_dir = self._paddle_ocr_config['rec_model_dir']
+            self._paddle_ocr_instance = _get_ocr_service().get_paddle_ocr(**self._paddle_ocr_config)
 
             # 根据实际使用的模型输出提示信息
             det_type = "中文检测" if 'ch' in str(det_model_dir) else "英文检测"
@@ -746,6 +779,97 @@ class TextOverlayRenderer(BaseRenderer):
             self._paddle_ocr_instance = None
         return self._paddle_ocr_instance
 
+    @staticmethod
+    def _ocr_items_from_layer(
+        ocr_layer: Optional[dict],
+        box: Tuple[int, int, int, int]
+    ) -> List[dict]:
+        """
+        从 Stage 1 OCR 文本行层取出中心点落在卡片区域内的文字行
+
+        Args:
+            ocr_layer: ui_json['ocr']（{'engine', 'lang', 'rec_model', 'lines': [{'text', 'bounds', 'confidence'}]}）
+            box: 卡片区域绝对坐标 (x1, y1, x2, y2)
+
+        Returns:
+            与裁切 OCR 结果相同结构的列表，bbox 为相对卡片区域的坐标
+        """
+        if not ocr_layer:
+            return []
+        x1, y1, x2, y2 = box
+        items = []
+        for line in ocr_layer.get('lines', []):
+            b = line.get('bounds', {})
+            cx = b.get('x', 0) + b.get('width', 0) / 2
+            cy = b.get('y', 0) + b.get('height', 0) / 2
+            if not (x1 <= cx < x2 and y1 <= cy < y2):
+                continue
+            # 裁剪到卡片区域内，与裁切 OCR 的坐标范围一致
+            bx1, by1 = max(x1, b.get('x', 0)), max(y1, b.get('y', 0))
+            bx2 = min(x2, b.get('x', 0) + b.get('width', 0))
+            by2 = min(y2, b.get('y', 0) + b.get('height', 0))
+            items.append({
+                'text': line.get('text', ''),
+                'conf': float(line.get('confidence', 1.0)),
+                'bbox': {
+                    'x': bx1 - x1, 'y': by1 - y1,
+                    'width': max(1, bx2 - bx1), 'height': max(1, by2 - by1),
+                },
+            })
+        return items
+
+    def _layer_matches_crop_ocr(self, ocr_layer: Optional[dict]) -> bool:
+        """Stage 1 文本行是否由与裁切 OCR 相同的引擎、语言和识别模型产生"""
+        config = self._resolve_paddle_ocr_config()
+        if not ocr_layer or config is None:
+            return False
+        return (
+            ocr_layer.get('engine') == 'PaddleOCR'
+            and ocr_layer.get('lang') == config['lang']
+            and ocr_layer.get('rec_model') == Path(config['rec_model_dir']).name
+        )
+
+    def _layer_ambiguity(
+        self,
+        ocr_items: List[dict],
+        text_changes: List[dict],
+        button_changes: List[dict],
+        exact: bool = False
+    ) -> Optional[str]:
+        """
+        判断 Stage 1 文本行能否直接用于精定位，不能时返回原因
+
+        文字修改要求 from 文字恰好匹配一行且置信度足够；
+        按钮在每行都可能出现（如“预订”），由行锚点排序消歧，只要求至少匹配一行。
+
+        exact=True 用于 Stage 1 与裁切 OCR 模型不一致（如英文模型识别中文截图）：
+        部分匹配可能只是被截断的识别结果（"z112次" 对 "z112"），只接受完全一致的文字。
+        """
+        if not ocr_items:
+            return "卡片区域内无 Stage 1 文本行"
+        for tc in text_changes:
+            from_text = str(tc.get('from', '')).strip()
+            matches = [item for item in ocr_items if self._text_match(from_text, item['text'])]
+            if not matches:
+                return f"Stage 1 文本行未匹配 \"{from_text}\""
+            if len(matches) > 1:
+                return f"Stage 1 文本行多处匹配 \"{from_text}\" ({len(matches)} 处)"
+            if exact and matches[0]['text'].strip() != from_text:
+                return f"Stage 1 文本行与裁切 OCR 模型不一致且未精确匹配 \"{from_text}\""
+            if matches[0]['conf'] < _STAGE1_OCR_MIN_CONF:
+                return f"Stage 1 文本行置信度低 \"{from_text}\" ({matches[0]['conf']:.2f})"
+        for bc in button_changes:
+            from_btn = str(bc.get('from', '')).strip()
+            if not from_btn:
+                continue
+            if exact:
+                matched = any(item['text'].strip() == from_btn for item in ocr_items)
+            else:
+                matched = any(self._text_match(from_btn, item['text']) for item in ocr_items)
+            if not matched:
+                return f"Stage 1 文本行未匹配按钮 \"{from_btn}\""
+        return None
+
     def _text_match(self, target: str, ocr_text: str) -> bool:
         """判断 OCR 识别文字是否匹配目标文字"""
         target = target.strip()
@@ -1031,7 +1155,7 @@ class TextOverlayRenderer(BaseRenderer):
             headers['Authorization'] = f'Bearer {self.api_key}'
 
         try:
-            resp = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=30)
+            resp = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=30)
             resp.raise_for_status()
             content = resp.json()['choices'][0]['message']['content']
             spec = json.loads(content) if content.strip().startswith('{') else None
@@ -1430,7 +1554,7 @@ class TextOverlayRenderer(BaseRenderer):
         }
 
         try:
-            resp = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=120)
+            resp = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=120)
             resp.raise_for_status()
             data = resp.json()
             return data['choices'][0]['message']['content']
@@ -1537,29 +1661,30 @@ class TextOverlayRenderer(BaseRenderer):
         self,
         card_ops: List[EditOp],
         screenshot_path: str,
-        include_button_changes: bool = False
+        include_button_changes: bool = False,
+        ocr_layer: Optional[dict] = None
     ) -> List[EditOp]:
         """
-        用 PaddleOCR 将卡片级 EditOps 拆解为文字级 EditOps。
+        用 OCR 文字行将卡片级 EditOps 拆解为文字级 EditOps。
 
         对每个标记 use_ai_edit=True 的 card-level op：
-        1. 裁切卡片区域
-        2. 运行 PaddleOCR (中文) 获取所有文字的精确 bbox
+        1. 取卡片区域内的 Stage 1 OCR 文本行（ui_json['ocr']）
+        2. 文本行缺失或匹配有歧义（未匹配/多处匹配/置信度低）时，
+           仅对卡片区域运行 PaddleOCR (中文) 获取文字的精确 bbox
         3. 将 text_changes['from'] 与 OCR 结果逐一匹配
         4. 匹配的 → 生成文字级 EditOp (PIL 模式, use_ai_edit=False)
         5. 未匹配的 → 保留原 card-level op (AI 模式, use_ai_edit=True)
 
+        Args:
+            ocr_layer: Stage 1 OCR 文本行层，None 时每个卡片都走裁切 OCR
+
         Returns:
             精化后的 EditOp 列表（可能混合 PIL 和 AI ops）
         """
-        ocr_engine = self._get_paddle_ocr()
-        if ocr_engine is None:
-            print("    ⚠ PaddleOCR 不可用，跳过 OCR 精定位，全部走 AI 模式")
-            return card_ops
-
         import numpy as np
 
         screenshot = Image.open(screenshot_path).convert('RGB')
+        screenshot_np = None
         refined_ops: List[EditOp] = []
 
         for op in card_ops:
@@ -1591,40 +1716,58 @@ class TextOverlayRenderer(BaseRenderer):
                 continue
 
             crop = screenshot.crop((cx1, cy1, cx2, cy2))
-            crop_np = np.array(crop)
-
-            # 运行 PaddleOCR
-            try:
-                ocr_result = ocr_engine.ocr(crop_np, cls=False)
-            except Exception as e:
-                print(f"    ⚠ PaddleOCR 运行失败: {e}，保留 AI 模式")
-                refined_ops.append(op)
-                continue
-
-            if not ocr_result or not ocr_result[0]:
-                print(f"    ⚠ OCR 未检测到文字，保留 AI 模式")
-                refined_ops.append(op)
-                continue
 
-            # 解析 OCR 结果为结构化列表
-            ocr_items = []
-            for item in ocr_result[0]:
-                points = item[0]  # [[x1,y1],[x2,y2],[x3,y3],[x4,y4]]
-                text = item[1][0]
-                conf = item[1][1]
-                # 四边形 → 轴对齐矩形 (x, y, w, h)
-                xs = [p[0] for p in points]
-                ys = [p[1] for p in points]
-                bx = int(min(xs))
-                by = int(min(ys))
-                bw = int(max(xs) - min(xs))
-                bh = int(max(ys) - min(ys))
-                ocr_items.append({
-                    'text': text, 'conf': conf,
-                    'bbox': {'x': bx, 'y': by, 'width': max(1, bw), 'height': max(1, bh)}
-                })
-
-            print(f"    [OCR] 检测到 {len(ocr_items)} 个文字区域")
+            # 优先复用 Stage 1 OCR 文本行，有歧义时才对卡片区域重新 OCR；
+            # 模型不一致时只接受精确匹配
+            ocr_items = self._ocr_items_from_layer(ocr_layer, (cx1, cy1, cx2, cy2))
+            ambiguity = self._layer_ambiguity(
+                ocr_items, text_changes, button_changes,
+                exact=not self._layer_matches_crop_ocr(ocr_layer)
+            )
+            if ambiguity is None:
+                print(f"    [OCR] 复用 Stage 1 文本行 {len(ocr_items)} 个")
+            else:
+                if ocr_layer:
+                    print(f"    ⓘ {ambiguity}，对卡片区域重新 OCR")
+                if self._get_paddle_ocr() is None:
+                    print("    ⚠ PaddleOCR 不可用，跳过 OCR 精定位，保留 AI 模式")
+                    refined_ops.append(op)
+                    continue
+                if screenshot_np is None:
+                    screenshot_np = np.array(screenshot)
+
+                # 运行 PaddleOCR（仅识别卡片区域，坐标相对裁切区域）
+                try:
+                    ocr_result = _get_ocr_service().paddle_ocr(
+                        screenshot_np, region=(cx1, cy1, cx2, cy2), **self._paddle_ocr_config
+                    )
+                except Exception as e:
+                    print(f"    ⚠ PaddleOCR 运行失败: {e}，保留 AI 模式")
+                    refined_ops.append(op)
+                    continue
+
+                if not ocr_result:
+                    print(f"    ⚠ OCR 未检测到文字，保留 AI 模式")
+                    refined_ops.append(op)
+                    continue
+
+                # 解析 OCR 结果为结构化列表
+                ocr_items = []
+                for points, text, conf in ocr_result:
+                    # points: [[x1,y1],[x2,y2],[x3,y3],[x4,y4]]
+                    # 四边形 → 轴对齐矩形 (x, y, w, h)
+                    xs = [p[0] for p in points]
+                    ys = [p[1] for p in points]
+                    bx = int(min(xs))
+                    by = int(min(ys))
+                    bw = int(max(xs) - min(xs))
+                    bh = int(max(ys) - min(ys))
+                    ocr_items.append({
+                        'text': text, 'conf': conf,
+                        'bbox': {'x': bx, 'y': by, 'width': max(1, bw), 'height': max(1, bh)}
+                    })
+
+                print(f"    [OCR] 检测到 {len(ocr_items)} 个文字区域")
             debug_dir = self._save_debug_component_artifacts(
                 screenshot=screenshot,
                 card_box_abs=(cx1, cy1, cx2, cy2),
@@ -2148,12 +2291,13 @@ class TextOverlayRenderer(BaseRenderer):
 
         bbox = (x, y, x + w, y + h)
         region = image.crop(bbox)
+        region_rgb = self._as_rgb_array(region)
 
         # 1. 采样背景色
-        bg_color = self._sample_background_color(region)
+        bg_color = self._sample_background_color(region_rgb)
 
         # 2. 采样文字颜色
-        font_color = self._sample_text_color(region, bg_color)
+        font_color = self._sample_text_color(region_rgb, bg_color)
 
         # 3. 匹配字号
         font_path = self._find_font()
@@ -2181,49 +2325,47 @@ class TextOverlayRenderer(BaseRenderer):
             font_path=font_path,
         )
 
-    def _sample_background_color(self, region: Image.Image) -> Tuple[int, int, int]:
+    @staticmethod
+    def _as_rgb_array(region: Union[Image.Image, np.ndarray]) -> np.ndarray:
+        """将区域转换为 (h, w, 3) uint8 数组（已是数组时直接返回）"""
+        if isinstance(region, np.ndarray):
+            return region
+        return np.asarray(region.convert('RGB'))
+
+    @staticmethod
+    def _upper_median(values: np.ndarray) -> np.ndarray:
+        """按列取上中位数（排序后第 n // 2 个），与逐像素排序取中结果一致"""
+        n = values.shape[0]
+        return np.partition(values, n // 2, axis=0)[n // 2]
+
+    def _sample_background_color(
+        self,
+        region: Union[Image.Image, np.ndarray]
+    ) -> Tuple[int, int, int]:
         """
         从区域边缘像素采样背景色
 
         取四条边缘各 2px 的像素，用中位数避免文字像素干扰。
         """
-        region_rgb = region.convert('RGB')
-        w, h = region_rgb.size
+        arr = self._as_rgb_array(region)
+        h, w = arr.shape[:2]
 
         if w < 3 or h < 3:
             # 区域太小，取中心像素
-            px = region_rgb.getpixel((w // 2, h // 2))
-            return px[:3]
-
-        pixels = []
-        # 上边缘 2 行
-        for x_pos in range(w):
-            for y_pos in range(min(2, h)):
-                pixels.append(region_rgb.getpixel((x_pos, y_pos)))
-        # 下边缘 2 行
-        for x_pos in range(w):
-            for y_pos in range(max(0, h - 2), h):
-                pixels.append(region_rgb.getpixel((x_pos, y_pos)))
-        # 左边缘 2 列
-        for y_pos in range(h):
-            for x_pos in range(min(2, w)):
-                pixels.append(region_rgb.getpixel((x_pos, y_pos)))
-        # 右边缘 2 列
-        for y_pos in range(h):
-            for x_pos in range(max(0, w - 2), w):
-                pixels.append(region_rgb.getpixel((x_pos, y_pos)))
-
-        if not pixels:
-            return (255, 255, 255)
-
-        r = sorted([p[0] for p in pixels])[len(pixels) // 2]
-        g = sorted([p[1] for p in pixels])[len(pixels) // 2]
-        b = sorted([p[2] for p in pixels])[len(pixels) // 2]
-        return (r, g, b)
+            return tuple(int(c) for c in arr[h // 2, w // 2, :3])
+
+        # 上下各 2 行、左右各 2 列（角点重复计入，与逐像素遍历一致）
+        pixels = np.concatenate([
+            arr[:2].reshape(-1, 3),
+            arr[h - 2:].reshape(-1, 3),
+            arr[:, :2].reshape(-1, 3),
+            arr[:, w - 2:].reshape(-1, 3),
+        ])
+        return tuple(int(c) for c in self._upper_median(pixels))
 
     def _sample_text_color(
         self,
-        region: Image.Image,
+        region: Union[Image.Image, np.ndarray],
         bg_color: Tuple[int, int, int]
     ) -> Tuple[int, int, int]:
         """
@@ -2231,29 +2373,18 @@ class TextOverlayRenderer(BaseRenderer):
 
         过滤掉背景色像素，剩余像素取中位数。
         """
-        region_rgb = region.convert('RGB')
-        w, h = region_rgb.size
-
-        # 收集所有像素
-        pixels = []
-        for py in range(h):
-            for px in range(w):
-                pixels.append(region_rgb.getpixel((px, py)))
+        pixels = self._as_rgb_array(region).reshape(-1, 3).astype(np.int32)
 
         # 只保留与背景色差异足够大的像素（即文字像素）
+        # 欧氏距离 > 40 等价于距离平方 > 1600（整数运算，无浮点误差）
         threshold = 40
-        text_pixels = [
-            p for p in pixels
-            if self._color_distance(p, bg_color) > threshold
-        ]
+        diff = pixels - np.asarray(bg_color[:3], dtype=np.int32)
+        text_pixels = pixels[(diff * diff).sum(axis=1) > threshold * threshold]
 
-        if not text_pixels or len(text_pixels) < 3:
+        if len(text_pixels) < 3:
             return (51, 51, 51)  # 默认深灰
 
-        r = sorted([p[0] for p in text_pixels])[len(text_pixels) // 2]
-        g = sorted([p[1] for p in text_pixels])[len(text_pixels) // 2]
-        b = sorted([p[2] for p in text_pixels])[len(text_pixels) // 2]
-        return (r, g, b)
+        return tuple(int(c) for c in self._upper_median(text_pixels))
 
     def _match_font_size(self, target_height: int, font_path: str = None) -> int:
         """
@@ -2306,8 +2437,8 @@ class TextOverlayRenderer(BaseRenderer):
 
         笔画宽度 ≤ 3px → regular, > 3px → bold
         """
-        gray = region.convert('L')
-        w, h = gray.size
+        gray = np.asarray(region.convert('L'))
+        h, w = gray.shape
 
         if w < 5 or h < 5:
             return 'regular'
@@ -2316,33 +2447,21 @@ class TextOverlayRenderer(BaseRenderer):
         bg_brightness = (bg_color[0] + bg_color[1] + bg_color[2]) // 3
         threshold = max(50, bg_brightness - 60)
 
-        stroke_widths = []
-        for y_pos in range(h):
-            in_stroke = False
-            width_count = 0
-            for x_pos in range(w):
-                pixel_val = gray.getpixel((x_pos, y_pos))
-                if pixel_val < threshold:
-                    width_count += 1
-                    in_stroke = True
-                elif in_stroke:
-                    if width_count >= 2:  # 忽略噪点
-                        stroke_widths.append(width_count)
-                    width_count = 0
-                    in_stroke = False
-
-        if not stroke_widths:
+        # 逐行游程：两侧补 False 后差分，+1 为笔画起点、-1 为终点
+        dark = np.pad(gray < threshold, ((0, 0), (1, 1)))
+        edges = np.diff(dark.astype(np.int8), axis=1)
+        starts = np.nonzero(edges == 1)[1]
+        ends = np.nonzero(edges == -1)[1]
+        widths = ends - starts
+        # 只统计被浅色像素截断的笔画（延伸到右边缘的不计），并忽略噪点
+        stroke_widths = widths[(ends < w) & (widths >= 2)]
+
+        if stroke_widths.size == 0:
             return 'regular'
 
-        stroke_widths.sort()
-        median_stroke = stroke_widths[len(stroke_widths) // 2]
+        median_stroke = int(self._upper_median(stroke_widths))
         return 'bold' if median_stroke > 3.5 else 'regular'
 
-    @staticmethod
-    def _color_distance(c1: Tuple[int, ...], c2: Tuple[int, ...]) -> float:
-        """欧几里得颜色距离"""
-        return sum((a - b) ** 2 for a, b in zip(c1[:3], c2[:3])) ** 0.5
-
 
         return (255, 77, 79)  # 默认红色
 
@@ -3537,7 +3656,7 @@ class TextOverlayRenderer(BaseRenderer):
                 'max_tokens': 2000
             }
 
-            response = requests.post(
+            response = get_http_client().post(
                 self.vlm_api_url,
                 headers=headers,
                 json=payload,
@@ -25,6 +25,11 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 from PIL import Image
 
+try:
+    import cv2
+except ImportError:  # 退回纯 NumPy 的连通域标记
+    cv2 = None
+
 from app.core.config import config
 
 # 添加 scripts 目录到路径（仅用于兼容旧脚本）
@@ -323,7 +328,7 @@ def detect_dialog_by_brightness(
     # 二值化：亮区域 = 弹窗候选
     binary = (gray > threshold).astype(np.uint8)
 
-    # 连通区域分析（简单的 flood-fill 实现，避免依赖 scipy）
+    # 连通区域分析（cv2 连通域标记，缺失时退回 NumPy 行程编码实现）
     regions = _find_connected_regions(binary, min_area=int(screen_area * min_area_ratio))
 
     if not regions:
@@ -435,74 +440,49 @@ def _expand_to_dialog_edge(
     top, bottom = y, y + h
     left, right = x, x + w
 
-    def _band_is_dialog(band_slice: np.ndarray) -> bool:
-        if band_slice.size == 0:
+    bright = gray > bright_px_threshold
+
+    def _band_is_dialog(prefix: np.ndarray, lo: int, hi: int, span: int) -> bool:
+        # prefix[i] = 前 i 行/列中的亮像素数，带 [lo, hi) 的亮像素占比 O(1) 得出
+        size = (hi - lo) * span
+        if size <= 0:
             return False
-        return np.mean(band_slice > bright_px_threshold) > bright_ratio_threshold
-
-    # 向上扩展
-    expanded_up = 0
-    dark_count = 0
-    while top - step >= 0 and expanded_up < max_expand_v:
-        row_band = gray[max(0, top - band):top, left:right]
-        if _band_is_dialog(row_band):
-            top -= step
-            expanded_up += step
-            dark_count = 0
-        else:
-            dark_count += 1
-            if dark_count > grace:
-                break
-            top -= step
-            expanded_up += step
-
-    # 向下扩展
-    expanded_down = 0
-    dark_count = 0
-    while bottom + step <= img_h and expanded_down < max_expand_v:
-        row_band = gray[bottom:min(img_h, bottom + band), left:right]
-        if _band_is_dialog(row_band):
-            bottom += step
-            expanded_down += step
-            dark_count = 0
-        else:
-            dark_count += 1
-            if dark_count > grace:
-                break
-            bottom += step
-            expanded_down += step
-
-    # 向左扩展
-    expanded_left = 0
-    dark_count = 0
-    while left - step >= 0 and expanded_left < max_expand_h:
-        col_band = gray[top:bottom, max(0, left - band):left]
-        if _band_is_dialog(col_band):
-            left -= step
-            expanded_left += step
-            dark_count = 0
-        else:
-            dark_count += 1
-            if dark_count > grace:
-                break
-            left -= step
-            expanded_left += step
-
-    # 向右扩展
-    expanded_right = 0
-    dark_count = 0
-    while right + step <= img_w and expanded_right < max_expand_h:
-        col_band = gray[top:bottom, right:min(img_w, right + band)]
-        if _band_is_dialog(col_band):
-            right += step
-            expanded_right += step
-            dark_count = 0
-        else:
-            dark_count += 1
-            if dark_count > grace:
-                break
-            right += step
-            expanded_right += step
+        return (prefix[hi] - prefix[lo]) / size > bright_ratio_threshold
+
+    def _expand(prefix: np.ndarray, edge: int, direction: int, limit: int, span: int, max_expand: int) -> int:
+        expanded = 0
+        dark_count = 0
+        while expanded < max_expand:
+            if direction < 0:
+                if edge - step < 0:
+                    break
+                lo, hi = max(0, edge - band), edge
+            else:
+                if edge + step > limit:
+                    break
+                lo, hi = edge, min(limit, edge + band)
+            if _band_is_dialog(prefix, lo, hi, span):
+                dark_count = 0
+            else:
+                dark_count += 1
+                if dark_count > grace:
+                    break
+            edge += direction * step
+            expanded += step
+        return edge
+
+    def _prefix(counts: np.ndarray) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+
+    # 上下扩展：按行统计 [left, right) 内的亮像素
+    row_prefix = _prefix(bright[:, left:right].sum(axis=1))
+    top = _expand(row_prefix, top, -1, img_h, right - left, max_expand_v)
+    bottom = _expand(row_prefix, bottom, 1, img_h, right - left, max_expand_v)
+
+    # 左右扩展：按列统计扩展后 [top, bottom) 内的亮像素
+    col_prefix = _prefix(bright[top:bottom, :].sum(axis=0))
+    left = _expand(col_prefix, left, -1, img_w, bottom - top, max_expand_h)
+    right = _expand(col_prefix, right, 1, img_w, bottom - top, max_expand_h)
 
     return {'x': max(0, left), 'y': max(0, top),
             'width': min(img_w, right) - max(0, left),
@@ -591,6 +571,138 @@ def _merge_nearby_regions(
     return result
 
 
+def _label_components_cv2(binary: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    OpenCV 连通域标记（4 连通）。
+
+    Returns:
+        (labels, stats)：labels 为逐像素标签图，stats 每行 (x, y, w, h, area)，第 0 行为背景
+    """
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(
+        binary.astype(np.uint8), connectivity=4, ltype=cv2.CV_32S
+    )
+    return labels, stats[:, :5]
+
+
+def _label_runs(binary: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    行程编码 + 并查集的连通域标记（4 连通，纯 NumPy，cv2 不可用时使用）。
+
+    每行的连续亮像素为一个行程；相邻两行中列范围重叠的行程属于同一连通域。
+
+    Returns:
+        (rows, starts, ends, roots)：每个行程的行号、起止列（右开）及所属连通域的根行程下标
+    """
+    h, w = binary.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = binary != 0
+    diff = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)
+    n = len(rows)
+    roots = np.arange(n)
+    if n == 0:
+        return rows, starts, ends, roots
+
+    # 行程按 (行, 列) 有序，用 行号*(w+1)+列 作为全局有序键
+    stride = w + 1
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+
+    # 对第 r+1 行的行程 b，第 r 行中与之重叠的行程 a（a.end > b.start 且 a.start < b.end）
+    # 在有序数组中是连续区间 [lo, hi)
+    below = np.nonzero(rows > 0)[0]
+    prev_base = (rows[below] - 1) * stride
+    lo = np.searchsorted(end_keys, prev_base + starts[below], side='right')
+    hi = np.searchsorted(start_keys, prev_base + ends[below], side='left')
+    counts = np.maximum(hi - lo, 0)
+
+    total = int(counts.sum())
+    if total:
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_b = np.repeat(below, counts)
+        pair_a = np.repeat(lo, counts) + offsets
+
+        # 最小标签传播 + 指针跳跃，直到所有相连行程收敛到同一根
+        while True:
+            joined = np.minimum(roots[pair_a], roots[pair_b])
+            updated = roots.copy()
+            np.minimum.at(updated, pair_a, joined)
+            np.minimum.at(updated, pair_b, joined)
+            updated = updated[updated]
+            while True:
+                jumped = updated[updated]
+                if np.array_equal(jumped, updated):
+                    break
+                updated = jumped
+            if np.array_equal(updated, roots):
+                break
+            roots = updated
+
+    return rows, starts, ends, roots
+
+
+def _connected_components(binary: np.ndarray, seed_step: int = 4) -> List[Tuple[int, int, int, int, int]]:
+    """
+    连通域标记，返回包含种子点的连通域的外接矩形与像素面积。
+
+    种子点为 (行, 列) 均为 seed_step 整数倍的亮像素；结果按首个种子点的
+    行扫描顺序排列，与原先按步长扫描 + flood-fill 的输出一致。
+    优先使用 cv2.connectedComponentsWithStats，不可用时退回行程编码实现。
+
+    Returns:
+        [(x, y, width, height, area), ...]
+    """
+    h, w = binary.shape
+    if binary.size == 0:
+        return []
+
+    if cv2 is not None:
+        labels, stats = _label_components_cv2(binary)
+        seeds = labels[::seed_step, ::seed_step].ravel()
+        found, first = np.unique(seeds, return_index=True)
+        keep = found != 0
+        found, first = found[keep], first[keep]
+        order = found[np.argsort(first, kind='stable')]
+        return [tuple(int(v) for v in stats[label]) for label in order]
+
+    rows, starts, ends, roots = _label_runs(binary)
+    if len(rows) == 0:
+        return []
+
+    # 行程内首个种子列：不小于 start 的最小 seed_step 倍数
+    seed_cols = -(-starts // seed_step) * seed_step
+    has_seed = (rows % seed_step == 0) & (seed_cols < ends)
+    if not has_seed.any():
+        return []
+
+    components, inverse = np.unique(roots, return_inverse=True)
+    k = len(components)
+    min_x = np.full(k, w, dtype=np.int64)
+    max_x = np.zeros(k, dtype=np.int64)
+    min_y = np.full(k, h, dtype=np.int64)
+    max_y = np.zeros(k, dtype=np.int64)
+    area = np.zeros(k, dtype=np.int64)
+    np.minimum.at(min_x, inverse, starts)
+    np.maximum.at(max_x, inverse, ends)
+    np.minimum.at(min_y, inverse, rows)
+    np.maximum.at(max_y, inverse, rows)
+    np.add.at(area, inverse, ends - starts)
+
+    no_seed = h * w
+    first_seed = np.full(k, no_seed, dtype=np.int64)
+    seed_index = np.where(has_seed, rows * w + seed_cols, no_seed)
+    np.minimum.at(first_seed, inverse, seed_index)
+
+    order = np.argsort(first_seed, kind='stable')
+    order = order[first_seed[order] < no_seed]
+    return [
+        (int(min_x[i]), int(min_y[i]), int(max_x[i] - min_x[i]),
+         int(max_y[i] - min_y[i] + 1), int(area[i]))
+        for i in order
+    ]
+
+
 def _find_connected_regions(
     binary: np.ndarray,
     min_area: int = 100
@@ -598,61 +710,25 @@ def _find_connected_regions(
     """
     在二值图中找到连通亮区域的外接矩形。
 
-    使用行扫描 + 合并的方式，避免逐像素 flood-fill 的性能问题。
+    基于连通域标记（cv2 或行程编码并查集），结果与原逐像素 flood-fill
+    实现一致（见 scripts/benchmark_gt_bounds.py 中的 _find_connected_regions_bfs）。
 
     Returns:
         [(x, y, width, height), ...]
     """
     h, w = binary.shape
-    visited = np.zeros_like(binary, dtype=bool)
-    regions = []
 
-    # 下采样加速（对大图）
+    # 下采样（对大图），保持与原实现相同的坐标精度
     scale = 1
     if h * w > 2_000_000:
         scale = 2
         binary = binary[::scale, ::scale]
-        visited = np.zeros_like(binary, dtype=bool)
-        h, w = binary.shape
         min_area = min_area // (scale * scale)
 
-    # 扫描线找连通区域
-    for y_start in range(0, h, 4):  # 步长4加速扫描
-        for x_start in range(0, w, 4):
-            if binary[y_start, x_start] == 0 or visited[y_start, x_start]:
-                continue
-
-            # BFS 找连通区域
-            min_x, min_y = x_start, y_start
-            max_x, max_y = x_start, y_start
-            pixel_count = 0
-            stack = [(x_start, y_start)]
-            visited[y_start, x_start] = True
-
-            while stack:
-                cx, cy = stack.pop()
-                pixel_count += 1
-                min_x = min(min_x, cx)
-                min_y = min(min_y, cy)
-                max_x = max(max_x, cx)
-                max_y = max(max_y, cy)
-
-                for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-                    nx, ny = cx + dx, cy + dy
-                    if 0 <= nx < w and 0 <= ny < h and not visited[ny, nx] and binary[ny, nx]:
-                        visited[ny, nx] = True
-                        stack.append((nx, ny))
-
-            region_w = max_x - min_x + 1
-            region_h = max_y - min_y + 1
-            if region_w * region_h >= min_area:
-                regions.append((
-                    min_x * scale,
-                    min_y * scale,
-                    region_w * scale,
-                    region_h * scale,
-                ))
-
+    regions = []
+    for x, y, region_w, region_h, _ in _connected_components(binary, seed_step=4):
+        if region_w * region_h >= min_area:
+            regions.append((x * scale, y * scale, region_w * scale, region_h * scale))
     return regions
 
 
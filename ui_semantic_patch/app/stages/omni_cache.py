@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+omni_cache.py - OmniParser Stage 1 结果的内容寻址磁盘缓存
+
+Stage 1（YOLO + OCR + Florence2）是流水线中最耗时的本地阶段，且对同一张图片、
+同一组参数的输出是确定的。batch_pipeline 会对同一批截图跑所有 GT 类别，
+injection_pipeline 会对每种异常模式重复生成，因此同一截图会被反复解析。
+
+缓存键：
+    图片内容 SHA-256 + box_threshold + iou_threshold + OCR 引擎 + use_local_semantics
+    + 图标描述模型 + 描述相关配置（OMNIPARSER_CPU_PRECISION、OMNIPARSER_CAPTION_*）
+
+存储：
+    每条记录一个 JSON 文件（<CACHE_DIR>/omni/<key[:2]>/<key>.json），
+    原子写入与 LRU 淘汰见 app/utils/disk_cache.py。
+
+环境变量：
+    OMNI_CACHE=0          禁用缓存
+    OMNI_CACHE_DIR        缓存目录（默认 config.CACHE_DIR / 'omni'）
+    OMNI_CACHE_MAX_MB     缓存大小上限，单位 MB（默认 512）
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import config
+from app.utils.disk_cache import DiskCache
+
+# 缓存格式版本，UI-JSON 结构变化时递增以使旧记录失效
+CACHE_VERSION = 2
+
+_DEFAULT_MAX_MB = 512
+
+
+def cache_enabled() -> bool:
+    """是否启用 Stage 1 缓存（OMNI_CACHE=0/false/off 时禁用）"""
+    return os.environ.get('OMNI_CACHE', '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+def caption_settings() -> Dict[str, str]:
+    """
+    影响图标描述结果的环境配置：CPU 推理精度与 OMNIPARSER_CAPTION_* 开关
+
+    OMNIPARSER_CAPTION_CACHE_SIZE 只决定进程内记忆化容量，不影响结果，不参与缓存键。
+    """
+    settings = {
+        'OMNIPARSER_CPU_PRECISION': os.environ.get('OMNIPARSER_CPU_PRECISION', 'fp32').strip().lower(),
+    }
+    for name, value in os.environ.items():
+        if name.startswith('OMNIPARSER_CAPTION_') and name != 'OMNIPARSER_CAPTION_CACHE_SIZE':
+            settings[name] = value
+    return settings
+
+
+def hash_image_file(image_path: str) -> str:
+    """计算图片文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OmniResultCache(DiskCache):
+    """
+    Stage 1 UI-JSON 结果缓存（进程安全：原子写入，多进程可共享同一目录）
+
+    Example:
+        cache = get_omni_cache()
+        key = cache.make_key(image_path, 0.05, 0.7, 'PaddleOCR', True)
+        ui_json = cache.get(key)
+        if ui_json is None:
+            ui_json = ...
+            cache.put(key, ui_json)
+    """
+
+    LABEL = 'Stage 1 缓存'
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        if cache_dir is None:
+            cache_dir = os.environ.get('OMNI_CACHE_DIR') or (config.CACHE_DIR / 'omni')
+        if max_bytes is None:
+            max_mb = float(os.environ.get('OMNI_CACHE_MAX_MB', _DEFAULT_MAX_MB))
+            max_bytes = int(max_mb * 1024 * 1024)
+        super().__init__(cache_dir, max_bytes)
+
+    @staticmethod
+    def make_key(
+        image_path: str,
+        box_threshold: float,
+        iou_threshold: float,
+        ocr_engine: str,
+        use_local_semantics: bool,
+        caption_model: Optional[str] = None,
+    ) -> str:
+        """根据图片内容、检测参数与图标描述模型配置生成缓存键"""
+        params = json.dumps({
+            'version': CACHE_VERSION,
+            'image': hash_image_file(image_path),
+            'box_threshold': round(float(box_threshold), 6),
+            'iou_threshold': round(float(iou_threshold), 6),
+            'ocr_engine': ocr_engine,
+            'use_local_semantics': bool(use_local_semantics),
+            'caption_model': caption_model,
+            'caption_settings': caption_settings() if use_local_semantics else None,
+        }, sort_keys=True)
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """读取缓存记录，未命中返回 None"""
+        return self._read(self._entry_path(key), _load_json)
+
+    def put(self, key: str, ui_json: dict) -> None:
+        """写入缓存记录（排除 annotated_image），并按大小上限淘汰"""
+        data = {k: v for k, v in ui_json.items() if k != 'annotated_image'}
+        self._write(self._entry_path(key), lambda f: json.dump(data, f, ensure_ascii=False))
+
+
+def _load_json(path: Path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_omni_cache: Optional[OmniResultCache] = None
+
+
+def get_omni_cache() -> OmniResultCache:
+    """获取进程级共享的 Stage 1 缓存实例"""
+    global _omni_cache
+    if _omni_cache is None:
+        _omni_cache = OmniResultCache()
+    return _omni_cache
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """获取 Stage 1 缓存统计（未使用过缓存时返回全 0）"""
+    if _omni_cache is None:
+        return {'hits': 0, 'misses': 0, 'evictions': 0}
+    return _omni_cache.stats()
@@ -15,15 +15,20 @@ import sys
 import json
 from pathlib import Path
 from datetime import datetime
+from multiprocessing import AuthenticationError
 from typing import Union, Optional, Dict, List
 from PIL import Image
 
 from app.core.config import config
+from app.stages.omni_cache import cache_enabled, get_omni_cache
 
 # 添加 OmniParser 路径 (third_party 目录)
 OMNIPARSER_PATH = config.OMNIPARSER_PATH
 sys.path.insert(0, str(OMNIPARSER_PATH))
 
+# 图标描述模型（相对 OMNIPARSER_PATH），同时参与 Stage 1 缓存键
+CAPTION_MODEL_DIR = 'weights/icon_caption_florence'
+
 # 延迟导入，避免模块加载时的开销
 _omni_parser = None
 
@@ -35,7 +40,7 @@ def get_omni_parser(device: str = None):
         from omni_inference import OmniParser
         _omni_parser = OmniParser(
             yolo_model_path=str(OMNIPARSER_PATH / 'weights/icon_detect/model.pt'),
-            caption_model_path=str(OMNIPARSER_PATH / 'weights/icon_caption_florence'),
+            caption_model_path=str(OMNIPARSER_PATH / CAPTION_MODEL_DIR),
             device=device
         )
     return _omni_parser
@@ -48,7 +53,8 @@ def omni_to_ui_json(
     use_paddleocr: Optional[bool] = None,
     device: str = None,
     return_annotated_image: bool = False,
-    offline_mode: bool = False  # 新增参数：离线模式（禁用 Florence-2）
+    offline_mode: bool = False,  # 新增参数：离线模式（禁用 Florence-2）
+    use_cache: Optional[bool] = None
 ) -> dict:
     """
     使用 OmniParser 从截图提取 UI 结构，输出 UI-JSON 格式
@@ -71,23 +77,71 @@ def omni_to_ui_json(
         device: 运行设备 ('cuda' / 'cpu')
         return_annotated_image: 是否返回可视化图片
         offline_mode: 是否启用离线模式（禁用需要 HuggingFace 的 Florence-2 模型）
+        use_cache: 是否使用 Stage 1 磁盘缓存，None 时由环境变量 OMNI_CACHE 决定
+            （见 app/stages/omni_cache.py）
 
     Returns:
-        UI-JSON 格式的字典，若 return_annotated_image=True 则包含 'annotated_image' 键
+        UI-JSON 格式的字典，若 return_annotated_image=True 则包含 'annotated_image' 键。
+        'ocr' 键为 OCR 文本行层（合并前的原始行，像素坐标 + 置信度），
+        并记录实际运行的引擎、语言与识别模型（engine/lang/rec_model），
+        供文字类渲染器在模型一致时直接定位文字，无需再次 OCR
+
+    Note:
+        设置环境变量 OMNI_WORKER_ADDRESS 时，请求会转发给常驻 OmniParser 服务
+        （见 app/stages/omni_worker.py），避免每个进程重复加载模型；
+        服务不可达时回退到本地加载。
     """
-    # 获取图片信息
-    with Image.open(image_path) as img:
-        width, height = img.size
-
     # 确定 OCR 引擎
     if use_paddleocr is None:
         # 使用环境变量配置
         default_engine = os.environ.get('OCR_ENGINE', 'auto').lower()
         use_paddleocr = (default_engine == 'paddle') or (default_engine == 'auto')
+    ocr_label = "PaddleOCR" if use_paddleocr else "EasyOCR"
 
     # 确定是否使用语义（离线模式禁用）
     use_local_semantics = not offline_mode
 
+    # 查询 Stage 1 缓存（需要可视化图片时不走缓存读取，但仍会写入）
+    if use_cache is None:
+        use_cache = cache_enabled()
+    cache_key = None
+    if use_cache:
+        cache = get_omni_cache()
+        cache_key = cache.make_key(
+            image_path, box_threshold, iou_threshold, ocr_label, use_local_semantics,
+            caption_model=f"florence2:{CAPTION_MODEL_DIR}"
+        )
+        if not return_annotated_image:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cached["metadata"]["source"] = Path(image_path).name
+                print(f"  ✓ Stage 1 缓存命中 ({cache_key[:12]})")
+                return cached
+
+    worker_address = os.environ.get('OMNI_WORKER_ADDRESS')
+    if worker_address:
+        from app.stages.omni_worker import OmniWorkerClient
+        try:
+            ui_json = OmniWorkerClient(worker_address).omni_to_ui_json(
+                image_path,
+                box_threshold=box_threshold,
+                iou_threshold=iou_threshold,
+                use_paddleocr=use_paddleocr,
+                device=device,
+                return_annotated_image=return_annotated_image,
+                offline_mode=offline_mode,
+                use_cache=False,
+            )
+            if cache_key:
+                _cache_result(cache_key, ui_json, ocr_label)
+            return ui_json
+        except (OSError, EOFError, TimeoutError, AuthenticationError) as e:
+            print(f"  ⚠ OmniParser 服务不可用 ({worker_address}): {e}，回退到本地加载")
+
+    # 获取图片信息
+    with Image.open(image_path) as img:
+        width, height = img.size
+
     # 获取 OmniParser 实例并解析
     parser = get_omni_parser(device)
     result = parser.parse(
@@ -139,6 +193,25 @@ def omni_to_ui_json(
     for i, comp in enumerate(components):
         comp['index'] = i
 
+    # OCR 文本行层（按位置排序）
+    ocr_lines = []
+    for line in result.ocr_lines:
+        x1, y1, x2, y2 = line['bbox']
+        ocr_lines.append({
+            "text": line['text'],
+            "bounds": {
+                "x": int(x1 * width),
+                "y": int(y1 * height),
+                "width": int((x2 - x1) * width),
+                "height": int((y2 - y1) * height)
+            },
+            "confidence": line['confidence']
+        })
+    ocr_lines.sort(key=lambda l: (l['bounds']['y'], l['bounds']['x']))
+
+    # OCR 引擎以实际运行的为准（PaddleOCR 失败时会回退到 EasyOCR）
+    ocr_engine = dict(result.ocr_engine) or {"engine": ocr_label}
+
     # 构建 UI-JSON
     ui_json = {
         "metadata": {
@@ -146,7 +219,7 @@ def omni_to_ui_json(
             "extractionMethod": "OmniParser",
             "models": {
                 "detection": "YOLO (icon_detect)",
-                "ocr": "PaddleOCR" if use_paddleocr else "EasyOCR",
+                "ocr": ocr_engine["engine"],
                 "caption": "Florence2"
             },
             "timestamp": datetime.now().isoformat(),
@@ -156,9 +229,16 @@ def omni_to_ui_json(
             }
         },
         "components": components,
-        "componentCount": len(components)
+        "componentCount": len(components),
+        "ocr": {
+            **ocr_engine,
+            "lines": ocr_lines
+        }
     }
 
+    if cache_key:
+        _cache_result(cache_key, ui_json, ocr_label)
+
     # 添加可视化图片
     if return_annotated_image and result.annotated_image:
         ui_json["annotated_image"] = result.annotated_image
@@ -166,6 +246,15 @@ def omni_to_ui_json(
     return ui_json
 
 
+def _cache_result(cache_key: str, ui_json: dict, ocr_label: str) -> None:
+    """写入 Stage 1 缓存；OCR 引擎发生回退时不写入（缓存键按请求的引擎计算）"""
+    engine = ui_json.get("ocr", {}).get("engine")
+    if engine != ocr_label:
+        print(f"  ⓘ OCR 引擎已回退为 {engine}，结果不写入 Stage 1 缓存")
+        return
+    get_omni_cache().put(cache_key, ui_json)
+
+
 def map_element_type(elem_type: str, content: str, interactivity: bool) -> str:
     """
     将 OmniParser 的元素类型映射为 UI-JSON 组件类型
@@ -255,6 +344,8 @@ def main():
                         help='运行设备 (cuda/cpu)')
     parser.add_argument('--no-paddleocr', action='store_true',
                         help='使用 EasyOCR 替代 PaddleOCR')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用 Stage 1 缓存')
     parser.add_argument('--pretty', action='store_true',
                         help='格式化输出 JSON')
 
@@ -270,7 +361,8 @@ def main():
         box_threshold=args.box_threshold,
         iou_threshold=args.iou_threshold,
         use_paddleocr=not args.no_paddleocr,
-        device=args.device
+        device=args.device,
+        use_cache=False if args.no_cache else None
     )
 
     # 输出
@@ -24,8 +24,11 @@ from typing import List, Dict
 from PIL import Image
 
 from app.core.config import config
-from app.utils.common import encode_image, get_mime_type, extract_json
+from app.utils.common import extract_json
+from app.utils.image_payload import ImagePayload, build_image_payload
+from app.utils.response_cache import cache_key_for, get_response_cache
 from app.generators.prompts import PROMPT_VLM_GROUPING
+from app.utils.http_client import get_http_client, backoff_delay
 
 # 添加 OmniParser 路径 (third_party 目录)
 OMNIPARSER_PATH = config.OMNIPARSER_PATH
@@ -77,12 +80,18 @@ GROUPING_PROMPT = """你是一个 UI 结构分析专家。
 """
 
 
-def format_components_as_text(omni_components: List[Dict]) -> str:
-    """将 OmniParser 组件列表格式化为文本，供 VLM 阅读"""
+def format_components_as_text(omni_components: List[Dict], image: ImagePayload = None) -> str:
+    """
+    将 OmniParser 组件列表格式化为文本，供 VLM 阅读
+
+    传入 image 时坐标换算到编码图（缩放后）的像素空间，与 VLM 看到的图片一致。
+    """
     lines = []
     for comp in omni_components:
         idx = comp.get('index', 0)
         b = comp.get('bounds', {})
+        if image is not None and b:
+            b = image.bounds_to_encoded({k: b.get(k, 0) for k in ('x', 'y', 'width', 'height')})
         text = comp.get('text', '')
         text_part = f' text="{text}"' if text else ''
         lines.append(f'#{idx} [x={b.get("x", 0)}, y={b.get("y", 0)}, '
@@ -116,19 +125,31 @@ def _call_vlm_with_retry(
     if api_key and api_key != 'not-needed':
         headers['Authorization'] = f'Bearer {api_key}'
 
+    # 响应缓存：仅在缓存内容可解析时使用
+    cache_key = cache_key_for(payload)
+    if cache_key:
+        cached = get_response_cache().get(cache_key)
+        if cached is not None:
+            try:
+                parsed = extract_json(cached)
+                print(f"  ✓ {task_name} 缓存命中")
+                return parsed
+            except ValueError:
+                pass
+
     base_wait = 5
     last_error = None
 
     for attempt in range(max_retries):
         try:
             if attempt > 0:
-                wait_time = min(base_wait * (2 ** (attempt - 1)), 60)
+                wait_time = backoff_delay(attempt, base_wait)
                 print(f"  ⏳ 等待 {wait_time}s 后重试 ({attempt + 1}/{max_retries})...")
                 time.sleep(wait_time)
             else:
                 print(f"  调用 {task_name}...")
 
-            response = requests.post(api_url, headers=headers, json=payload, timeout=180)
+            response = get_http_client().post(api_url, headers=headers, json=payload, timeout=180)
 
             if response.status_code == 429:
                 print(f"  ⚠ API 限流 (429)，准备重试...")
@@ -143,7 +164,10 @@ def _call_vlm_with_retry(
 
             result = response.json()
             content = result['choices'][0]['message']['content']
-            return extract_json(content)
+            parsed = extract_json(content)
+            if cache_key:
+                get_response_cache().put(cache_key, content, payload.get('model', ''))
+            return parsed
 
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
             print(f"  ⚠ 网络连接错误: {type(e).__name__}")
@@ -152,7 +176,7 @@ def _call_vlm_with_retry(
                 print(f"  ⚠ 已达最大重试次数，额外等待 30s 后最后尝试...")
                 time.sleep(30)
                 try:
-                    response = requests.post(api_url, headers=headers, json=payload, timeout=180)
+                    response = get_http_client().post(api_url, headers=headers, json=payload, timeout=180)
                     response.raise_for_status()
                     result = response.json()
                     content = result['choices'][0]['message']['content']
@@ -192,13 +216,11 @@ def call_vlm_for_grouping(
     Returns:
         {"groups": [{"name": str, "indices": [int], "class": str, "text": str}, ...]}
     """
-    image_base64 = encode_image(image_path)
-    mime_type = get_mime_type(image_path)
-
-    with Image.open(image_path) as img:
-        img_width, img_height = img.size
+    # 缩放后的图片与换算到同一像素空间的坐标文本；返回的是 index，无需反向换算
+    image = build_image_payload(image_path)
+    img_width, img_height = image.size
 
-    components_text = format_components_as_text(omni_components)
+    components_text = format_components_as_text(omni_components, image)
 
     user_prompt = PROMPT_VLM_GROUPING.format(
         img_width=img_width,
@@ -216,11 +238,12 @@ def call_vlm_for_grouping(
                     {'type': 'text', 'text': user_prompt},
                     {
                         'type': 'image_url',
-                        'image_url': {'url': f'data:{mime_type};base64,{image_base64}'}
+                        'image_url': {'url': image.data_url}
                     }
                 ]
             }
         ],
+        'temperature': 0.0,  # 确定性输出（同时使响应可缓存）
         'max_tokens': 4096
     }
 
@@ -484,7 +507,8 @@ def omni_vlm_fusion(
     box_threshold: float = 0.05,
     iou_threshold: float = 0.7,
     omni_components: List[Dict] = None,
-    output_dir: str = None
+    output_dir: str = None,
+    ocr_layer: Dict = None
 ) -> Dict:
     """
     OmniParser + VLM 融合提取（单次 VLM 语义分组）
@@ -502,6 +526,7 @@ def omni_vlm_fusion(
         iou_threshold: OmniParser IOU 阈值
         omni_components: 已有的 OmniParser 检测结果（可选，传入则跳过检测）
         output_dir: 输出目录（用于保存中间结果，可选）
+        ocr_layer: Stage 1 的 OCR 文本行层（omni_to_ui_json 结果的 'ocr'），原样透传到输出
 
     Returns:
         语义正确的 UI-JSON
@@ -531,6 +556,7 @@ def omni_vlm_fusion(
             device=omni_device
         )
         omni_components = omni_result['components']
+        ocr_layer = omni_result.get('ocr')
         print(f"  检测到 {len(omni_components)} 个组件")
     else:
         print(f"\n[Stage 1] 复用已有 OmniParser 检测结果 ({len(omni_components)} 个组件)")
@@ -627,6 +653,8 @@ def omni_vlm_fusion(
     }
     if _stage2_error:
         ui_json["_stage2_error"] = _stage2_error
+    if ocr_layer:
+        ui_json["ocr"] = ocr_layer
 
     return ui_json
 
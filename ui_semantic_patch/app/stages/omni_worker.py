@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+omni_worker.py - 常驻 OmniParser 推理服务
+
+批量脚本（batch_utg_injection / batch_injection / SequenceRewriter）对每张截图
+都会启动一个新的 run_pipeline.py 子进程，每次都要重新加载
+YOLO + Florence2 + PaddleOCR/EasyOCR。本模块提供一个常驻进程：
+模型只加载一次，通过本地 socket 为 omni_to_ui_json 提供服务。
+
+路由方式：
+    设置环境变量 OMNI_WORKER_ADDRESS 后，omni_to_ui_json 会把 Stage 1
+    请求转发给常驻服务；子进程会继承该环境变量，因此无需改动 run_pipeline.py
+    的调用方式。服务不可达时自动回退到本地加载。
+
+地址格式：
+    - Unix socket 路径，如 /tmp/omni_worker.sock（Linux/macOS，权限 0600）
+    - host:port，如 127.0.0.1:47321（Windows；只允许绑定回环地址）
+
+鉴权：
+    服务端会反序列化请求，因此必须用会话密钥鉴权。密钥通过环境变量
+    OMNI_WORKER_AUTHKEY（十六进制）传递；omni_worker_session / start_worker_process
+    每次启动服务时用 secrets 生成随机密钥并写入子进程环境，未设置密钥时服务拒绝启动。
+
+使用方式：
+    # 独立启动服务（客户端需设置同一个 OMNI_WORKER_AUTHKEY）
+    export OMNI_WORKER_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    python -m app.stages.omni_worker --address /tmp/omni_worker.sock --device cpu
+
+    # 在批量脚本中托管服务生命周期
+    from app.stages.omni_worker import omni_worker_session
+    with omni_worker_session(enabled=True, device='cpu'):
+        ...  # 期间启动的 run_pipeline.py 子进程都会复用该服务
+"""
+
+import ipaddress
+import os
+import secrets
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+# 路由环境变量
+WORKER_ADDRESS_ENV = 'OMNI_WORKER_ADDRESS'
+WORKER_AUTHKEY_ENV = 'OMNI_WORKER_AUTHKEY'
+
+_DEFAULT_TCP_HOST = '127.0.0.1'
+_DEFAULT_TCP_PORT = 47321
+
+# 连接建立后等待请求的最长时间，避免不发送数据的连接占住处理线程
+_REQUEST_TIMEOUT = 30.0
+
+Address = Union[str, Tuple[str, int]]
+
+
+def generate_authkey() -> str:
+    """生成随机会话密钥（十六进制字符串，可写入环境变量）"""
+    return secrets.token_bytes(32).hex()
+
+
+def _authkey() -> bytes:
+    """从 OMNI_WORKER_AUTHKEY 读取会话密钥，未设置时报错"""
+    key = os.environ.get(WORKER_AUTHKEY_ENV)
+    if not key:
+        raise AuthenticationError(f"未设置 {WORKER_AUTHKEY_ENV}，无法与 OmniParser 服务鉴权")
+    try:
+        return bytes.fromhex(key)
+    except ValueError:
+        raise AuthenticationError(f"{WORKER_AUTHKEY_ENV} 不是合法的十六进制密钥") from None
+
+
+def _is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(address: str) -> Address:
+    """将字符串地址解析为 multiprocessing.connection 可用的地址"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address and '\\' not in host:
+        return (host or _DEFAULT_TCP_HOST, int(port))
+    return address
+
+
+def format_address(address: Address) -> str:
+    """将地址转换为可写入环境变量的字符串"""
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return str(address)
+
+
+def default_address() -> str:
+    """默认地址：POSIX 使用临时目录下的 Unix socket，Windows 使用本地 TCP"""
+    if sys.platform == 'win32':
+        return f"{_DEFAULT_TCP_HOST}:{_DEFAULT_TCP_PORT}"
+    return str(Path(tempfile.gettempdir()) / f"omni_worker_{os.getpid()}.sock")
+
+
+class OmniWorkerClient:
+    """常驻 OmniParser 服务的客户端（每次请求使用独立连接，线程安全）"""
+
+    def __init__(self, address: Optional[str] = None, timeout: float = 600.0):
+        address = address or os.environ.get(WORKER_ADDRESS_ENV)
+        if not address:
+            raise ValueError(f"未指定 OmniParser 服务地址（参数或 {WORKER_ADDRESS_ENV}）")
+        self.address = parse_address(address)
+        self.timeout = timeout
+
+    def _request(self, payload: dict) -> dict:
+        conn = Client(self.address, authkey=_authkey())
+        try:
+            conn.send(payload)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"OmniParser 服务响应超时 ({self.timeout:.0f}s)")
+            response = conn.recv()
+        finally:
+            conn.close()
+        if not response.get('ok'):
+            raise RuntimeError(f"OmniParser 服务错误: {response.get('error')}")
+        return response
+
+    def ping(self) -> bool:
+        """检查服务是否可用"""
+        try:
+            return bool(self._request({'op': 'ping'}).get('ok'))
+        except (OSError, EOFError, TimeoutError, RuntimeError, AuthenticationError):
+            return False
+
+    def omni_to_ui_json(self, image_path: str, **kwargs) -> dict:
+        """远程执行 omni_to_ui_json，参数与本地版本一致"""
+        payload = {
+            'op': 'omni_to_ui_json',
+            'image_path': str(Path(image_path).resolve()),
+            'kwargs': kwargs,
+        }
+        return self._request(payload)['result']
+
+    def shutdown(self) -> None:
+        """请求服务退出"""
+        try:
+            self._request({'op': 'shutdown'})
+        except (OSError, EOFError, RuntimeError, AuthenticationError):
+            pass
+
+
+def serve(address: Optional[str] = None, device: Optional[str] = None) -> None:
+    """
+    启动常驻服务（阻塞）
+
+    模型在启动时加载一次；每个连接在独立线程中接收与处理请求，
+    推理串行执行（模型实例非线程安全），ping/shutdown 不会被长推理阻塞。
+
+    必须设置 OMNI_WORKER_AUTHKEY；TCP 地址只允许回环地址，Unix socket 权限为 0600。
+    """
+    # 服务进程内部必须走本地推理，避免请求转发给自己
+    os.environ.pop(WORKER_ADDRESS_ENV, None)
+
+    authkey = _authkey()
+    address = address or default_address()
+    listen_address = parse_address(address)
+    if isinstance(listen_address, tuple) and not _is_loopback(listen_address[0]):
+        raise ValueError(f"OmniParser 服务只允许监听回环地址: {format_address(listen_address)}")
+    if isinstance(listen_address, str) and os.path.exists(listen_address):
+        os.unlink(listen_address)
+
+    from app.stages.omni_extractor import get_omni_parser, omni_to_ui_json
+
+    print(f"[OmniWorker] 加载模型 (device={device or 'auto'})...")
+    load_start = time.time()
+    get_omni_parser(device)
+    print(f"[OmniWorker] 模型加载完成 ({time.time() - load_start:.1f}s)")
+
+    if isinstance(listen_address, str):
+        # 创建时即为 0600，避免 bind 与 chmod 之间的窗口
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(listen_address, authkey=authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(listen_address, 0o600)
+    else:
+        listener = Listener(listen_address, authkey=authkey)
+    infer_lock = threading.Lock()
+    stop_event = threading.Event()
+    stats = {'requests': 0, 'errors': 0}
+
+    def _infer(request: dict) -> dict:
+        kwargs = dict(request.get('kwargs') or {})
+        if kwargs.get('device') is None:
+            kwargs['device'] = device
+        try:
+            with infer_lock:
+                result = omni_to_ui_json(request['image_path'], **kwargs)
+            stats['requests'] += 1
+            return {'ok': True, 'result': result}
+        except Exception as e:
+            stats['errors'] += 1
+            traceback.print_exc()
+            return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+    def _wake_listener() -> None:
+        # accept() 阻塞时无法被其他线程打断，自连接一次让主循环检查 stop_event
+        try:
+            Client(listen_address, authkey=authkey).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+
+    def _handle(conn) -> None:
+        try:
+            if not conn.poll(_REQUEST_TIMEOUT):
+                return
+            request = conn.recv()
+            op = request.get('op') if isinstance(request, dict) else None
+            if op == 'omni_to_ui_json':
+                response = _infer(request)
+            elif op == 'ping':
+                response = {'ok': True, 'stats': dict(stats)}
+            elif op == 'shutdown':
+                stop_event.set()
+                response = {'ok': True}
+            else:
+                response = {'ok': False, 'error': f"未知操作: {op}"}
+            conn.send(response)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            if stop_event.is_set():
+                _wake_listener()
+
+    print(f"[OmniWorker] 服务已启动: {format_address(listen_address)}")
+    try:
+        while not stop_event.is_set():
+            try:
+                conn = listener.accept()
+            except AuthenticationError as e:
+                print(f"[OmniWorker] ⚠ 拒绝未通过鉴权的连接: {e}")
+                continue
+            except (OSError, EOFError):
+                continue
+            if stop_event.is_set():
+                conn.close()
+                break
+            threading.Thread(target=_handle, args=(conn,), daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        if isinstance(listen_address, str) and os.path.exists(listen_address):
+            os.unlink(listen_address)
+        print(f"[OmniWorker] 服务已退出 (完成 {stats['requests']} 次推理, {stats['errors']} 次失败)")
+
+
+def start_worker_process(
+    address: Optional[str] = None,
+    device: Optional[str] = None,
+    startup_timeout: float = 600.0,
+) -> Tuple[subprocess.Popen, str, str]:
+    """
+    在独立进程中启动常驻服务，并等待其就绪
+
+    每次启动生成新的随机会话密钥，通过 OMNI_WORKER_AUTHKEY 传给服务进程。
+
+    Returns:
+        (进程对象, 地址字符串, 会话密钥)
+    """
+    address = address or default_address()
+    authkey = generate_authkey()
+    ui_semantic_dir = Path(__file__).resolve().parents[2]
+    cmd = [sys.executable, '-m', 'app.stages.omni_worker', '--address', address]
+    if device:
+        cmd.extend(['--device', device])
+
+    env = os.environ.copy()
+    env.pop(WORKER_ADDRESS_ENV, None)
+    env[WORKER_AUTHKEY_ENV] = authkey
+    env['PYTHONIOENCODING'] = 'utf-8'
+    process = subprocess.Popen(cmd, cwd=str(ui_semantic_dir), env=env)
+
+    client = OmniWorkerClient(address)
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"OmniParser 服务启动失败 (exit code {process.returncode})")
+        if _ping_with_key(client, authkey):
+            return process, address, authkey
+        time.sleep(1.0)
+
+    process.kill()
+    raise TimeoutError(f"OmniParser 服务启动超时 ({startup_timeout:.0f}s)")
+
+
+def _ping_with_key(client: OmniWorkerClient, authkey: str) -> bool:
+    """用指定密钥 ping（不修改当前进程环境）"""
+    previous = os.environ.get(WORKER_AUTHKEY_ENV)
+    os.environ[WORKER_AUTHKEY_ENV] = authkey
+    try:
+        return client.ping()
+    finally:
+        if previous is None:
+            os.environ.pop(WORKER_AUTHKEY_ENV, None)
+        else:
+            os.environ[WORKER_AUTHKEY_ENV] = previous
+
+
+def stop_worker_process(process: subprocess.Popen, address: str, timeout: float = 30.0) -> None:
+    """关闭由 start_worker_process 启动的服务（需已设置对应的 OMNI_WORKER_AUTHKEY）"""
+    OmniWorkerClient(address).shutdown()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+@contextmanager
+def omni_worker_session(
+    enabled: bool = True,
+    address: Optional[str] = None,
+    device: Optional[str] = None,
+):
+    """
+    在上下文期间把 Stage 1 路由到常驻服务
+
+    - enabled=False：不做任何事
+    - 指定 address 且服务已在运行（当前环境的 OMNI_WORKER_AUTHKEY 能通过鉴权）：直接复用
+    - 否则用新生成的会话密钥启动新服务，退出上下文时关闭
+
+    期间会设置 OMNI_WORKER_ADDRESS 与 OMNI_WORKER_AUTHKEY，子进程（run_pipeline.py 等）自动继承。
+    """
+    if not enabled:
+        yield None
+        return
+
+    previous = {name: os.environ.get(name) for name in (WORKER_ADDRESS_ENV, WORKER_AUTHKEY_ENV)}
+    process = None
+    if address and os.environ.get(WORKER_AUTHKEY_ENV) and OmniWorkerClient(address).ping():
+        print(f"  ✓ 复用已运行的 OmniParser 服务: {address}")
+    else:
+        print("  启动常驻 OmniParser 服务...")
+        process, address, authkey = start_worker_process(address, device)
+        os.environ[WORKER_AUTHKEY_ENV] = authkey
+        print(f"  ✓ OmniParser 服务就绪: {address}")
+
+    os.environ[WORKER_ADDRESS_ENV] = address
+    try:
+        yield address
+    finally:
+        if process is not None:
+            stop_worker_process(process, address)
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常驻 OmniParser 推理服务')
+    parser.add_argument('--address', default=None,
+                        help='监听地址：Unix socket 路径或回环 host:port（默认自动选择）')
+    parser.add_argument('--device', default=None,
+                        help='运行设备 (cuda/cpu)')
+    args = parser.parse_args()
+
+    serve(address=args.address, device=args.device)
+
+
+if __name__ == '__main__':
+    _ui_semantic_dir = Path(__file__).resolve().parents[2]
+    if str(_ui_semantic_dir) not in sys.path:
+        sys.path.insert(0, str(_ui_semantic_dir))
+    main()
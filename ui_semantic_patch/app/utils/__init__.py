@@ -4,9 +4,14 @@ utils - UI Semantic Patch 工具模块
 包含：
 - common: 公共工具函数
 - gt_manager: Ground Truth 模板管理
+- gt_library: 进程级 GT 模板库索引（按目录 mtime 失效）
 - semantic_dialog_generator: 语义弹窗生成器
 - component_position_resolver: UI组件精确定位解析器
 - anomaly_sample_manager: 异常样本管理与聚类
+- response_cache: VLM/LLM 响应持久化缓存
+- http_client: 共享 HTTP 客户端（连接池、限速、延迟统计）
+- disk_cache: 磁盘缓存基类（原子写入、LRU 淘汰、命中统计）
+- asset_cache: AI 生成素材（加载图标、弹窗）磁盘缓存
 """
 
 from .gt_manager import GTManager
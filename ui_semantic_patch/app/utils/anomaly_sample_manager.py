@@ -11,11 +11,11 @@ anomaly_sample_manager.py - 异常样本管理与聚类工具
 import json
 import os
 import base64
-import requests
 import re
 from pathlib import Path
 from typing import Dict, List, Optional
 from app.generators.prompts import PROMPT_ANOMALY_SAMPLE_ANALYSIS
+from app.utils.http_client import get_http_client
 
 # 从环境变量读取API配置
 VLM_API_KEY = os.environ.get('VLM_API_KEY')
@@ -188,7 +188,7 @@ class AnomalySampleManager:
                 'max_tokens': 600
             }
 
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
 
             content = response.json()['choices'][0]['message']['content']
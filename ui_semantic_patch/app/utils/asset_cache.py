@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+asset_cache.py - AI 生成素材（加载图标、弹窗）的磁盘缓存
+
+图像生成是流水线中最慢、最贵的远程调用，而批量任务往往只涉及少数几种风格：
+同一 GT 样本、同一 APP 风格的弹窗/加载图标会被重复生成数百次。
+本模块按风格签名缓存生成结果（RGBA PNG），命中时按目标尺寸缩放后复用。
+
+缓存键（SHA-256）：
+    素材类型 + anomaly_type + 规范化后的 app_style + 参考图内容摘要
+    + 目标尺寸分桶 + 图像生成模型 + 其他影响 prompt 的输入（extra）
+
+尺寸按 ASSET_SIZE_BUCKET 像素分桶：相近尺寸共享同一素材，复用时 LANCZOS 缩放到精确尺寸。
+VLM 风格分析结果（JSON）也存放在同一目录，供 AreaLoadingRenderer 跨进程复用。
+
+存储：
+    <ASSET_CACHE_DIR>/<key[:2]>/<key>.png | <key>.json，
+    原子写入与 LRU 淘汰见 disk_cache.py。
+
+环境变量：
+    ASSET_CACHE=0          禁用缓存
+    ASSET_CACHE_DIR        缓存目录（默认 config.CACHE_DIR / 'assets'）
+    ASSET_CACHE_MAX_MB     缓存大小上限，单位 MB（默认 1024）
+    ASSET_SIZE_BUCKET      尺寸分桶步长，像素（默认 32，1 表示精确匹配）
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from PIL import Image
+
+from app.core.config import config
+from app.utils.disk_cache import DiskCache
+
+# 缓存格式版本，生成 prompt 或后处理逻辑变化时递增以使旧素材失效
+CACHE_VERSION = 1
+
+_DEFAULT_MAX_MB = 1024
+_DEFAULT_SIZE_BUCKET = 32
+
+_HEX_COLOR = re.compile(r'^#?[0-9a-fA-F]{3,8}$')
+
+
+def cache_enabled() -> bool:
+    """是否启用素材缓存（ASSET_CACHE=0/false/off 时禁用）"""
+    return os.environ.get('ASSET_CACHE', '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+def normalize_app_style(app_style: Any) -> Any:
+    """
+    规范化风格描述，使语义相同的风格得到相同的键
+
+    - dict：丢弃空值，键排序（由 json.dumps 完成），字符串去首尾空白，颜色值统一大写
+    - str：去首尾空白
+    - list：逐项规范化
+    """
+    if isinstance(app_style, dict):
+        return {
+            str(k): normalize_app_style(v)
+            for k, v in app_style.items()
+            if v not in (None, '', [], {})
+        }
+    if isinstance(app_style, (list, tuple)):
+        return [normalize_app_style(v) for v in app_style]
+    if isinstance(app_style, str):
+        value = app_style.strip()
+        return value.upper() if _HEX_COLOR.match(value) else value
+    if isinstance(app_style, float):
+        return round(app_style, 4)
+    return app_style
+
+
+def bucket_size(value: int, step: Optional[int] = None) -> int:
+    """将尺寸取整到分桶步长（至少为一个步长）"""
+    if step is None:
+        step = int(os.environ.get('ASSET_SIZE_BUCKET', _DEFAULT_SIZE_BUCKET))
+    if step <= 1:
+        return int(value)
+    return max(step, int(round(value / step)) * step)
+
+
+_digest_memo: Dict[Tuple[str, int, int], str] = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: Optional[str]) -> Optional[str]:
+    """文件内容 SHA-256（按 路径+mtime+大小 记忆化；文件不存在返回 None）"""
+    if not path:
+        return None
+    try:
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    memo_key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        cached = _digest_memo.get(memo_key)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(resolved, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _digest_lock:
+        _digest_memo[memo_key] = value
+    return value
+
+
+class AssetCache(DiskCache):
+    """
+    生成素材缓存（进程安全：原子写入，多进程可共享同一目录）
+
+    Example:
+        cache = get_asset_cache()
+        key = cache.make_key('loading_icon', anomaly_type='timeout', app_style=style,
+                             reference=ref_path, size=icon_size, model=model)
+        icon = cache.get_image(key, size=(icon_size, icon_size))
+        if icon is None:
+            icon = ...  # 调用图像生成
+            cache.put_image(key, icon)
+    """
+
+    SUFFIXES = ('.png', '.json')
+    LABEL = '素材缓存'
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        if cache_dir is None:
+            cache_dir = os.environ.get('ASSET_CACHE_DIR') or (config.CACHE_DIR / 'assets')
+        if max_bytes is None:
+            max_mb = float(os.environ.get('ASSET_CACHE_MAX_MB', _DEFAULT_MAX_MB))
+            max_bytes = int(max_mb * 1024 * 1024)
+        super().__init__(cache_dir, max_bytes)
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        anomaly_type: Optional[str] = None,
+        app_style: Any = None,
+        reference: Optional[str] = None,
+        size: Union[int, Tuple[int, int], None] = None,
+        model: Optional[str] = None,
+        extra: Any = None,
+    ) -> str:
+        """
+        根据风格签名生成缓存键
+
+        Args:
+            kind: 素材类型（loading_icon / dialog / app_style 等）
+            anomaly_type: 异常类型
+            app_style: 风格描述（dict 或 str），会先规范化
+            reference: 参考图路径，按文件内容摘要参与计算
+            size: 目标尺寸（int 或 (width, height)），按 ASSET_SIZE_BUCKET 分桶
+            model: 生成/分析所用模型标识
+            extra: 其他影响生成结果的输入（文案等），需可 JSON 序列化
+        """
+        if isinstance(size, (tuple, list)):
+            size = [bucket_size(v) for v in size]
+        elif size is not None:
+            size = bucket_size(size)
+        params = json.dumps({
+            'version': CACHE_VERSION,
+            'kind': kind,
+            'anomaly_type': anomaly_type,
+            'app_style': normalize_app_style(app_style),
+            'reference': file_digest(reference),
+            'size': size,
+            'model': model,
+            'extra': normalize_app_style(extra),
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+    def get_image(self, key: str, size: Optional[Tuple[int, int]] = None) -> Optional[Image.Image]:
+        """
+        读取缓存素材（RGBA），未命中返回 None
+
+        Args:
+            size: 目标尺寸 (width, height)；与缓存素材尺寸不同时缩放
+        """
+        image = self._read(self._entry_path(key, '.png'), _load_rgba)
+        if image is not None and size and image.size != tuple(size):
+            image = image.resize(tuple(size), Image.Resampling.LANCZOS)
+        return image
+
+    def put_image(self, key: str, image: Image.Image) -> None:
+        """写入素材（PNG 保留透明通道），并按大小上限淘汰"""
+        self._write(
+            self._entry_path(key, '.png'),
+            lambda f: image.convert('RGBA').save(f, format='PNG'),
+            binary=True,
+        )
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """读取缓存的分析结果，未命中返回 None"""
+        return self._read(self._entry_path(key, '.json'), _load_json)
+
+    def put_json(self, key: str, data: Any) -> None:
+        """写入分析结果"""
+        self._write(self._entry_path(key, '.json'), lambda f: json.dump(data, f, ensure_ascii=False))
+
+
+def _load_rgba(path: Path) -> Image.Image:
+    with Image.open(path) as img:
+        return img.convert('RGBA')
+
+
+def _load_json(path: Path) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_asset_cache: Optional[AssetCache] = None
+
+
+def get_asset_cache() -> AssetCache:
+    """获取进程级共享的素材缓存实例"""
+    global _asset_cache
+    if _asset_cache is None:
+        _asset_cache = AssetCache()
+    return _asset_cache
@@ -86,3 +86,14 @@ def extract_json(content: str) -> dict:
     else:
         # 其他类型，包装成空 groups
         return {"groups": []}
+
+
+def is_json_reply(content: str) -> bool:
+    """VLM 输出中是否含可解析的 JSON（用于决定响应是否写入缓存）"""
+    if not content:
+        return False
+    try:
+        extract_json(content)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+disk_cache.py - 按键寻址的磁盘缓存基类（原子写入 + LRU 淘汰 + 命中统计）
+
+Stage 1 结果缓存（app/stages/omni_cache.py）与生成素材缓存（asset_cache.py）
+共用本模块的存储逻辑，子类只负责缓存键与记录的序列化格式。
+
+存储：
+    每条记录一个文件（<cache_dir>/<key[:2]>/<key><suffix>），先写临时文件再重命名，
+    多进程可共享同一目录；命中时刷新 mtime 作为 LRU 访问时间。
+
+淘汰：
+    写入时累计总大小（首次写入时扫描一次目录初始化），超过上限时才扫描目录，
+    按 mtime 从旧到新删除记录，降到上限的 90% 以下。
+"""
+
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# 淘汰后保留的比例（相对大小上限）
+_EVICT_TARGET = 0.9
+
+
+class DiskCache:
+    """
+    磁盘缓存基类
+
+    子类设置 SUFFIXES（记录文件后缀）与 LABEL（写入失败提示中的缓存名称），
+    通过 _read / _write 读写记录。
+    """
+
+    SUFFIXES: Tuple[str, ...] = ('.json',)
+    LABEL = '缓存'
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 缓存目录总大小（进程内累计，None 表示尚未扫描）
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key: str, suffix: Optional[str] = None) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix or self.SUFFIXES[0]}"
+
+    def _entries(self) -> Iterator[Path]:
+        for suffix in self.SUFFIXES:
+            yield from self.cache_dir.glob(f'*/*{suffix}')
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _read(self, path: Path, loader: Callable[[Path], Any]) -> Optional[Any]:
+        """用 loader 读取记录并刷新 mtime，读取失败（含不存在）记为未命中并返回 None"""
+        try:
+            data = loader(path)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            self._record(False)
+            return None
+        self._record(True)
+        return data
+
+    def _write(self, path: Path, dump: Callable[[Any], None], binary: bool = False) -> bool:
+        """
+        原子写入记录（dump 接收已打开的临时文件），并按大小上限淘汰
+
+        写入或序列化失败（磁盘已满、记录不可序列化等）只记为缓存写入失败并返回 False，
+        不影响调用方；失败时删除临时文件，避免在缓存目录中残留无法淘汰的 *.tmp。
+        """
+        old_size = self._size_of(path)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+            if binary:
+                f = os.fdopen(fd, 'wb')
+            else:
+                f = os.fdopen(fd, 'w', encoding='utf-8')
+            with f:
+                dump(f)
+            os.replace(tmp_path, path)
+        except BaseException as e:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            if not isinstance(e, Exception):
+                # KeyboardInterrupt / SystemExit 清理后照常抛出
+                raise
+            print(f"  ⚠ {self.LABEL}写入失败: {type(e).__name__}: {e}")
+            return False
+        self._account(self._size_of(path) - old_size)
+        return True
+
+    @staticmethod
+    def _size_of(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def _account(self, delta: int) -> None:
+        """
+        累计写入大小，超过上限时才扫描目录淘汰
+
+        累计值在首次写入时由一次目录扫描初始化，之后只加减本进程的写入量；
+        其他进程的写入在下次淘汰扫描时校准。
+        """
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += delta
+                if self._total_bytes <= self.max_bytes:
+                    return
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        扫描目录校准总大小，超过上限时按 mtime 从旧到新删除记录，
+        降到上限的 _EVICT_TARGET 以下，避免缓存写满后每次写入都触发扫描
+        """
+        entries = []
+        total = 0
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            target = self.max_bytes * _EVICT_TARGET
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+        with self._lock:
+            self._total_bytes = total
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的记录数"""
+        removed = 0
+        for path in list(self._entries()):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._total_bytes = None
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """当前进程内的命中统计"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
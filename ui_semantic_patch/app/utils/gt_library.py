@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+gt_library.py - 进程级 GT 模板库索引
+
+MetaLoader 构造时会遍历 GT 模板目录并解析每个 meta.json，而 PatchRenderer、
+run_pipeline 的 content_duplicate 分支、AnomalyRecommender 每次都新建 MetaLoader；
+GTManager 初始化时也会重新扫描模板目录并解析 sidecar JSON。
+GT 库较大时，每次渲染都在重复遍历目录和解析 JSON。
+
+本模块按 GT 根目录维护一份进程级索引：
+- 扫描结果（类别 → meta）与派生结果（视觉特征、风格 prompt 等）在进程内共享
+- 以扫描时记录的 目录/文件 mtime 作为签名；访问时逐一 stat 比对，
+  新增/删除类别、修改 meta.json 后自动重建并清空派生结果
+
+使用方式：
+    library = get_gt_library(gt_dir)
+    categories = library.categories()
+    features = library.memoize('visual_features', (category, sample), compute)
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# 签名：[(路径, mtime_ns), ...]，路径不存在时 mtime 记为 None
+Signature = List[Tuple[str, Optional[int]]]
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _signature_changed(signature: Signature) -> bool:
+    return any(_mtime_ns(Path(p)) != mtime for p, mtime in signature)
+
+
+def scan_meta_categories(gt_dir: Path) -> Tuple[Dict[str, Dict], Signature]:
+    """
+    扫描 GT 模板根目录下所有类别及其 meta.json
+
+    Returns:
+        (categories, signature)
+        categories: {类别名: {'path': 类别目录, 'meta': meta.json 内容}}
+        signature: 根目录、各类别目录、各 meta.json 的 mtime
+    """
+    categories = {}
+    signature: Signature = [(str(gt_dir), _mtime_ns(gt_dir))]
+
+    if not gt_dir.exists():
+        print(f"  ⚠ GT模板目录不存在: {gt_dir}")
+        return categories, signature
+
+    for category_dir in sorted(gt_dir.iterdir()):
+        if not category_dir.is_dir():
+            continue
+        # 类别目录 mtime 覆盖 meta.json 的新增/删除/替换
+        signature.append((str(category_dir), _mtime_ns(category_dir)))
+
+        meta_path = category_dir / 'meta.json'
+        if meta_path.exists():
+            signature.append((str(meta_path), _mtime_ns(meta_path)))
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                categories[category_dir.name] = {
+                    'path': str(category_dir),
+                    'meta': meta
+                }
+            except Exception as e:
+                print(f"  ⚠ 读取meta.json失败: {meta_path} - {e}")
+
+    return categories, signature
+
+
+class GTLibrary:
+    """
+    单个 GT 模板根目录的索引（线程安全）
+
+    categories() 返回的 meta 在进程内共享，调用方不应修改。
+    """
+
+    def __init__(self, gt_dir: Path):
+        self.gt_dir = gt_dir
+        self.scans = 0
+        self._categories: Optional[Dict[str, Dict]] = None
+        self._signature: Signature = []
+        self._memo: Dict[Tuple[str, Hashable], Any] = {}
+        self._lock = threading.RLock()
+
+    def _ensure_fresh(self) -> None:
+        if self._categories is not None and not _signature_changed(self._signature):
+            return
+        self._categories, self._signature = scan_meta_categories(self.gt_dir)
+        self._memo.clear()
+        self.scans += 1
+
+    def categories(self) -> Dict[str, Dict]:
+        """类别索引（目录有变化时先重建）"""
+        with self._lock:
+            self._ensure_fresh()
+            return self._categories
+
+    def memoize(self, kind: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        记忆化派生结果，索引重建时失效
+
+        Args:
+            kind: 结果类型（如 'visual_features'）
+            key: 结果键（如 (category, sample_name)）
+            compute: 未命中时的计算函数
+        """
+        with self._lock:
+            self._ensure_fresh()
+            memo_key = (kind, key)
+            if memo_key not in self._memo:
+                self._memo[memo_key] = compute()
+            return self._memo[memo_key]
+
+    def invalidate(self) -> None:
+        """强制下次访问时重新扫描"""
+        with self._lock:
+            self._categories = None
+            self._memo.clear()
+
+
+_libraries: Dict[str, GTLibrary] = {}
+_libraries_lock = threading.Lock()
+
+
+def get_gt_library(gt_dir: str) -> GTLibrary:
+    """获取 GT 根目录对应的进程级索引（按解析后的绝对路径共享）"""
+    path = Path(gt_dir).resolve()
+    with _libraries_lock:
+        library = _libraries.get(str(path))
+        if library is None:
+            library = _libraries[str(path)] = GTLibrary(path)
+        return library
+
+
+# ==================== GTManager 模板索引 ====================
+
+_template_indexes: Dict[str, Tuple[Signature, dict]] = {}
+_template_lock = threading.Lock()
+
+
+def get_template_index(
+    gt_dir: Path,
+    subdirs: Dict[str, Path],
+    build: Callable[[], dict],
+) -> dict:
+    """
+    GTManager 模板索引的进程级缓存
+
+    签名为各子目录 mtime 与已发现 sidecar JSON 的 mtime：
+    新增/删除模板图片或修改 sidecar 元数据后重建。
+
+    Args:
+        gt_dir: GT 样本根目录
+        subdirs: {索引键: 子目录}，如 {'dialogs': gt_dir / 'dialogs', ...}
+        build: 重建索引的函数（GTManager._build_index）
+
+    Returns:
+        索引（共享对象，GTManager 会在其上追加条目，调用方需自行复制）
+    """
+    cache_key = str(Path(gt_dir).resolve())
+    with _template_lock:
+        cached = _template_indexes.get(cache_key)
+        if cached is not None and not _signature_changed(cached[0]):
+            return cached[1]
+
+        index = build()
+        signature: Signature = [(str(d), _mtime_ns(d)) for d in subdirs.values()]
+        for d in subdirs.values():
+            if d.exists():
+                signature.extend((str(p), _mtime_ns(p)) for p in d.glob('*.json'))
+        _template_indexes[cache_key] = (signature, index)
+        return index
@@ -8,6 +8,7 @@ gt_manager.py - Ground Truth 管理与利用
 3. Few-shot参考 - 将GT作为VLM的示例输入
 """
 
+import copy
 import json
 import os
 from pathlib import Path
@@ -16,6 +17,8 @@ from PIL import Image
 import numpy as np
 from collections import Counter
 
+from .gt_library import get_template_index
+
 
 class GTManager:
     """
@@ -87,7 +90,12 @@ class GTManager:
 
     def _load_index(self) -> dict:
         """加载GT索引（优先自动扫描重建，index.json 作为回退缓存）"""
-        index = self._build_index()
+        # 扫描结果按目录 mtime 在进程内共享；本实例会追加条目，因此取副本
+        index = copy.deepcopy(get_template_index(
+            self.gt_dir,
+            {"dialogs": self.dialogs_dir, "toasts": self.toasts_dir, "loadings": self.loadings_dir},
+            self._build_index,
+        ))
         if any(index.get(k) for k in ("dialogs", "toasts", "loadings")):
             return index
         # 回退：读取 index.json 缓存
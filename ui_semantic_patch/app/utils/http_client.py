@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+http_client.py - 共享的 VLM/图像生成 HTTP 客户端
+
+各模块原先各自调用 requests.post，每次都新建 TCP/TLS 连接，批量运行时也容易
+触发服务端限流。本模块提供进程级共享客户端：
+
+- requests.Session 连接池（keep-alive，复用连接）
+- 按主机的令牌桶限速：收到 429 时减半速率，成功后逐步恢复（AIMD）
+- 429 自动重试：优先遵循 Retry-After，否则使用带抖动的指数退避
+- 按主机的并发上限
+- 按主机的调用延迟统计
+
+环境变量：
+    HTTP_RATE_LIMIT         每个主机的初始速率上限（请求/秒，默认 5）
+    HTTP_MAX_CONCURRENCY    每个主机的最大并发请求数（默认 8）
+    HTTP_RATE_LIMIT_RETRIES 收到 429 时客户端内部重试次数（默认 2）
+    HTTP_POOL_SIZE          连接池大小（默认 32）
+
+使用方式：
+    from app.utils.http_client import get_http_client, backoff_delay
+
+    response = get_http_client().post(api_url, headers=headers, json=payload, timeout=60)
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_DEFAULT_RATE = 5.0
+_DEFAULT_CONCURRENCY = 8
+_DEFAULT_RATE_LIMIT_RETRIES = 2
+_DEFAULT_POOL_SIZE = 32
+# 限流后速率下限（请求/秒）
+_MIN_RATE = 0.2
+
+
+def backoff_delay(attempt: int, base: float = 5.0, cap: float = 60.0) -> float:
+    """
+    带抖动的指数退避时间（秒）
+
+    attempt 从 1 开始计数（第一次重试），返回 [0.5, 1.0] × min(base·2^(attempt-1), cap)，
+    避免并发任务在同一时刻集中重试。
+    """
+    delay = min(base * (2 ** max(attempt - 1, 0)), cap)
+    return round(delay * random.uniform(0.5, 1.0), 1)
+
+
+class TokenBucket:
+    """
+    自适应令牌桶
+
+    - acquire() 阻塞直到拿到一个令牌
+    - on_rate_limited() 速率减半（乘性减）
+    - on_success() 速率逐步恢复到上限（加性增）
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """获取一个令牌，返回等待时长（秒）"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def on_rate_limited(self) -> None:
+        with self._lock:
+            self.rate = max(_MIN_RATE, self.rate / 2)
+            self._tokens = 0.0
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class _Endpoint:
+    """单个端点的限速、并发控制与统计"""
+
+    def __init__(self, rate: float, concurrency: int):
+        self.bucket = TokenBucket(rate)
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_wait = 0.0
+
+    def record(self, latency: float, waited: float, error: bool = False) -> None:
+        with self.lock:
+            self.calls += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.total_wait += waited
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'rate_limited': self.rate_limited,
+                'avg_latency': round(self.total_latency / self.calls, 3) if self.calls else 0.0,
+                'max_latency': round(self.max_latency, 3),
+                'total_wait': round(self.total_wait, 3),
+                'current_rate': round(self.bucket.rate, 3),
+            }
+
+
+class HTTPClient:
+    """
+    共享 HTTP 客户端（线程安全）
+
+    Args:
+        rate: 每个主机的初始速率上限（请求/秒）
+        max_concurrency: 每个主机的最大并发数
+        rate_limit_retries: 收到 429 时内部重试次数
+        pool_size: 连接池大小
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        rate_limit_retries: Optional[int] = None,
+        pool_size: Optional[int] = None,
+    ):
+        self.rate = rate or float(os.environ.get('HTTP_RATE_LIMIT', _DEFAULT_RATE))
+        self.max_concurrency = max_concurrency or int(
+            os.environ.get('HTTP_MAX_CONCURRENCY', _DEFAULT_CONCURRENCY)
+        )
+        if rate_limit_retries is None:
+            rate_limit_retries = int(
+                os.environ.get('HTTP_RATE_LIMIT_RETRIES', _DEFAULT_RATE_LIMIT_RETRIES)
+            )
+        self.rate_limit_retries = rate_limit_retries
+        pool_size = pool_size or int(os.environ.get('HTTP_POOL_SIZE', _DEFAULT_POOL_SIZE))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _endpoint_key(url: str) -> str:
+        """端点按 scheme + host 区分（图片下载等路径各异的请求归入同一主机）"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _endpoint(self, url: str) -> _Endpoint:
+        key = self._endpoint_key(url)
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = _Endpoint(self.rate, self.max_concurrency)
+                self._endpoints[key] = endpoint
+            return endpoint
+
+    @staticmethod
+    def _retry_after(response: requests.Response, attempt: int) -> float:
+        """解析 Retry-After（秒），缺失时使用带抖动的退避"""
+        value = response.headers.get('Retry-After', '')
+        try:
+            return min(float(value), 60.0) + random.uniform(0, 1.0)
+        except ValueError:
+            return backoff_delay(attempt, base=2.0, cap=30.0)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送请求（限速 + 并发控制 + 429 自动重试）
+
+        参数与 requests.request 一致；超出内部重试次数后返回最后一次 429 响应，
+        由调用方沿用原有的重试逻辑处理。
+        """
+        endpoint = self._endpoint(url)
+        attempt = 0
+        while True:
+            waited = endpoint.bucket.acquire()
+            with endpoint.semaphore:
+                start = time.time()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except requests.exceptions.RequestException:
+                    endpoint.record(time.time() - start, waited, error=True)
+                    raise
+                endpoint.record(time.time() - start, waited, error=response.status_code >= 400)
+
+            if response.status_code != 429:
+                endpoint.bucket.on_success()
+                return response
+
+            endpoint.bucket.on_rate_limited()
+            with endpoint.lock:
+                endpoint.rate_limited += 1
+            attempt += 1
+            if attempt > self.rate_limit_retries:
+                return response
+            wait = self._retry_after(response, attempt)
+            print(f"  ⚠ API 限流 (429)，{wait:.1f}s 后重试 ({attempt}/{self.rate_limit_retries})...")
+            time.sleep(wait)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict]:
+        """按端点的调用统计"""
+        with self._lock:
+            endpoints = dict(self._endpoints)
+        return {key: endpoint.snapshot() for key, endpoint in endpoints.items()}
+
+    def print_metrics(self) -> None:
+        """打印调用统计"""
+        for key, m in self.metrics().items():
+            print(f"  {key}: {m['calls']} 次, 平均 {m['avg_latency']:.2f}s, "
+                  f"最大 {m['max_latency']:.2f}s, 限流 {m['rate_limited']} 次, 失败 {m['errors']} 次")
+
+
+_http_client: Optional[HTTPClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """获取进程级共享的 HTTP 客户端"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HTTPClient()
+        return _http_client
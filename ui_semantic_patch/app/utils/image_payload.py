@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+image_payload.py - VLM 请求的图片载荷构建
+
+encode_image 直接对原始文件做 base64，全分辨率 PNG 截图单张即达数 MB，
+上传耗时和服务端解码延迟都随之增加。本模块统一构建图片载荷：
+
+- 长边缩放到 VLM_IMAGE_MAX_SIDE 以内（等比缩放，不放大）
+- 重新编码为 JPEG / WebP（透明区域铺白底）
+- 按 (路径, mtime, 文件大小, 参数) 在进程内缓存编码结果（LRU）
+- 记录缩放比例，提供 原图 ↔ 编码图 坐标换算
+
+环境变量：
+    VLM_IMAGE_MAX_SIDE     长边上限，像素（默认 1600，0 表示不缩放）
+    VLM_IMAGE_FORMAT       jpeg / webp / original（original 表示原样上传文件字节）
+    VLM_IMAGE_QUALITY      JPEG/WebP 质量（默认 85）
+    VLM_IMAGE_CACHE_SIZE   编码结果缓存条数（默认 128）
+
+使用方式：
+    from app.utils.image_payload import build_image_payload
+
+    image = build_image_payload(image_path)
+    content = [{'type': 'image_url', 'image_url': {'url': image.data_url}}, ...]
+    # VLM 按编码图坐标返回的框换算回原图
+    bounds = image.bounds_to_original(bounds)
+"""
+
+import base64
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.utils.common import encode_image, get_mime_type
+
+_DEFAULT_MAX_SIDE = 1600
+_DEFAULT_FORMAT = 'jpeg'
+_DEFAULT_QUALITY = 85
+_DEFAULT_CACHE_SIZE = 128
+
+_FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'jpg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+
+class ImagePayload:
+    """
+    编码后的图片载荷
+
+    Attributes:
+        base64: base64 编码的图片字节
+        mime_type: MIME 类型
+        original_size: 原图尺寸 (width, height)
+        size: 编码图尺寸 (width, height)
+        scale: 编码图 / 原图 的缩放比例（≤ 1）
+    """
+
+    def __init__(self, base64_data: str, mime_type: str,
+                 original_size: Tuple[int, int], size: Tuple[int, int]):
+        self.base64 = base64_data
+        self.mime_type = mime_type
+        self.original_size = original_size
+        self.size = size
+        self.scale = size[0] / original_size[0] if original_size[0] else 1.0
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+    @property
+    def num_bytes(self) -> int:
+        """图片字节数（由 base64 长度估算）"""
+        return len(self.base64) * 3 // 4
+
+    def to_original(self, x: float, y: float) -> Tuple[int, int]:
+        """编码图坐标 → 原图坐标"""
+        if self.scale == 1.0:
+            return int(round(x)), int(round(y))
+        return int(round(x / self.scale)), int(round(y / self.scale))
+
+    def to_encoded(self, x: float, y: float) -> Tuple[int, int]:
+        """原图坐标 → 编码图坐标"""
+        return int(round(x * self.scale)), int(round(y * self.scale))
+
+    def bounds_to_original(self, bounds: Dict[str, float]) -> Dict[str, int]:
+        """{'x', 'y', 'width', 'height'}：编码图坐标 → 原图坐标"""
+        x1, y1 = self.to_original(bounds['x'], bounds['y'])
+        x2, y2 = self.to_original(bounds['x'] + bounds['width'], bounds['y'] + bounds['height'])
+        return {'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1}
+
+    def bounds_to_encoded(self, bounds: Dict[str, float]) -> Dict[str, int]:
+        """{'x', 'y', 'width', 'height'}：原图坐标 → 编码图坐标"""
+        x1, y1 = self.to_encoded(bounds['x'], bounds['y'])
+        x2, y2 = self.to_encoded(bounds['x'] + bounds['width'], bounds['y'] + bounds['height'])
+        return {'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1}
+
+
+def _settings(max_side: Optional[int], fmt: Optional[str], quality: Optional[int]) -> Tuple[int, str, int]:
+    """补全参数默认值（显式参数优先，其次环境变量）"""
+    if max_side is None:
+        max_side = int(os.environ.get('VLM_IMAGE_MAX_SIDE', _DEFAULT_MAX_SIDE))
+    if fmt is None:
+        fmt = os.environ.get('VLM_IMAGE_FORMAT', _DEFAULT_FORMAT)
+    fmt = fmt.strip().lower()
+    if fmt != 'original' and fmt not in _FORMATS:
+        print(f"  ⚠ 未知 VLM_IMAGE_FORMAT={fmt}，回退到 {_DEFAULT_FORMAT}")
+        fmt = _DEFAULT_FORMAT
+    if quality is None:
+        quality = int(os.environ.get('VLM_IMAGE_QUALITY', _DEFAULT_QUALITY))
+    return max_side, fmt, quality
+
+
+def _encode(image_path: str, max_side: int, fmt: str, quality: int) -> ImagePayload:
+    with Image.open(image_path) as img:
+        original_size = img.size
+        if fmt == 'original':
+            # 原样上传，不缩放（坐标无需换算）
+            return ImagePayload(encode_image(image_path), get_mime_type(image_path),
+                                original_size, original_size)
+
+        img = img.convert('RGBA') if img.mode in ('RGBA', 'LA', 'P') else img.convert('RGB')
+        if max_side and max(original_size) > max_side:
+            ratio = max_side / max(original_size)
+            new_size = (max(1, round(original_size[0] * ratio)),
+                        max(1, round(original_size[1] * ratio)))
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+        if img.mode == 'RGBA':
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+
+        pil_format, mime_type = _FORMATS[fmt]
+        buffer = io.BytesIO()
+        img.save(buffer, format=pil_format, quality=quality)
+        data = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        return ImagePayload(data, mime_type, original_size, img.size)
+
+
+class _PayloadCache:
+    """编码结果 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[tuple, ImagePayload]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[ImagePayload]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: tuple, payload: ImagePayload) -> None:
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+_payload_cache = _PayloadCache(int(os.environ.get('VLM_IMAGE_CACHE_SIZE', _DEFAULT_CACHE_SIZE)))
+
+
+def build_image_payload(
+    image_path: str,
+    max_side: Optional[int] = None,
+    fmt: Optional[str] = None,
+    quality: Optional[int] = None,
+) -> ImagePayload:
+    """
+    构建 VLM 请求的图片载荷（带缓存）
+
+    Args:
+        image_path: 图片路径
+        max_side: 长边上限（默认 VLM_IMAGE_MAX_SIDE）
+        fmt: 编码格式 jpeg / webp / original（默认 VLM_IMAGE_FORMAT）
+        quality: 编码质量（默认 VLM_IMAGE_QUALITY）
+
+    Returns:
+        ImagePayload
+    """
+    max_side, fmt, quality = _settings(max_side, fmt, quality)
+    path = Path(image_path).resolve()
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size, max_side, fmt, quality)
+
+    payload = _payload_cache.get(key)
+    if payload is None:
+        payload = _encode(str(path), max_side, fmt, quality)
+        _payload_cache.put(key, payload)
+    return payload
+
+
+def get_payload_cache_stats() -> Dict[str, int]:
+    """编码缓存统计"""
+    return _payload_cache.stats()
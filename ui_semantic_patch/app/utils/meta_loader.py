@@ -6,12 +6,17 @@ meta_loader.py - GT模板元数据加载器
 1. 读取异常样本的meta.json文件
 2. 提取语义描述和视觉特征
 3. 构建用于AI生成的结构化prompt
+
+目录扫描结果与派生结果（视觉特征、风格 prompt）由进程级 GT 库索引
+（gt_library）共享，重复构造 MetaLoader 不会重新遍历目录。
 """
 
-import json
+import copy
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .gt_library import get_gt_library
+
 
 class MetaLoader:
     """GT模板元数据加载器"""
@@ -24,33 +29,13 @@ class MetaLoader:
             gt_templates_dir: GT模板根目录，如 "./data/Agent执行遇到的典型异常UI类型/analysis/gt_templates"
         """
         self.gt_dir = Path(gt_templates_dir)
-        self.categories = self._scan_categories()
-
-    def _scan_categories(self) -> Dict[str, Dict]:
-        """扫描所有类别及其meta.json"""
-        categories = {}
-
-        if not self.gt_dir.exists():
-            print(f"  ⚠ GT模板目录不存在: {self.gt_dir}")
-            return categories
-
-        for category_dir in self.gt_dir.iterdir():
-            if not category_dir.is_dir():
-                continue
-
-            meta_path = category_dir / 'meta.json'
-            if meta_path.exists():
-                try:
-                    with open(meta_path, 'r', encoding='utf-8') as f:
-                        meta = json.load(f)
-                    categories[category_dir.name] = {
-                        'path': str(category_dir),
-                        'meta': meta
-                    }
-                except Exception as e:
-                    print(f"  ⚠ 读取meta.json失败: {meta_path} - {e}")
-
-        return categories
+        self._library = get_gt_library(str(self.gt_dir))
+        self._library.categories()
+
+    @property
+    def categories(self) -> Dict[str, Dict]:
+        """所有类别及其meta.json（进程内共享，目录变化时自动重建，勿修改）"""
+        return self._library.categories()
 
     def list_categories(self) -> List[str]:
         """列出所有可用的异常类别"""
@@ -234,6 +219,14 @@ class MetaLoader:
                 ...
             }
         """
+        features = self._library.memoize(
+            'visual_features', (category, sample_name),
+            lambda: self._build_visual_features_dict(category, sample_name),
+        )
+        # 返回副本，调用方可自由修改
+        return copy.deepcopy(features)
+
+    def _build_visual_features_dict(self, category: str, sample_name: str) -> Optional[Dict]:
         sample_meta = self.load_sample_meta(category, sample_name)
         if not sample_meta:
             return None
@@ -289,6 +282,12 @@ class MetaLoader:
         Returns:
             结构化的视觉风格 prompt
         """
+        return self._library.memoize(
+            'visual_style_prompt', (category, sample_name),
+            lambda: self._build_visual_style_prompt(category, sample_name),
+        )
+
+    def _build_visual_style_prompt(self, category: str, sample_name: str) -> Optional[str]:
         sample_meta = self.load_sample_meta(category, sample_name)
         if not sample_meta:
             return None
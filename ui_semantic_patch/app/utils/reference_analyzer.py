@@ -13,7 +13,6 @@ reference_analyzer.py - 参考图片分析器
 
 import json
 import base64
-import requests
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple, List
 from PIL import Image, ImageDraw, ImageFilter, ImageStat
@@ -21,6 +20,7 @@ import numpy as np
 from collections import Counter
 import colorsys
 from app.generators.prompts import PROMPT_REFERENCE_ANALYSIS
+from app.utils.http_client import get_http_client
 
 
 class ReferenceAnalyzer:
@@ -306,7 +306,7 @@ class ReferenceAnalyzer:
                 'max_tokens': 800
             }
 
-            response = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
 
             content = response.json()['choices'][0]['message']['content']
@@ -26,10 +26,13 @@ from typing import Optional, Tuple, List, Dict, Any
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageChops
 import io
 
+import cv2
+import numpy as np
 import dashscope
 from dashscope import MultiModalConversation
 
 from app.utils.reference_analyzer import ReferenceAnalyzer, ReferenceStyleApplier
+from app.utils.http_client import get_http_client, backoff_delay
 
 
 # ==================== 图像生成工具函数 ====================
@@ -42,6 +45,17 @@ def _get_image_backend() -> str:
     return backend
 
 
+def get_image_model_signature() -> str:
+    """当前图像生成后端与模型标识（作为生成素材缓存键的一部分）"""
+    gen_model, _ = _resolve_dashscope_models(None, False)
+    return "|".join([
+        _get_image_backend(),
+        f"dashscope={gen_model}",
+        f"local={os.getenv('LOCAL_IMAGE_API_URL', '')}",
+        f"mlops={os.getenv('HUAWEI_MLOPS_MODEL', 'flux_txt_to_image')}",
+    ])
+
+
 def _resolve_dashscope_models(force_model: Optional[str], has_ref: bool) -> Tuple[str, bool]:
     """根据配置和输入条件解析图像生成模型。
     
@@ -210,9 +224,9 @@ def generate_image_dashscope(
         if attempt > 0:
             # 429 限流错误使用更长的等待时间
             if last_error_code == 429:
-                wait_time = min(30 * (2 ** (attempt - 1)), 120)  # 30s, 60s, 120s...
+                wait_time = backoff_delay(attempt, 30, 120)  # 约 30s, 60s, 120s（带抖动）
             else:
-                wait_time = min(base_wait * (2 ** (attempt - 1)), 60)
+                wait_time = backoff_delay(attempt, base_wait)
             print(f"  ⏳ 等待 {wait_time}s 后重试 ({attempt + 1}/{max_retries})...")
             time.sleep(wait_time)
 
@@ -238,7 +252,7 @@ def generate_image_dashscope(
                         print(f"  ✓ 图片生成成功，正在下载...")
 
                         # 下载图片
-                        img_response = requests.get(image_url, timeout=60)
+                        img_response = get_http_client().get(image_url, timeout=60)
                         if img_response.status_code == 200:
                             image = Image.open(io.BytesIO(img_response.content)).convert('RGBA')
 
@@ -426,7 +440,7 @@ def generate_image_local(
     
     # 尝试格式 1
     try:
-        response = requests.post(api_url, json=payload_v1, headers=headers, timeout=timeout, proxies=proxies)
+        response = get_http_client().post(api_url, json=payload_v1, headers=headers, timeout=timeout, proxies=proxies)
         if response.status_code == 200:
             print(f"  使用格式 1 (width/height) 成功")
             print(f"  响应内容：{json.dumps(response.json(), ensure_ascii=False, indent=2)[:300]}")
@@ -468,7 +482,7 @@ def generate_image_local(
     
     # 尝试格式 2
     try:
-        response = requests.post(api_url, json=payload_v2, headers=headers, timeout=timeout, proxies=proxies)
+        response = get_http_client().post(api_url, json=payload_v2, headers=headers, timeout=timeout, proxies=proxies)
         if response.status_code == 200:
             print(f"  使用格式 2 (size) 成功")
             print(f"  响应内容：{json.dumps(response.json(), ensure_ascii=False, indent=2)[:300]}")
@@ -495,7 +509,7 @@ def _process_local_response(result: dict) -> 'Optional[Image.Image]':
         if "path" in result and result["path"]:
             image_url = result["path"]
             print(f"  下载图像：{image_url}")
-            img_response = requests.get(image_url, timeout=30)
+            img_response = get_http_client().get(image_url, timeout=30)
             if img_response.status_code == 200:
                 image = Image.open(io.BytesIO(img_response.content)).convert('RGBA')
                 print(f"  本地服务图像生成成功 (URL 格式)")
@@ -517,7 +531,7 @@ def _process_local_response(result: dict) -> 'Optional[Image.Image]':
             image_data = result["images"][0]
             if isinstance(image_data, dict) and "url" in image_data:
                 # URL 对象格式
-                img_response = requests.get(image_data["url"], timeout=30)
+                img_response = get_http_client().get(image_data["url"], timeout=30)
                 if img_response.status_code == 200:
                     image = Image.open(io.BytesIO(img_response.content)).convert('RGBA')
                     print(f"  本地服务图像生成成功 (images URL 格式)")
@@ -533,7 +547,7 @@ def _process_local_response(result: dict) -> 'Optional[Image.Image]':
             for key in result:
                 if isinstance(result[key], str) and result[key].startswith('http'):
                     print(f"  下载图像：{result[key]}")
-                    img_response = requests.get(result[key], timeout=30)
+                    img_response = get_http_client().get(result[key], timeout=30)
                     if img_response.status_code == 200:
                         image = Image.open(io.BytesIO(img_response.content)).convert('RGBA')
                         print(f"  本地服务图像生成成功 (key={key} URL)")
@@ -629,7 +643,7 @@ def generate_image_huawei_mlops(
         proxies = {"http": None, "https": None}
         timeout = int(os.getenv("HUAWEI_MLOPS_TIMEOUT", "120"))
         
-        response = requests.post(api_url, headers=headers, json=json_data, timeout=timeout, proxies=proxies)
+        response = get_http_client().post(api_url, headers=headers, json=json_data, timeout=timeout, proxies=proxies)
         
         if response.status_code != 200:
             print(f"  ⚠ 华为 MLOps API 请求失败，状态码: {response.status_code}")
@@ -1134,7 +1148,7 @@ class SemanticDialogGenerator:
             'max_tokens': 500
         }
 
-        response = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
+        response = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
         response.raise_for_status()
 
         content = response.json()['choices'][0]['message']['content']
@@ -2073,7 +2087,7 @@ class SemanticDialogGenerator:
         }
 
         try:
-            response = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
 
             content = response.json()['choices'][0]['message']['content']
@@ -2250,96 +2264,38 @@ class SemanticDialogGenerator:
             image = image.convert('RGBA')
 
         width, height = image.size
-        pixels = image.load()
-
-        # 直接使用纯黑色作为背景色（AI 生成时已要求纯黑背景）
-        bg_color = (0, 0, 0)
-
-        # 使用洪水填充从边缘开始标记背景像素
-        # 创建访问标记数组
-        to_remove = set()
-        visited = set()
-
-        def is_background_color(x: int, y: int) -> bool:
-            """检查像素是否接近背景色"""
-            r, g, b, a = pixels[x, y]
-            diff = abs(r - bg_color[0]) + abs(g - bg_color[1]) + abs(b - bg_color[2])
-            return diff <= tolerance * 3
-
-        def flood_fill_from_edges():
-            """从图像边缘开始洪水填充，标记所有连通的背景像素"""
-            from collections import deque
-            # 使用 deque 替代 list：popleft 是 O(1)，而 list.pop(0) 是 O(n)
-            queue = deque()
-
-            # 上边缘和下边缘
-            for x in range(width):
-                if is_background_color(x, 0):
-                    queue.append((x, 0))
-                if is_background_color(x, height - 1):
-                    queue.append((x, height - 1))
-
-            # 左边缘和右边缘
-            for y in range(height):
-                if is_background_color(0, y):
-                    queue.append((0, y))
-                if is_background_color(width - 1, y):
-                    queue.append((width - 1, y))
-
-            # BFS 洪水填充
-            while queue:
-                x, y = queue.popleft()
-
-                if (x, y) in visited:
-                    continue
-
-                if x < 0 or x >= width or y < 0 or y >= height:
-                    continue
-
-                if not is_background_color(x, y):
-                    continue
+        rgba = np.asarray(image)
 
-                visited.add((x, y))
-                to_remove.add((x, y))
+        # 直接使用纯黑色作为背景色（AI 生成时已要求纯黑背景），
+        # 与纯黑的通道差之和即 R+G+B
+        channel_sum = rgba[:, :, :3].astype(np.int32).sum(axis=2)
+        background = (channel_sum <= tolerance * 3).astype(np.uint8)
 
-                # 添加相邻的4个像素（4连通）
-                queue.append((x + 1, y))
-                queue.append((x - 1, y))
-                queue.append((x, y + 1))
-                queue.append((x, y - 1))
-
-        # 执行洪水填充
-        flood_fill_from_edges()
-
-        # 找出保留的像素（非背景像素）
-        retained_pixels = set()
-        for y in range(height):
-            for x in range(width):
-                if (x, y) not in to_remove:
-                    retained_pixels.add((x, y))
+        # 从图像边缘开始洪水填充（4连通）：与边缘相连的背景连通域即待移除像素
+        _, bg_labels = cv2.connectedComponents(background, connectivity=4)
+        edge_labels = np.unique(np.concatenate((
+            bg_labels[0, :], bg_labels[-1, :], bg_labels[:, 0], bg_labels[:, -1]
+        )))
+        edge_labels = edge_labels[edge_labels != 0]
+        to_remove = np.isin(bg_labels, edge_labels) & (background != 0)
 
         # 孤岛过滤：只保留与主要内容区域相连的像素
         # 找到最大的连通区域（弹窗主体），移除孤立的小区域
-        main_content = self._find_largest_connected_region(retained_pixels, width, height)
-
-        # 创建结果图像
-        result = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        result_pixels = result.load()
+        retained = ~to_remove
+        main_content = self._find_largest_connected_region(retained)
 
-        # 复制像素，只保留主要内容区域
-        for y in range(height):
-            for x in range(width):
-                if (x, y) in main_content:
-                    result_pixels[x, y] = pixels[x, y]
-                else:
-                    result_pixels[x, y] = (0, 0, 0, 0)
+        # 创建结果图像，只保留主要内容区域
+        result = Image.fromarray(
+            np.where(main_content[:, :, None], rgba, 0).astype(np.uint8), 'RGBA'
+        )
 
         # 边缘修复：将不透明像素的颜色渗透到半透明边缘，
         # 替换残留的黑色背景色，保留自然抗锯齿过渡
         result = self._fix_edge_fringe(result, noise_threshold=10)
 
-        removed_percent = (1 - len(main_content) / (width * height)) * 100
-        isolated_removed = len(retained_pixels) - len(main_content)
+        main_count = int(main_content.sum())
+        removed_percent = (1 - main_count / (width * height)) * 100
+        isolated_removed = int(retained.sum()) - main_count
         print(f"  ✓ 背景移除完成: 移除了 {removed_percent:.1f}% 的像素（含 {isolated_removed} 个孤立像素）")
 
         return result
@@ -2426,7 +2382,7 @@ class SemanticDialogGenerator:
             最大内容区域的 bbox (left, upper, right, lower)
         """
         width = image.size[0]
-        alpha = image.split()[3]
+        opaque = np.asarray(image.getchannel('A')) > 10
 
         left, top, right, bottom = full_bbox
         content_width = right - left
@@ -2438,14 +2394,8 @@ class SemanticDialogGenerator:
         # 按行扫描，统计每行的非透明像素数
         # 间隙阈值：非透明像素占内容宽度不到 3% 的行视为"空行"
         gap_threshold = content_width * 0.03
-        row_has_content = []
-
-        for y in range(top, bottom):
-            count = 0
-            for x in range(left, right):
-                if alpha.getpixel((x, y)) > 10:
-                    count += 1
-            row_has_content.append(count > gap_threshold)
+        row_counts = opaque[top:bottom, left:right].sum(axis=1)
+        row_has_content = (row_counts > gap_threshold).tolist()
 
         # 找到连续有内容的行区间（区块）
         blocks = []  # [(start_y, end_y), ...]
@@ -2484,16 +2434,10 @@ class SemanticDialogGenerator:
         for (by_start, by_end) in blocks:
             # 计算该区块在水平方向的实际内容范围
             block_left, block_right = width, 0
-            for y in range(by_start, by_end):
-                for x in range(left, right):
-                    if alpha.getpixel((x, y)) > 10:
-                        block_left = min(block_left, x)
-                        block_right = max(block_right, x + 1)
-                        break
-                for x in range(right - 1, left - 1, -1):
-                    if alpha.getpixel((x, y)) > 10:
-                        block_right = max(block_right, x + 1)
-                        break
+            cols = opaque[by_start:by_end, left:right].any(axis=0)
+            if cols.any():
+                block_left = left + int(np.argmax(cols))
+                block_right = right - int(np.argmax(cols[::-1]))
 
             area = (block_right - block_left) * (by_end - by_start)
             if area > best_area:
@@ -2539,14 +2483,9 @@ class SemanticDialogGenerator:
             return image
 
         # 扫描每一行的非透明像素数量
-        alpha_data = image.split()[3]  # alpha channel
-        row_pixel_counts = []
-        for y in range(bbox[1], bbox[3]):
-            count = 0
-            for x in range(bbox[0], bbox[2]):
-                if alpha_data.getpixel((x, y)) > 10:
-                    count += 1
-            row_pixel_counts.append((y, count))
+        alpha_data = np.asarray(image.getchannel('A'))
+        counts = (alpha_data[bbox[1]:bbox[3], bbox[0]:bbox[2]] > 10).sum(axis=1)
+        row_pixel_counts = list(zip(range(bbox[1], bbox[3]), counts.tolist()))
 
         if not row_pixel_counts:
             return image
@@ -2639,62 +2578,50 @@ class SemanticDialogGenerator:
         if content_width < 50 or content_height < 50:
             return image
 
-        alpha = image.split()[3]
-        pixels = image.load()
+        rgba = np.array(image)
+        img_h, img_w = rgba.shape[:2]
         total_fixed = 0
 
-        def _x_score(rgba_img) -> float:
+        def _x_score(a: np.ndarray) -> float:
             """
-            计算 RGBA 图像的 X 形状得分。
+            计算 alpha 区域的 X 形状得分。
             沿两条对角线采样，返回两条线填充率的较小值。
             """
-            w, h = rgba_img.size
+            h, w = a.shape
             if w < 4 or h < 4:
                 return 0.0
-            a = rgba_img.split()[3]
             steps = min(w, h)
-            d1 = d2 = 0
-            for i in range(steps):
-                x1 = int(i * w / steps)
-                y1 = int(i * h / steps)
-                if a.getpixel((x1, y1)) > 10:
-                    d1 += 1
-                x2 = w - 1 - int(i * w / steps)
-                if a.getpixel((x2, y1)) > 10:
-                    d2 += 1
+            i = np.arange(steps)
+            xs = i * w // steps
+            ys = i * h // steps
+            d1 = int((a[ys, xs] > 10).sum())
+            d2 = int((a[ys, w - 1 - xs] > 10).sum())
             return min(d1, d2) / max(steps, 1)
 
         def _fill_color_near(x, y) -> tuple:
             """
             从 (x,y) 附近采样弹窗背景色。
-            取 9×9 区域中 α>10 的像素的 RGB 中位数。
+            取 13×13 区域中 α>10 的像素的 RGB 中位数（按亮度排序）。
             """
-            samples = []
-            for dy in range(-6, 7):
-                for dx in range(-6, 7):
-                    sx = max(0, min(image.width - 1, x + dx))
-                    sy = max(0, min(image.height - 1, y + dy))
-                    pr, pg, pb, pa = pixels[sx, sy]
-                    if pa > 10:
-                        b = (pr + pg + pb) // 3
-                        if 30 < b < 250:
-                            samples.append((pr, pg, pb))
-            if not samples:
+            offsets = np.arange(-6, 7)
+            ys = np.clip(y + offsets, 0, img_h - 1)
+            xs = np.clip(x + offsets, 0, img_w - 1)
+            patch = rgba[ys[:, None], xs[None, :]].reshape(-1, 4).astype(np.int32)
+            brightness = patch[:, :3].sum(axis=1) // 3
+            samples = patch[(patch[:, 3] > 10) & (brightness > 30) & (brightness < 250), :3]
+            if len(samples) == 0:
                 return (255, 255, 255, 255)
-            samples.sort(key=lambda c: c[0] * 0.299 + c[1] * 0.587 + c[2] * 0.114)
-            m = samples[len(samples) // 2]
-            return (m[0], m[1], m[2], 255)
+            luma = samples[:, 0] * 0.299 + samples[:, 1] * 0.587 + samples[:, 2] * 0.114
+            m = samples[np.argsort(luma, kind='stable')[len(samples) // 2]]
+            return (int(m[0]), int(m[1]), int(m[2]), 255)
 
         def _fill_region(region_x1, region_y1, region_x2, region_y2, fill_c):
             """将指定矩形区域内的非透明像素全部填充为指定颜色"""
             nonlocal total_fixed
-            count = 0
-            for y in range(region_y1, region_y2):
-                for x in range(region_x1, region_x2):
-                    if 0 <= x < image.width and 0 <= y < image.height:
-                        if pixels[x, y][3] > 10:
-                            pixels[x, y] = fill_c
-                            count += 1
+            region = rgba[max(0, region_y1):region_y2, max(0, region_x1):region_x2]
+            opaque = region[:, :, 3] > 10
+            region[opaque] = fill_c
+            count = int(opaque.sum())
             total_fixed += count
             return count
 
@@ -2714,8 +2641,7 @@ class SemanticDialogGenerator:
             if wx2 - wx1 < 10 or wy2 - wy1 < 10:
                 continue
 
-            region = image.crop((wx1, wy1, wx2, wy2))
-            score = _x_score(region)
+            score = _x_score(rgba[wy1:wy2, wx1:wx2, 3])
 
             if score >= 0.20:
                 fill_c = _fill_color_near(wx1 + 4, wy1 + 4)
@@ -2731,8 +2657,7 @@ class SemanticDialogGenerator:
             wx2 = min(right, left + window)
             wy2 = min(bottom, top + window)
             if wx2 - wx1 >= 10 and wy2 - wy1 >= 10:
-                region = image.crop((wx1, wy1, wx2, wy2))
-                score = _x_score(region)
+                score = _x_score(rgba[wy1:wy2, wx1:wx2, 3])
                 if score >= 0.20:
                     fill_c = _fill_color_near(wx1 + 4, wy1 + 4)
                     filled = _fill_region(wx1, wy1, wx2, wy2, fill_c)
@@ -2742,67 +2667,29 @@ class SemanticDialogGenerator:
 
         if total_fixed > 0:
             print(f"  ✓ AI 关闭按钮修复完成: 共 {total_fixed} 像素被背景色填充")
+            return Image.fromarray(rgba, 'RGBA')
         return image
 
-    def _find_largest_connected_region(
-        self,
-        pixels_set: set,
-        width: int,
-        height: int
-    ) -> set:
+    @staticmethod
+    def _find_largest_connected_region(mask: np.ndarray) -> np.ndarray:
         """
         找到最大的连通区域（8连通）
 
         Args:
-            pixels_set: 需要分析的像素坐标集合
-            width: 图像宽度
-            height: 图像高度
+            mask: 需要分析的像素遮罩（H×W bool 数组）
 
         Returns:
-            最大连通区域的像素坐标集合
+            只包含最大连通区域的 bool 遮罩
         """
-        if not pixels_set:
-            return set()
-
-        visited = set()
-        largest_region = set()
-
-        def bfs_find_region(start_x: int, start_y: int) -> set:
-            """BFS 查找与起点相连的所有像素（8连通）"""
-            region = set()
-            queue = [(start_x, start_y)]
-
-            while queue:
-                x, y = queue.pop(0)
-
-                if (x, y) in visited:
-                    continue
-                if (x, y) not in pixels_set:
-                    continue
-
-                visited.add((x, y))
-                region.add((x, y))
-
-                # 8连通：检查周围8个像素
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx == 0 and dy == 0:
-                            continue
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < width and 0 <= ny < height:
-                            if (nx, ny) not in visited and (nx, ny) in pixels_set:
-                                queue.append((nx, ny))
+        if not mask.any():
+            return np.zeros_like(mask, dtype=bool)
 
-            return region
-
-        # 遍历所有像素，找到所有连通区域
-        for (x, y) in pixels_set:
-            if (x, y) not in visited:
-                region = bfs_find_region(x, y)
-                if len(region) > len(largest_region):
-                    largest_region = region
-
-        return largest_region
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(
+            mask.astype(np.uint8), connectivity=8
+        )
+        # 第 0 个标签是背景
+        largest = 1 + int(np.argmax(stats[1:count, cv2.CC_STAT_AREA]))
+        return labels == largest
 
     def _smooth_edges_safe(self, image: Image.Image, blur_radius: float = 0.5) -> Image.Image:
         """
@@ -3441,7 +3328,7 @@ class SemanticDialogGenerator:
                 'temperature': 0.3,
                 'max_tokens': 600
             }
-            response = requests.post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
+            response = get_http_client().post(self.vlm_api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
             content_str = response.json()['choices'][0]['message']['content']
             import re as _re
@@ -381,6 +381,9 @@ def main():
     # 线程池（Windows 友好，共享 API 连接池）
     python batch_injection.py --input-dir ../data/examples --output-dir ../output/batch --use-threads
 
+    # 常驻 OmniParser 服务（模型只加载一次，所有任务共享）
+    python batch_injection.py --input-dir ../data/examples --output-dir ../output/batch --omni-worker
+
     # 干跑（只列出任务，不执行）
     python batch_injection.py --input-dir ../data/examples --dry-run
 
@@ -486,6 +489,27 @@ def main():
         help="GT 模板目录路径"
     )
 
+    # ===== 常驻 OmniParser 服务 =====
+    parser.add_argument(
+        "--omni-worker",
+        action="store_true",
+        help="启动常驻 OmniParser 服务，所有任务的 Stage 1 共享一次模型加载"
+    )
+
+    parser.add_argument(
+        "--omni-worker-address",
+        type=str,
+        default=None,
+        help="常驻 OmniParser 服务地址（Unix socket 路径或回环 host:port；复用已运行的服务需设置 OMNI_WORKER_AUTHKEY）"
+    )
+
+    parser.add_argument(
+        "--omni-device",
+        type=str,
+        default=None,
+        help="常驻 OmniParser 服务运行设备 (cuda/cpu)"
+    )
+
     args = parser.parse_args()
 
     # 解析路径
@@ -588,17 +612,30 @@ def main():
     print(f"  验证: {'禁用' if args.no_verification else f'启用 (阈值={args.quality_threshold})'}")
     print(f"  pipeline 参数: {' '.join(pipeline_args)}")
 
-    # 执行批量任务
-    result = run_batch(
-        tasks=tasks,
-        output_dir=output_dir,
-        script_path=script_path,
-        workers=args.workers,
-        pipeline_args=pipeline_args,
-        env=env,
-        use_threads=args.use_threads,
-        rate_limit_delay=args.rate_limit_delay
-    )
+    # 执行批量任务（可选：Stage 1 路由到常驻 OmniParser 服务）
+    sys.path.insert(0, str(script_path.parents[1]))
+    from app.stages.omni_worker import omni_worker_session, WORKER_ADDRESS_ENV, WORKER_AUTHKEY_ENV
+
+    use_omni_worker = args.omni_worker or bool(args.omni_worker_address)
+    with omni_worker_session(
+        enabled=use_omni_worker,
+        address=args.omni_worker_address,
+        device=args.omni_device,
+    ) as worker_address:
+        if worker_address:
+            env[WORKER_ADDRESS_ENV] = worker_address
+            env[WORKER_AUTHKEY_ENV] = os.environ[WORKER_AUTHKEY_ENV]
+            print(f"  OmniParser 服务: {worker_address}")
+        result = run_batch(
+            tasks=tasks,
+            output_dir=output_dir,
+            script_path=script_path,
+            workers=args.workers,
+            pipeline_args=pipeline_args,
+            env=env,
+            use_threads=args.use_threads,
+            rate_limit_delay=args.rate_limit_delay
+        )
 
     # 打印结果摘要
     print(f"\n{'='*60}")
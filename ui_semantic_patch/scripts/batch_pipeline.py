@@ -331,6 +331,8 @@ def run_batch(
             results.append(task_result)
 
     # 6. 保存批量处理报告
+    from app.stages.omni_cache import get_cache_stats
+    stage1_cache = get_cache_stats()
     report = {
         'timestamp': timestamp,
         'input_dir': str(input_dir),
@@ -339,6 +341,7 @@ def run_batch(
         'total_tasks': total_tasks,
         'success': success_count,
         'failed': fail_count,
+        'stage1_cache': stage1_cache,
         'results': results
     }
 
@@ -353,6 +356,7 @@ def run_batch(
     print(f"  总任务: {total_tasks}")
     print(f"  成功: {success_count}")
     print(f"  失败: {fail_count}")
+    print(f"  Stage 1 缓存命中/未命中: {stage1_cache['hits']}/{stage1_cache['misses']}")
     print(f"  输出目录: {batch_output}")
     print(f"  批量报告: {report_path}")
 
@@ -14,6 +14,12 @@ batch_utg_injection.py — UTG 批量异常注入
 
     # Dry-run: 仅 LLM 打分，不生成图片
     python batch_utg_injection.py --examples-dir tmp/examples ... --dry-run
+
+    # 常驻 OmniParser 服务：模型只加载一次，供所有 run_pipeline.py 子进程复用
+    python batch_utg_injection.py --examples-dir tmp/examples ... --omni-worker
+
+    # 进程内生成：所有 example 在同一解释器内执行，共享模型与渲染器
+    python batch_utg_injection.py --examples-dir tmp/examples ... --in-process
 """
 
 import argparse
@@ -49,6 +55,7 @@ except ImportError:
 from app.injection.utg_loader import UTGLoader
 from app.injection.utg_decision import UTGDecisionMaker, _load_injection_config
 from app.core.config import config
+from app.stages.omni_worker import omni_worker_session
 
 # 默认路径
 DEFAULT_EXAMPLES_DIR = _project_root / "data" / "examples"
@@ -65,6 +72,9 @@ NO_GT_MODES = {
 
 logger = logging.getLogger(__name__)
 
+# 进程内生成模式下跨 example 复用的渲染器实例
+_IN_PROCESS_RENDERERS: Dict = {}
+
 
 def scan_examples(examples_dir: Path) -> List[Dict]:
     """扫描示例目录，返回所有含 utga_info.json 的 UUID 目录信息"""
@@ -152,8 +162,44 @@ def run_single_generation(
     gt_sample: str = "",
     reference_path: str = "",
     timeout: int = 1800,
+    in_process: bool = False,
 ) -> Dict:
-    """调用 run_pipeline.py 生成异常截图"""
+    """调用 run_pipeline.py 生成异常截图
+
+    in_process=True 时在当前解释器内调用 run_pipeline_batch，
+    复用已加载的模型与渲染器，结果中直接给出 final_image 路径。
+    """
+    if in_process:
+        from run_pipeline import run_pipeline_batch
+
+        job = {
+            "screenshot_path": str(screenshot_path),
+            "instruction": instruction,
+            "anomaly_mode": anomaly_mode,
+            "gt_category": gt_category or None,
+            "gt_sample": gt_sample or None,
+            "reference_path": str(reference_path) if reference_path else None,
+            "output_dir": str(output_dir),
+        }
+        if gt_category and gt_sample:
+            # 与 run_pipeline.py CLI 一致：指定 GT 样本时使用默认 GT 目录
+            gt_dir = str(config.GT_TEMPLATES_DIR) if config.GT_TEMPLATES_DIR.exists() else None
+        else:
+            gt_dir = None
+        try:
+            render_result = run_pipeline_batch(
+                [job], output_dir=str(output_dir), gt_dir=gt_dir,
+                visualize=False, renderer_cache=_IN_PROCESS_RENDERERS,
+            )[0]
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        meta = render_result.metadata
+        return {
+            "success": bool(meta.get("success")),
+            "final_image": render_result.output_path or "",
+            "error": meta.get("error", ""),
+        }
+
     cmd = [
         sys.executable, str(RUN_PIPELINE_SCRIPT),
         "--screenshot", str(screenshot_path),
@@ -198,11 +244,13 @@ def process_example(
     dry_run: bool = False,
     gt_template_dir: str = None,
     injection_point: int = None,
+    in_process: bool = False,
 ) -> Dict:
     """处理单个 example：决策 + 生成
 
     mapping_entry 为 None 时走自由模式
     injection_point 指定时跳过 LLM 决策
+    in_process=True 时在当前进程内生成（不启动 run_pipeline.py 子进程）
     """
     example_dir = Path(example["dir"])
     uuid = example["uuid"]
@@ -338,17 +386,21 @@ def process_example(
         gt_category=gt_category,
         gt_sample=gt_sample,
         reference_path=(mapping_entry or {}).get("injection_config", {}).get("reference_path", ""),
+        in_process=in_process,
     )
     if not gen_result.get("success"):
         print(f"  ✗ 生成失败: {gen_result.get('error', '未知错误')}")
         result["error"] = gen_result.get("error", "")
         return result
 
-    # 查找生成的 final_*.png，转为 JPG
-    anomaly_pngs = sorted(
-        [f for f in anomaly_out_dir.rglob("final_*.png") if f.is_file()],
-        key=lambda f: f.stat().st_mtime, reverse=True,
-    )
+    # 进程内模式直接给出结果路径；子进程模式查找生成的 final_*.png，转为 JPG
+    if gen_result.get("final_image"):
+        anomaly_pngs = [Path(gen_result["final_image"])]
+    else:
+        anomaly_pngs = sorted(
+            [f for f in anomaly_out_dir.rglob("final_*.png") if f.is_file()],
+            key=lambda f: f.stat().st_mtime, reverse=True,
+        )
     if not anomaly_pngs:
         print(f"  ✗ 未找到生成的异常图")
         result["error"] = "no anomaly image generated"
@@ -438,6 +490,14 @@ def main():
                         help="仅处理指定 UUID（调试用）")
     parser.add_argument("--injection-point", type=int, default=None,
                         help="手动指定注入步（跳过 LLM 决策）")
+    parser.add_argument("--in-process", action="store_true",
+                        help="在当前进程内调用 run_pipeline_batch 生成（不再逐图启动子进程）")
+    parser.add_argument("--omni-worker", action="store_true",
+                        help="启动常驻 OmniParser 服务，所有生成任务共享一次模型加载")
+    parser.add_argument("--omni-worker-address", default=None,
+                        help="常驻 OmniParser 服务地址（Unix socket 路径或回环 host:port；复用已运行的服务需设置 OMNI_WORKER_AUTHKEY）")
+    parser.add_argument("--omni-device", default=None,
+                        help="常驻 OmniParser 服务运行设备 (cuda/cpu)")
 
     args = parser.parse_args()
 
@@ -489,40 +549,47 @@ def main():
     skip_count = 0
     fail_count = 0
 
-    for example in examples:
-        entry = match_mapping(example, mapping_entries)
-        if not entry:
-            print(f"\n{'─'*40}")
-            print(f"ℹ 未匹配到 mapping，使用自由模式: {example['query'][:40]}")
-            # 自由模式：entry 为 None，LLM 自动决策
-        elif not args.uuid:  # 非单例模式才打印匹配成功
-            pass  # 匹配成功，静默
-
-        try:
-            result = process_example(
-                example, entry, output_dir, decision_maker,
-                dry_run=args.dry_run,
-                gt_template_dir=args.gt_template_dir,
-                injection_point=args.injection_point,
-            )
-        except Exception as exc:
-            import traceback
-            print(f"  ✗ 异常: {exc}")
-            traceback.print_exc()
-            result = {
-                "uuid": example["uuid"],
-                "query": example["query"],
-                "error": str(exc),
-                "success": False,
-            }
-        results.append(result)
-
-        if result.get("injection_step", -1) < 0:
-            skip_count += 1
-        elif result.get("success", False):
-            success_count += 1
-        else:
-            fail_count += 1
+    use_omni_worker = (args.omni_worker or bool(args.omni_worker_address)) and not args.dry_run
+    with omni_worker_session(
+        enabled=use_omni_worker,
+        address=args.omni_worker_address,
+        device=args.omni_device,
+    ):
+        for example in examples:
+            entry = match_mapping(example, mapping_entries)
+            if not entry:
+                print(f"\n{'─'*40}")
+                print(f"ℹ 未匹配到 mapping，使用自由模式: {example['query'][:40]}")
+                # 自由模式：entry 为 None，LLM 自动决策
+            elif not args.uuid:  # 非单例模式才打印匹配成功
+                pass  # 匹配成功，静默
+
+            try:
+                result = process_example(
+                    example, entry, output_dir, decision_maker,
+                    dry_run=args.dry_run,
+                    gt_template_dir=args.gt_template_dir,
+                    injection_point=args.injection_point,
+                    in_process=args.in_process,
+                )
+            except Exception as exc:
+                import traceback
+                print(f"  ✗ 异常: {exc}")
+                traceback.print_exc()
+                result = {
+                    "uuid": example["uuid"],
+                    "query": example["query"],
+                    "error": str(exc),
+                    "success": False,
+                }
+            results.append(result)
+
+            if result.get("injection_step", -1) < 0:
+                skip_count += 1
+            elif result.get("success", False):
+                success_count += 1
+            else:
+                fail_count += 1
 
     # 汇总
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
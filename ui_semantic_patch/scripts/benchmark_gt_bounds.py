@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+benchmark_gt_bounds.py - gt_bounds 亮度分割连通域检测基准
+
+对 GT 模板库（默认 config.GT_TEMPLATES_DIR，即 data/gt-category）中的每张图片：
+1. 按 detect_dialog_by_brightness 的方式二值化
+2. 分别运行连通域标记实现（_find_connected_regions）与原逐像素
+   flood-fill 实现（_find_connected_regions_bfs），校验输出一致并统计耗时
+3. 统计完整 detect_dialog_by_brightness（含边界扩展）的耗时
+
+用法:
+  python benchmark_gt_bounds.py
+  python benchmark_gt_bounds.py --gt-dir ../../data/gt-category --repeat 3
+  python benchmark_gt_bounds.py --skip-bfs        # 只测新实现
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# 确保能导入 app 模块（将项目根目录加入 Python 路径）
+_project_root = Path(__file__).resolve().parents[1]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import config
+from app.stages import gt_bounds
+from app.stages.gt_bounds import (
+    _find_connected_regions,
+    detect_dialog_by_brightness,
+)
+
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.webp'}
+
+
+def _find_connected_regions_bfs(
+    binary: np.ndarray,
+    min_area: int = 100
+) -> List[Tuple[int, int, int, int]]:
+    """
+    逐像素 flood-fill 版本的 _find_connected_regions（gt_bounds 原实现）。
+
+    仅用于结果校验与性能对比。
+
+    Returns:
+        [(x, y, width, height), ...]
+    """
+    h, w = binary.shape
+    visited = np.zeros_like(binary, dtype=bool)
+    regions = []
+
+    # 下采样加速（对大图）
+    scale = 1
+    if h * w > 2_000_000:
+        scale = 2
+        binary = binary[::scale, ::scale]
+        visited = np.zeros_like(binary, dtype=bool)
+        h, w = binary.shape
+        min_area = min_area // (scale * scale)
+
+    # 扫描线找连通区域
+    for y_start in range(0, h, 4):  # 步长4加速扫描
+        for x_start in range(0, w, 4):
+            if binary[y_start, x_start] == 0 or visited[y_start, x_start]:
+                continue
+
+            # BFS 找连通区域
+            min_x, min_y = x_start, y_start
+            max_x, max_y = x_start, y_start
+            pixel_count = 0
+            stack = [(x_start, y_start)]
+            visited[y_start, x_start] = True
+
+            while stack:
+                cx, cy = stack.pop()
+                pixel_count += 1
+                min_x = min(min_x, cx)
+                min_y = min(min_y, cy)
+                max_x = max(max_x, cx)
+                max_y = max(max_y, cy)
+
+                for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                    nx, ny = cx + dx, cy + dy
+                    if 0 <= nx < w and 0 <= ny < h and not visited[ny, nx] and binary[ny, nx]:
+                        visited[ny, nx] = True
+                        stack.append((nx, ny))
+
+            region_w = max_x - min_x + 1
+            region_h = max_y - min_y + 1
+            if region_w * region_h >= min_area:
+                regions.append((
+                    min_x * scale,
+                    min_y * scale,
+                    region_w * scale,
+                    region_h * scale,
+                ))
+
+    return regions
+
+
+def _binarize(image_path: Path):
+    """与 detect_dialog_by_brightness 相同的二值化，返回 (binary, min_area)"""
+    with Image.open(image_path) as img:
+        gray = np.array(img.convert('RGB').convert('L'))
+    median_brightness = np.median(gray)
+    threshold = int(median_brightness + (255 - median_brightness) * 0.3)
+    threshold = max(threshold, 100)
+    binary = (gray > threshold).astype(np.uint8)
+    return binary, int(gray.size * 0.02)
+
+
+def _timed(func, *args, repeat: int = 1, **kwargs):
+    """运行 repeat 次，返回 (最后一次结果, 最短耗时)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='gt_bounds 连通域检测基准')
+    parser.add_argument('--gt-dir', default=str(config.GT_TEMPLATES_DIR),
+                        help='GT 模板目录（默认 config.GT_TEMPLATES_DIR）')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='每张图片重复次数，取最短耗时（默认 1）')
+    parser.add_argument('--skip-bfs', action='store_true',
+                        help='跳过原 flood-fill 实现（不做一致性校验）')
+    args = parser.parse_args()
+
+    gt_dir = Path(args.gt_dir)
+    images = sorted(p for p in gt_dir.rglob('*')
+                    if p.suffix.lower() in IMAGE_SUFFIXES and 'bounds_vis' not in p.parts)
+    if not images:
+        print(f"[ERROR] 未找到图片: {gt_dir}")
+        sys.exit(1)
+
+    backend = 'cv2' if gt_bounds.cv2 is not None else 'numpy-rle'
+    print("=" * 60)
+    print("gt_bounds 连通域检测基准")
+    print("=" * 60)
+    print(f"  目录: {gt_dir}")
+    print(f"  图片数: {len(images)}")
+    print(f"  标记后端: {backend}")
+
+    total_new = total_bfs = total_detect = 0.0
+    mismatches = []
+
+    for image_path in images:
+        binary, min_area = _binarize(image_path)
+        regions, t_new = _timed(_find_connected_regions, binary, min_area, repeat=args.repeat)
+        total_new += t_new
+        line = f"  {image_path.relative_to(gt_dir)}: 标记 {t_new * 1000:.1f}ms"
+
+        if not args.skip_bfs:
+            expected, t_bfs = _timed(_find_connected_regions_bfs, binary, min_area, repeat=args.repeat)
+            total_bfs += t_bfs
+            line += f", flood-fill {t_bfs * 1000:.1f}ms"
+            if regions != expected:
+                mismatches.append(image_path)
+                line += " ✗ 结果不一致"
+
+        # detect_dialog_by_brightness 自身的日志在基准中无意义，静默掉
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, t_detect = _timed(detect_dialog_by_brightness, str(image_path), repeat=args.repeat)
+        total_detect += t_detect
+        line += f", detect {t_detect * 1000:.1f}ms"
+        print(line)
+
+    print("\n" + "=" * 60)
+    print(f"  连通域标记合计: {total_new:.2f}s")
+    if not args.skip_bfs:
+        speedup = total_bfs / total_new if total_new else float('inf')
+        print(f"  flood-fill 合计: {total_bfs:.2f}s (加速 {speedup:.1f}x)")
+        if mismatches:
+            print(f"  ✗ {len(mismatches)} 张图片结果不一致:")
+            for path in mismatches:
+                print(f"    - {path}")
+        else:
+            print(f"  ✓ {len(images)} 张图片结果一致")
+    print(f"  detect_dialog_by_brightness 合计: {total_detect:.2f}s")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,13 @@ extract_page_spec.py — 从 utg.json 数据中抽取页面类型 Spec
     # 指定模型
     python extract_page_spec.py --data-dir path/to/utg_data --output-dir ./output --model gpt-4o
 
+    # Phase 1 每 30 个 step 一次 LLM 调用，8 批并发（中断后同一 --output-dir 重跑即续跑）
+    python extract_page_spec.py --data-dir path/to/utg_data --output-dir ./output \
+      --batch-size 30 --workers 8
+
+    # 增量：同一 --output-dir 重跑时只处理新增/变更的 UTG（状态见 spec_state.json）；--full 强制全量重建
+    python extract_page_spec.py --data-dir path/to/utg_data --output-dir ./output --full
+
 依赖:
     - 环境变量 VLM_API_KEY, VLM_API_URL, VLM_MODEL（或通过 .env 文件）
 """
@@ -107,6 +114,18 @@ def main():
         "--skip-phase", type=int, default=0, choices=[0, 1, 2],
         help="跳过前 N 个阶段（1=跳过Phase1, 2=跳过Phase1+2）",
     )
+    parser.add_argument(
+        "--batch-size", type=int, default=None,
+        help="Phase 1 每次 LLM 调用打包的 step 数（默认 PAGE_SPEC_BATCH_SIZE=20，1 为逐 step）",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Phase 1 并发批次数（默认 PAGE_SPEC_WORKERS=4）",
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="忽略输出目录中的增量状态（spec_state.json），全量重建",
+    )
     parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="详细日志",
@@ -149,6 +168,8 @@ def main():
         api_key=args.api_key,
         api_url=args.api_url,
         model=args.model,
+        batch_size=args.batch_size,
+        workers=args.workers,
     )
 
     result = extractor.run(
@@ -156,6 +177,7 @@ def main():
         output_dir=args.output_dir,
         skip_phase=args.skip_phase,
         resume=args.resume,
+        incremental=not args.full,
     )
 
     page_spec = result.get("page_spec")
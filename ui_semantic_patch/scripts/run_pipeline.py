@@ -18,7 +18,10 @@ import sys
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List
+
+if TYPE_CHECKING:
+    from app.core.schemas import RenderResult
 
 # 设置UTF-8编码输出（Windows兼容）
 if sys.platform == 'win32':
@@ -65,6 +68,7 @@ from app.core.schemas import (
 )
 from app.renderers.text_overlay import EditOp
 from app.utils.logging_utils import setup_logging
+from app.utils.http_client import get_http_client
 
 
 
@@ -219,6 +223,7 @@ def _load_edit_plan(plan_path: Optional[str]) -> Optional[List['EditOp']]:
 try:
     from app.stages.omni_vlm_fusion import omni_vlm_fusion
     from app.stages.omni_extractor import omni_to_ui_json
+    from app.stages.omni_cache import get_cache_stats
     OMNIPARSER_AVAILABLE = True
 except ImportError as e:
     print(f"[WARN] OmniParser 导入失败: {e}")
@@ -312,6 +317,64 @@ def ensure_meta_for_reference(
     return (ref_filename, str(ref_dir))
 
 
+# ==================== Stage 3 渲染器路由 ====================
+
+RENDERER_MAP = {
+    'dialog':            'PatchRenderer',
+    'area_loading':      'AreaLoadingRenderer',
+    'content_duplicate': 'ContentDuplicateRenderer',
+    'text_overlay':      'TextOverlayRenderer',
+    'modify_text':       'TextOverlayRenderer',
+    'modify_text_ai':    'TextOverlayRenderer',
+    'modify_text_ocr':   'TextOverlayRenderer',
+    'modify_text_e2e':   'TextOverlayRenderer',
+    'image_broken':      'ImageBrokenRenderer',
+}
+
+
+def _get_renderer(
+    anomaly_mode: str,
+    api_key: str,
+    vlm_api_url: str,
+    vlm_model: str,
+    fonts_dir: str = None,
+    renderer_cache: Optional[dict] = None,
+):
+    """
+    构造（或从缓存复用）anomaly_mode 对应的渲染器
+
+    缓存键包含渲染器类和初始化参数，同一类渲染器在批量任务间共享，
+    其内部懒加载的 OCR 引擎、VLM 客户端等也随之复用。
+    """
+    import app.renderers as renderers
+
+    renderer_name = RENDERER_MAP[anomaly_mode]
+    cache_key = (renderer_name, api_key, vlm_api_url, vlm_model, fonts_dir)
+    if renderer_cache is not None and cache_key in renderer_cache:
+        return renderer_cache[cache_key]
+
+    renderer_cls = getattr(renderers, renderer_name)
+    if renderer_name == 'ImageBrokenRenderer':
+        renderer = renderer_cls()
+    elif renderer_name == 'AreaLoadingRenderer':
+        renderer = renderer_cls(
+            api_key=api_key,
+            vlm_api_url=vlm_api_url,
+            vlm_model=vlm_model,
+        )
+    else:  # dialog / content_duplicate / text_overlay / modify_text*
+        renderer = renderer_cls(
+            api_key=api_key,
+            vlm_api_url=vlm_api_url,
+            vlm_model=vlm_model,
+            fonts_dir=fonts_dir,
+        )
+
+    if renderer_cache is not None:
+        renderer_cache[cache_key] = renderer
+    return renderer
+
+
 def run_pipeline(
     screenshot_path: str,
     instruction: str,
@@ -334,6 +397,7 @@ def run_pipeline(
     image_model: str = None,
     edit_plan_path: str = None,
     e2e_full_image: bool = False,
+    renderer_cache: Optional[dict] = None,
 ) -> dict:
     """
     执行异常场景生成流程
@@ -362,9 +426,10 @@ def run_pipeline(
         image_model: 图像生成模型选择 ('gen'=纯文生图, 'edit'=图像编辑, None=自动选择)
         edit_plan_path: 文本覆盖模式下的自定义 edit_plan JSON（跳过 VLM 规划）
         e2e_full_image: modify_text_e2e 模式下是否强制整图编辑（默认 False=粗裁剪区域编辑）
+        renderer_cache: 渲染器实例缓存（批量模式下跨任务复用渲染器及其内部客户端）
 
     Returns:
-        包含所有输出路径的字典
+        包含所有输出路径的字典；渲染成功时 'render_result' 为 RenderResult.model_dump()
 
     Note:
         - dialog 模式：使用 semantic_ai 渲染模式（DashScope/通用 AI 图像生成）
@@ -485,6 +550,10 @@ def run_pipeline(
 
         stage1_elapsed = time.time() - stage1_start
         results['timing']['stage1'] = round(stage1_elapsed, 2)
+        # 进程内累计的 Stage 1 缓存命中统计（批量/进程内模式下跨任务累计）
+        cache_stats = get_cache_stats()
+        results['timing']['stage1_cache_hits'] = cache_stats['hits']
+        results['timing']['stage1_cache_misses'] = cache_stats['misses']
         print(f"  ⏱ Stage 1 耗时: {stage1_elapsed:.2f}s")
 
         # ===== Stage 2: VLM 语义分组（单次调用） =====
@@ -502,7 +571,8 @@ def run_pipeline(
             vlm_model=structure_model,
             omni_device=omni_device,
             omni_components=omni_raw_result['components'],
-            output_dir=str(output_dir)
+            output_dir=str(output_dir),
+            ocr_layer=omni_raw_result.get('ocr')
         )
 
         # ===== Schema验证层（可选，失败时回退到原始dict）=====
@@ -583,62 +653,21 @@ def run_pipeline(
 
     try:
         from app.renderers.base import RenderResult
-        from app.renderers.area_loading import AreaLoadingRenderer
-        from app.renderers.content_duplicate import ContentDuplicateRenderer
-        from app.renderers.text_overlay import TextOverlayRenderer
-        from app.renderers.patch import PatchRenderer
-        from app.renderers.image_broken import ImageBrokenRenderer
         from PIL import Image
 
-        RENDERER_MAP = {
-            'dialog':            PatchRenderer,
-            'area_loading':      AreaLoadingRenderer,
-            'content_duplicate': ContentDuplicateRenderer,
-            'text_overlay':      TextOverlayRenderer,
-            'modify_text':       TextOverlayRenderer,
-            'modify_text_ai':    TextOverlayRenderer,
-            'modify_text_ocr':   TextOverlayRenderer,
-            'modify_text_e2e':   TextOverlayRenderer,
-            'image_broken':      ImageBrokenRenderer,
-        }
-
         if anomaly_mode not in RENDERER_MAP:
             print(f"  ✗ 不支持的 anomaly_mode: {anomaly_mode}")
             print(f"  支持的模式: {list(RENDERER_MAP.keys())}")
             return results
 
-        renderer_cls = RENDERER_MAP[anomaly_mode]
-
-        # 构造各渲染器通用初始化参数
-        if anomaly_mode == 'area_loading':
-            renderer = renderer_cls(
-                api_key=api_key,
-                vlm_api_url=vlm_api_url,
-                vlm_model=vlm_model,
-            )
-        elif anomaly_mode == 'content_duplicate':
-            renderer = renderer_cls(
-                api_key=api_key,
-                vlm_api_url=vlm_api_url,
-                vlm_model=vlm_model,
-                fonts_dir=fonts_dir,
-            )
-        elif anomaly_mode in ('text_overlay', 'modify_text', 'modify_text_ai', 'modify_text_ocr', 'modify_text_e2e'):
-            renderer = renderer_cls(
-                api_key=api_key,
-                vlm_api_url=vlm_api_url,
-                vlm_model=vlm_model,
-                fonts_dir=fonts_dir,
-            )
-        elif anomaly_mode == 'image_broken':
-            renderer = renderer_cls()
-        else:  # dialog
-            renderer = renderer_cls(
-                api_key=api_key,
-                vlm_api_url=vlm_api_url,
-                vlm_model=vlm_model,
-                fonts_dir=fonts_dir,
-            )
+        renderer = _get_renderer(
+            anomaly_mode,
+            api_key=api_key,
+            vlm_api_url=vlm_api_url,
+            vlm_model=vlm_model,
+            fonts_dir=fonts_dir,
+            renderer_cache=renderer_cache,
+        )
 
         # 读取截图 PIL 对象
         screenshot_img = Image.open(screenshot_path)
@@ -743,6 +772,9 @@ def run_pipeline(
         print(f"  ✓ 目标区域坐标: {coords_path.name}")
 
     # ===== 保存流水线元数据 =====
+    # 进程内累计的 HTTP 调用统计（按主机）
+    results['http_metrics'] = get_http_client().metrics()
+
     meta_path = output_dir / f"{screenshot_name}_pipeline_meta_{timestamp}.json"
     with open(meta_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
@@ -750,15 +782,22 @@ def run_pipeline(
 
     pipeline_elapsed = time.time() - pipeline_start
     results['timing']['total'] = round(pipeline_elapsed, 2)
+    results['render_result'] = render_result.model_dump()
 
     print("\n" + "=" * 60)
     print("✓ 流水线执行完成!")
     print("=" * 60)
     print("\n⏱ 耗时统计:")
     print(f"  [Stage 1]  OmniParser 粗检测:   {results['timing'].get('stage1', 0):.2f}s")
+    if 'stage1_cache_hits' in results['timing']:
+        print(f"  [Stage 1]  缓存命中/未命中:     "
+              f"{results['timing']['stage1_cache_hits']}/{results['timing']['stage1_cache_misses']}")
     print(f"  [Stage 2]  VLM 语义分组:        {results['timing'].get('stage2', 0):.2f}s")
     print(f"  [Stage 3]  异常渲染:            {results['timing'].get('stage3', 0):.2f}s")
     print(f"  [总计]     全流程耗时:          {pipeline_elapsed:.2f}s")
+    if results['http_metrics']:
+        print("\nHTTP 调用统计:")
+        get_http_client().print_metrics()
     print("\n中间结果:")
     if stage1_path:
         print(f"  [Stage 1]  OmniParser 原始检测: {stage1_path}")
@@ -780,6 +819,116 @@ def run_pipeline(
     return results
 
 
+def run_pipeline_batch(
+    jobs: List,
+    output_dir: str,
+    api_key: str = None,
+    api_url: str = None,
+    structure_model: str = None,
+    fonts_dir: str = None,
+    gt_dir: str = None,
+    vlm_api_url: str = None,
+    vlm_model: str = None,
+    omni_device: str = None,
+    visualize: bool = False,
+    stop_on_error: bool = False,
+    renderer_cache: Optional[dict] = None,
+) -> List['RenderResult']:
+    """
+    在当前解释器内批量执行流水线（替代逐图启动 run_pipeline.py 子进程）
+
+    所有任务共享 OmniParser 模型、渲染器实例及其内部客户端，
+    结果直接以 RenderResult 返回，无需再扫描输出目录查找 final_*.png。
+
+    Args:
+        jobs: PipelineJob 列表，或可构造 PipelineJob 的 dict 列表
+        output_dir: 批量输出根目录（未指定 job.output_dir 的任务写入 {序号}_{截图名}/）
+        stop_on_error: 任务失败时是否立即停止
+        renderer_cache: 渲染器缓存（多次调用 run_pipeline_batch 时传入同一 dict 以继续复用）
+        其余参数同 run_pipeline，未指定时使用环境变量配置
+
+    Returns:
+        与 jobs 一一对应的 RenderResult 列表。metadata 中包含：
+        success / error / job / timing / outputs / warnings
+    """
+    from app.core.schemas import PipelineJob, RenderResult
+
+    api_key = api_key or VLM_API_KEY
+    api_url = api_url or VLM_API_URL
+    structure_model = structure_model or STRUCTURE_MODEL
+    vlm_api_url = vlm_api_url or VLM_API_URL
+    vlm_model = vlm_model or VLM_MODEL
+
+    batch_root = Path(output_dir)
+    batch_root.mkdir(parents=True, exist_ok=True)
+    renderer_cache = renderer_cache if renderer_cache is not None else {}
+    render_results: List[RenderResult] = []
+
+    for index, raw_job in enumerate(jobs):
+        job = raw_job if isinstance(raw_job, PipelineJob) else PipelineJob(**raw_job)
+        job_output = Path(job.output_dir) if job.output_dir else (
+            batch_root / f"{index:03d}_{Path(job.screenshot_path).stem}"
+        )
+        job_meta = {
+            'success': False,
+            'job_index': index,
+            'job': job.model_dump(),
+            'output_dir': str(job_output),
+        }
+
+        try:
+            results = run_pipeline(
+                screenshot_path=job.screenshot_path,
+                instruction=job.instruction,
+                output_dir=str(job_output),
+                api_key=api_key,
+                api_url=api_url,
+                structure_model=structure_model,
+                fonts_dir=fonts_dir,
+                gt_dir=gt_dir,
+                vlm_api_url=vlm_api_url,
+                vlm_model=vlm_model,
+                reference_path=job.reference_path,
+                omni_device=omni_device,
+                visualize=visualize,
+                anomaly_mode=job.anomaly_mode,
+                target_component=job.target_component,
+                gt_category=job.gt_category,
+                gt_sample=job.gt_sample,
+                edit_plan_path=job.edit_plan_path,
+                e2e_full_image=job.e2e_full_image,
+                renderer_cache=renderer_cache,
+            )
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            job_meta['error'] = f"{type(e).__name__}: {e}"
+            render_results.append(RenderResult(metadata=job_meta))
+            if stop_on_error:
+                break
+            continue
+
+        job_meta['timing'] = results.get('timing', {})
+        job_meta['outputs'] = results.get('outputs', {})
+        if results.get('warnings'):
+            job_meta['warnings'] = results['warnings']
+
+        rendered = results.get('render_result')
+        if rendered and rendered.get('output_path'):
+            render_result = RenderResult(**rendered)
+            render_result.metadata.update(job_meta)
+            render_result.metadata['success'] = True
+        else:
+            job_meta['error'] = '未生成最终图片'
+            render_result = RenderResult(metadata=job_meta)
+        render_results.append(render_result)
+
+        if stop_on_error and not render_result.metadata.get('success'):
+            break
+
+    return render_results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='UI 异常场景生成流水线（简化模式）',
@@ -905,9 +1054,14 @@ Auto-Meta 模式示例（推荐！无需预先生成 meta.json）:
                         help='文本覆盖/modify_text 模式使用的 Edit Plan JSON（跳过 VLM 规划）')
     parser.add_argument('--e2e-full-image', action='store_true',
                         help='modify_text_e2e 模式下启用整图端到端编辑（默认关闭，默认使用指令驱动粗裁剪）')
+    parser.add_argument('--no-llm-cache', action='store_true',
+                        help='绕过 VLM/LLM 响应缓存（等价于 LLM_CACHE=0）')
 
     args = parser.parse_args()
 
+    if args.no_llm_cache:
+        os.environ['LLM_CACHE'] = '0'
+
     # 如果指定了 gt-category 和 gt-sample 但没有指定 gt-dir，自动使用默认路径
     if args.gt_category and args.gt_sample and not args.gt_dir:
         # 使用 config.py 中的配置
@@ -15,11 +15,9 @@ Usage:
 import argparse
 import json
 import os
-import io
-import base64
 from pathlib import Path
 from typing import Union, List, Dict, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
 # 默认启用 HuggingFace 离线模式（若外部已设置则尊重外部值）
 os.environ.setdefault("HF_HUB_OFFLINE", "1")
@@ -54,6 +52,10 @@ class ParseResult:
     elements: List[ParsedElement]
     annotated_image: Optional[Image.Image]
     image_size: tuple            # (width, height)
+    # OCR 文本行层（合并前的原始行）：[{'text', 'bbox': [x1, y1, x2, y2] 归一化坐标, 'confidence'}]
+    ocr_lines: List[Dict] = field(default_factory=list)
+    # 实际运行的 OCR 引擎：{'engine', 'lang', 'rec_model'}（PaddleOCR 失败回退时为 EasyOCR）
+    ocr_engine: Dict = field(default_factory=dict)
 
 
 class OmniParser:
@@ -152,12 +154,22 @@ class OmniParser:
             output_bb_format='xyxy',
             goal_filtering=None,
             easyocr_args={'paragraph': False, 'text_threshold': 0.9},
-            use_paddleocr=use_paddleocr
+            use_paddleocr=use_paddleocr,
+            return_confidence=True
         )
-        text, ocr_bbox = ocr_bbox_rslt
+        text, ocr_bbox, ocr_conf, ocr_engine = ocr_bbox_rslt
+        ocr_lines = [
+            {
+                'text': t,
+                'bbox': [b[0] / w, b[1] / h, b[2] / w, b[3] / h],
+                'confidence': round(c, 4),
+            }
+            for t, b, c in zip(text, ocr_bbox, ocr_conf)
+        ]
 
         # Step 2: 图标检测 + 语义生成
-        encoded_image, label_coordinates, parsed_content_list = get_som_labeled_img(
+        # 不需要标注图时跳过绘制；需要时直接取数组，避免 PNG/base64 编解码往返
+        annotated_frame, label_coordinates, parsed_content_list = get_som_labeled_img(
             image,
             self.yolo_model,
             BOX_TRESHOLD=box_threshold,
@@ -169,7 +181,8 @@ class OmniParser:
             use_local_semantics=use_local_semantics,
             iou_threshold=iou_threshold,
             scale_img=False,
-            batch_size=128
+            batch_size=128,
+            output_image='array' if return_annotated_image else None
         )
 
         # 构建结果
@@ -184,15 +197,16 @@ class OmniParser:
                 source=item.get('source', '')
             ))
 
-        # 解码标注图片
         annotated_image = None
         if return_annotated_image:
-            annotated_image = Image.open(io.BytesIO(base64.b64decode(encoded_image)))
+            annotated_image = Image.fromarray(annotated_frame)
 
         return ParseResult(
             elements=elements,
             annotated_image=annotated_image,
-            image_size=(w, h)
+            image_size=(w, h),
+            ocr_lines=ocr_lines,
+            ocr_engine=ocr_engine
         )
 
     def parse_to_dict(self, image_source: Union[str, Image.Image], **kwargs) -> dict:
@@ -0,0 +1,168 @@
+"""
+Shared, lazily-initialised OCR engines.
+
+Stage 1 (check_ocr_box) and TextOverlayRenderer's modify_text refinement used to
+build their own PaddleOCR instances, and check_ocr_box created an EasyOCR reader
+even when PaddleOCR was selected. This module keeps one engine per configuration
+per process, created on first use only, and serialises calls to each engine
+(PaddleOCR / EasyOCR predictors are not thread-safe).
+
+Heavy dependencies (paddleocr, easyocr, torch) are imported lazily so that
+importing this module is cheap.
+
+Usage:
+    from util.ocr_service import paddle_ocr, get_paddle_ocr
+
+    get_paddle_ocr(det_model_dir=..., rec_model_dir=..., lang='en')   # optional warm-up
+    items = paddle_ocr(image_np, region=(x1, y1, x2, y2), det_model_dir=..., rec_model_dir=...)
+    for points, text, conf in items: ...
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_engines: Dict[tuple, object] = {}
+_engine_locks: Dict[tuple, threading.Lock] = {}
+# one build lock per configuration so concurrent first calls construct the engine once
+_build_locks: Dict[tuple, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _use_gpu() -> bool:
+    import torch
+    return torch.cuda.is_available()
+
+
+def _get_engine(key: tuple, factory):
+    with _registry_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine, _engine_locks[key]
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    # build outside the registry lock (model loading can take seconds) so other
+    # configurations are not blocked; threads waiting for this key re-check afterwards
+    with build_lock:
+        with _registry_lock:
+            engine = _engines.get(key)
+            if engine is not None:
+                return engine, _engine_locks[key]
+        engine = factory()
+        with _registry_lock:
+            _engines[key] = engine
+            _engine_locks[key] = threading.Lock()
+            return engine, _engine_locks[key]
+
+
+def _dir_key(path) -> str:
+    # resolve so that callers spelling the same directory differently share one engine
+    return str(Path(path).resolve()) if path else ''
+
+
+def _paddle_key(det_model_dir, rec_model_dir, cls_model_dir, lang) -> tuple:
+    return ('paddle', _dir_key(det_model_dir), _dir_key(rec_model_dir), _dir_key(cls_model_dir), lang)
+
+
+def get_paddle_ocr(det_model_dir=None, rec_model_dir=None, cls_model_dir=None, lang='en'):
+    """Return the shared PaddleOCR instance for this model configuration (created on first use)."""
+    def factory():
+        from paddleocr import PaddleOCR
+        kwargs = dict(lang=lang, use_angle_cls=False, use_gpu=_use_gpu(), show_log=False)
+        if det_model_dir:
+            kwargs['det_model_dir'] = str(det_model_dir)
+        if rec_model_dir:
+            kwargs['rec_model_dir'] = str(rec_model_dir)
+        if cls_model_dir:
+            kwargs['cls_model_dir'] = str(cls_model_dir)
+        return PaddleOCR(**kwargs)
+
+    engine, _ = _get_engine(_paddle_key(det_model_dir, rec_model_dir, cls_model_dir, lang), factory)
+    return engine
+
+
+def get_easyocr_reader(model_storage_directory=None, user_network_directory=None, langs=('en',)):
+    """Return the shared EasyOCR reader (created on first use)."""
+    def factory():
+        import easyocr
+        kwargs = dict(gpu=_use_gpu())
+        if model_storage_directory:
+            kwargs.update(
+                model_storage_directory=str(model_storage_directory),
+                user_network_directory=str(user_network_directory),
+                download_enabled=False,
+            )
+        return easyocr.Reader(list(langs), **kwargs)
+
+    key = ('easyocr', str(model_storage_directory or ''), str(user_network_directory or ''), tuple(langs))
+    engine, _ = _get_engine(key, factory)
+    return engine
+
+
+def _crop(image_np: np.ndarray, region: Optional[Tuple[int, int, int, int]]):
+    if region is None:
+        return image_np, (0, 0)
+    h, w = image_np.shape[:2]
+    x1, y1, x2, y2 = (int(v) for v in region)
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(w, x2), min(h, y2)
+    return image_np[y1:y2, x1:x2], (x1, y1)
+
+
+def paddle_ocr(
+    image_np: np.ndarray,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    image_coords: bool = False,
+    det_model_dir=None,
+    rec_model_dir=None,
+    cls_model_dir=None,
+    lang='en',
+) -> List[Tuple[list, str, float]]:
+    """
+    Run the shared PaddleOCR engine on an image or on a crop of it.
+
+    Args:
+        image_np: RGB image array (H, W, 3)
+        region: optional (x1, y1, x2, y2) crop; only this region is OCR'd
+        image_coords: return points in full-image coordinates instead of crop coordinates
+
+    Returns:
+        [(points, text, confidence), ...] where points is a 4-point quad
+    """
+    key = _paddle_key(det_model_dir, rec_model_dir, cls_model_dir, lang)
+    get_paddle_ocr(det_model_dir, rec_model_dir, cls_model_dir, lang)
+    engine, lock = _engines[key], _engine_locks[key]
+
+    crop, (ox, oy) = _crop(image_np, region)
+    if crop.size == 0:
+        return []
+    with lock:
+        result = engine.ocr(np.ascontiguousarray(crop), cls=False)
+    if not result or not result[0]:
+        return []
+
+    items = []
+    for points, (text, conf) in result[0]:
+        if image_coords and (ox or oy):
+            points = [[p[0] + ox, p[1] + oy] for p in points]
+        items.append((points, text, conf))
+    return items
+
+
+def easyocr_readtext(image_np: np.ndarray, reader=None, **easyocr_args):
+    """Run the shared EasyOCR reader with per-reader locking."""
+    if reader is None:
+        reader = get_easyocr_reader()
+    with _registry_lock:
+        lock = next((_engine_locks[k] for k, v in _engines.items() if v is reader), None)
+    if lock is None:
+        return reader.readtext(image_np, **easyocr_args)
+    with lock:
+        return reader.readtext(image_np, **easyocr_args)
+
+
+def loaded_engines() -> List[tuple]:
+    """Configurations of the engines initialised so far (for diagnostics)."""
+    with _registry_lock:
+        return list(_engines.keys())
@@ -1,14 +1,15 @@
 import io
 import base64
+import hashlib
 import time
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 import cv2
 import numpy as np
 import torch
-import easyocr
-from paddleocr import PaddleOCR
 from PIL import Image
 from typing import Tuple, List, Union
 from torchvision.ops import box_convert
@@ -17,9 +18,7 @@ import torchvision.transforms as T
 import supervision as sv
 
 from util.box_annotator import BoxAnnotator
-
-# 检测 GPU 可用性
-_use_gpu = torch.cuda.is_available()
+from util import ocr_service
 
 _OMNIPARSER_ROOT = Path(__file__).resolve().parents[1]
 _OCR_ROOT = _OMNIPARSER_ROOT / "weights" / "ocr"
@@ -30,8 +29,12 @@ _PADDLE_REC_MODEL_DIR = _OCR_ROOT / "paddle" / "rec" / "en_PP-OCRv4_rec_infer"
 _PADDLE_CLS_MODEL_DIR = _OCR_ROOT / "paddle" / "cls" / "ch_ppocr_mobile_v2.0_cls_infer"
 _ALLOW_OCR_DOWNLOAD = os.environ.get("OMNIPARSER_ALLOW_OCR_DOWNLOAD", "0") == "1"
 
-_reader = None
-_paddle_ocr = None
+# Florence2 图标描述：增量解码（KV cache）、CPU 精度、按 64x64 裁剪图哈希记忆化描述
+# OMNIPARSER_CAPTION_KV_CACHE=0      关闭 generate 的 KV cache（兼容个别 transformers 版本）
+# OMNIPARSER_CPU_PRECISION           CPU 推理精度：fp32（默认）/ bf16 / int8（Linear 动态量化）
+# OMNIPARSER_CAPTION_CACHE_SIZE      图标描述记忆化条数（默认 4096，0 关闭）
+_CAPTION_KV_CACHE = os.environ.get("OMNIPARSER_CAPTION_KV_CACHE", "1") != "0"
+_CPU_PRECISIONS = ("fp32", "bf16", "int8")
 
 
 def _require_paths_exist(paths: List[Path], message_prefix: str):
@@ -45,13 +48,9 @@ def _require_paths_exist(paths: List[Path], message_prefix: str):
 
 
 def _get_easyocr_reader():
-    global _reader
-    if _reader is not None:
-        return _reader
-
+    # engines live in util.ocr_service so they are created lazily and shared per process
     if _ALLOW_OCR_DOWNLOAD:
-        _reader = easyocr.Reader(['en'], gpu=_use_gpu)
-        return _reader
+        return ocr_service.get_easyocr_reader()
 
     _require_paths_exist(
         [
@@ -61,24 +60,16 @@ def _get_easyocr_reader():
         "[EasyOCR]",
     )
     _EASYOCR_USER_NETWORK_DIR.mkdir(parents=True, exist_ok=True)
-    _reader = easyocr.Reader(
-        ['en'],
-        gpu=_use_gpu,
-        model_storage_directory=str(_EASYOCR_MODEL_DIR),
-        user_network_directory=str(_EASYOCR_USER_NETWORK_DIR),
-        download_enabled=False,
+    return ocr_service.get_easyocr_reader(
+        model_storage_directory=_EASYOCR_MODEL_DIR,
+        user_network_directory=_EASYOCR_USER_NETWORK_DIR,
     )
-    return _reader
 
 
-def _get_paddle_ocr():
-    global _paddle_ocr
-    if _paddle_ocr is not None:
-        return _paddle_ocr
-
+def _paddle_model_dirs():
+    """(det, rec, cls) model dirs for the Stage 1 PaddleOCR engine; all None when auto-download is allowed"""
     if _ALLOW_OCR_DOWNLOAD:
-        _paddle_ocr = PaddleOCR(lang='en', use_angle_cls=False, use_gpu=_use_gpu, show_log=False)
-        return _paddle_ocr
+        return None, None, None
 
     _require_paths_exist(
         [
@@ -91,16 +82,16 @@ def _get_paddle_ocr():
         ],
         "[PaddleOCR]",
     )
-    _paddle_ocr = PaddleOCR(
-        lang='en',
-        use_angle_cls=False,
-        use_gpu=_use_gpu,
-        show_log=False,
-        det_model_dir=str(_PADDLE_DET_MODEL_DIR),
-        rec_model_dir=str(_PADDLE_REC_MODEL_DIR),
-        cls_model_dir=str(_PADDLE_CLS_MODEL_DIR),
-    )
-    return _paddle_ocr
+    return _PADDLE_DET_MODEL_DIR, _PADDLE_REC_MODEL_DIR, _PADDLE_CLS_MODEL_DIR
+
+
+# Stage 1 EasyOCR reader languages (see _get_easyocr_reader)
+_EASYOCR_ENGINE_INFO = {'engine': 'EasyOCR', 'lang': 'en', 'rec_model': None}
+
+
+def _get_paddle_ocr():
+    det_model_dir, rec_model_dir, cls_model_dir = _paddle_model_dirs()
+    return ocr_service.get_paddle_ocr(det_model_dir, rec_model_dir, cls_model_dir, lang='en')
 
 
 def _resolve_local_model_path(model_name_or_path):
@@ -110,9 +101,26 @@ def _resolve_local_model_path(model_name_or_path):
     return path.resolve()
 
 
-def get_caption_model_processor(model_name, model_name_or_path="Salesforce/blip2-opt-2.7b", device=None):
+def _resolve_cpu_precision(cpu_precision=None):
+    precision = (cpu_precision or os.environ.get("OMNIPARSER_CPU_PRECISION", "fp32")).strip().lower()
+    if precision not in _CPU_PRECISIONS:
+        print(f"[OmniParser] Unknown OMNIPARSER_CPU_PRECISION={precision}, falling back to fp32")
+        precision = "fp32"
+    return precision
+
+
+def _apply_cpu_precision(model, precision):
+    """int8: 对 Linear 层做动态量化（权重 int8，激活运行时量化）"""
+    if precision == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def get_caption_model_processor(model_name, model_name_or_path="Salesforce/blip2-opt-2.7b", device=None, cpu_precision=None):
     if not device:
         device = "cuda" if torch.cuda.is_available() else "cpu"
+    precision = _resolve_cpu_precision(cpu_precision) if device == 'cpu' else None
+    cpu_dtype = torch.bfloat16 if precision == "bf16" else torch.float32
     model_path = _resolve_local_model_path(model_name_or_path)
     if not model_path.exists():
         raise FileNotFoundError(f"Local caption model directory not found: {model_path}")
@@ -121,8 +129,9 @@ def get_caption_model_processor(model_name, model_name_or_path="Salesforce/blip2
         processor = Blip2Processor.from_pretrained(model_path, local_files_only=True)
         if device == 'cpu':
             model = Blip2ForConditionalGeneration.from_pretrained(
-            model_path, device_map=None, torch_dtype=torch.float32, local_files_only=True
-        ) 
+            model_path, device_map=None, torch_dtype=cpu_dtype, local_files_only=True
+        )
+            model = _apply_cpu_precision(model, precision)
         else:
             model = Blip2ForConditionalGeneration.from_pretrained(
             model_path, device_map=None, torch_dtype=torch.float16, local_files_only=True
@@ -137,11 +146,12 @@ def get_caption_model_processor(model_name, model_name_or_path="Salesforce/blip2
         if device == 'cpu':
             model = AutoModelForCausalLM.from_pretrained(
                 model_path,
-                torch_dtype=torch.float32,
+                torch_dtype=cpu_dtype,
                 trust_remote_code=True,
                 attn_implementation="eager",
                 local_files_only=True,
             )
+            model = _apply_cpu_precision(model, precision)
         else:
             model = AutoModelForCausalLM.from_pretrained(
                 model_path,
@@ -150,7 +160,52 @@ def get_caption_model_processor(model_name, model_name_or_path="Salesforce/blip2
                 attn_implementation="eager",
                 local_files_only=True,
             ).to(device)
-    return {'model': model.to(device), 'processor': processor}
+    if precision and precision != "fp32":
+        print(f"[OmniParser] Caption model CPU precision: {precision}")
+    # precision identifies the weights' numeric variant so memoised captions are not shared across precisions
+    return {'model': model.to(device), 'processor': processor, 'precision': precision or 'fp16'}
+
+
+class _CaptionCache:
+    """图标描述 LRU 缓存，键为 (模型, prompt, 64x64 裁剪图像素哈希)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            caption = self._entries.get(key)
+            if caption is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return caption
+
+    def put(self, key, caption):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = caption
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+_caption_cache = _CaptionCache(int(os.environ.get("OMNIPARSER_CAPTION_CACHE_SIZE", "4096")))
+
+
+def get_caption_cache_stats():
+    """图标描述记忆化命中统计"""
+    return _caption_cache.stats()
 
 
 def get_yolo_model(model_path):
@@ -169,6 +224,7 @@ def get_parsed_content_icon(filtered_boxes, starting_idx, image_source, caption_
     else:
         non_ocr_boxes = filtered_boxes
     croped_pil_image = []
+    crop_hashes = []
     for i, coord in enumerate(non_ocr_boxes):
         try:
             xmin, xmax = int(coord[0]*image_source.shape[1]), int(coord[2]*image_source.shape[1])
@@ -176,6 +232,7 @@ def get_parsed_content_icon(filtered_boxes, starting_idx, image_source, caption_
             cropped_image = image_source[ymin:ymax, xmin:xmax, :]
             cropped_image = cv2.resize(cropped_image, (64, 64))
             croped_pil_image.append(to_pil(cropped_image))
+            crop_hashes.append(hashlib.sha1(np.ascontiguousarray(cropped_image).tobytes()).hexdigest())
         except:
             continue
 
@@ -185,26 +242,47 @@ def get_parsed_content_icon(filtered_boxes, starting_idx, image_source, caption_
             prompt = "<CAPTION>"
         else:
             prompt = "The image shows"
-    
+
+    # 相同的 64x64 裁剪图（Tab 栏、返回箭头、搜索图标等）只描述一次：
+    # 先查进程内缓存，剩余的按哈希去重后再送入模型
+    precision = caption_model_processor.get('precision')
+    keys = [(model.config.name_or_path, precision, prompt, h) for h in crop_hashes]
+    captions = [_caption_cache.get(key) for key in keys]
+    pending = OrderedDict()
+    for idx, (key, caption) in enumerate(zip(keys, captions)):
+        if caption is None:
+            pending.setdefault(key, []).append(idx)
+    pending_keys = list(pending.keys())
+    pending_images = [croped_pil_image[indices[0]] for indices in pending.values()]
+
     generated_texts = []
     device = model.device
-    for i in range(0, len(croped_pil_image), batch_size):
+    # bf16 CPU 模式下输入需与权重同精度（int8 动态量化模型仍接收 fp32 输入）
+    input_dtype = torch.float16 if model.device.type == 'cuda' else model.dtype
+    for i in range(0, len(pending_images), batch_size):
         start = time.time()
-        batch = croped_pil_image[i:i+batch_size]
+        batch = pending_images[i:i+batch_size]
         t1 = time.time()
         if model.device.type == 'cuda':
-            inputs = processor(images=batch, text=[prompt]*len(batch), return_tensors="pt", do_resize=False).to(device=device, dtype=torch.float16)
+            inputs = processor(images=batch, text=[prompt]*len(batch), return_tensors="pt", do_resize=False).to(device=device, dtype=input_dtype)
+        elif input_dtype != torch.float32:
+            inputs = processor(images=batch, text=[prompt]*len(batch), return_tensors="pt").to(device=device, dtype=input_dtype)
         else:
             inputs = processor(images=batch, text=[prompt]*len(batch), return_tensors="pt").to(device=device)
         if 'florence' in model.config.name_or_path:
-            generated_ids = model.generate(input_ids=inputs["input_ids"],pixel_values=inputs["pixel_values"],max_new_tokens=20,num_beams=1, do_sample=False, use_cache=False)
+            generated_ids = model.generate(input_ids=inputs["input_ids"],pixel_values=inputs["pixel_values"],max_new_tokens=20,num_beams=1, do_sample=False, use_cache=_CAPTION_KV_CACHE)
         else:
             generated_ids = model.generate(**inputs, max_length=100, num_beams=5, no_repeat_ngram_size=2, early_stopping=True, num_return_sequences=1) # temperature=0.01, do_sample=True,
         generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)
         generated_text = [gen.strip() for gen in generated_text]
         generated_texts.extend(generated_text)
-    
-    return generated_texts
+
+    for key, text in zip(pending_keys, generated_texts):
+        _caption_cache.put(key, text)
+        for idx in pending[key]:
+            captions[idx] = text
+
+    return captions
 
 
 
@@ -260,137 +338,155 @@ def get_parsed_content_icon_phi3v(filtered_boxes, ocr_bbox, image_source, captio
 
     return generated_texts
 
-def remove_overlap(boxes, iou_threshold, ocr_bbox=None):
-    assert ocr_bbox is None or isinstance(ocr_bbox, List)
+def _pairwise_overlap(boxes1, boxes2):
+    """
+    两组 xyxy 框的两两交集面积矩阵及各自面积（与逐对计算的浮点运算顺序一致）
+
+    Returns:
+        inter: (len(boxes1), len(boxes2))
+        area1: (len(boxes1),)
+        area2: (len(boxes2),)
+    """
+    b1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    b2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    area1 = (b1[:, 2] - b1[:, 0]) * (b1[:, 3] - b1[:, 1])
+    area2 = (b2[:, 2] - b2[:, 0]) * (b2[:, 3] - b2[:, 1])
+    x1 = np.maximum(b1[:, None, 0], b2[None, :, 0])
+    y1 = np.maximum(b1[:, None, 1], b2[None, :, 1])
+    x2 = np.minimum(b1[:, None, 2], b2[None, :, 2])
+    y2 = np.minimum(b1[:, None, 3], b2[None, :, 3])
+    inter = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+    return inter, area1, area2
+
+
+def _overlap_iou(inter, area1, area2):
+    """max(IoU, 交集/面积1, 交集/面积2)；任一面积非正时只取 IoU"""
+    a1 = area1[:, None]
+    a2 = area2[None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iou = inter / (a1 + a2 - inter + 1e-6)
+        both_positive = (a1 > 0) & (a2 > 0)
+        ratio1 = np.where(both_positive, inter / a1, 0)
+        ratio2 = np.where(both_positive, inter / a2, 0)
+    return np.maximum(iou, np.maximum(ratio1, ratio2))
+
+
+def _keep_smaller_boxes(boxes, iou_threshold):
+    """
+    YOLO 框两两去重：与任一其它框 IoU > 阈值且面积更大的框被丢弃（保留较小的框）
+
+    Returns:
+        (valid 布尔数组, 两两交集矩阵, 面积数组)
+    """
+    inter, area, _ = _pairwise_overlap(boxes, boxes)
+    n = len(area)
+    if n == 0:
+        return np.zeros(0, dtype=bool), inter, area
+    suppress = (_overlap_iou(inter, area, area) > iou_threshold) & (area[:, None] > area[None, :])
+    np.fill_diagonal(suppress, False)
+    return ~suppress.any(axis=1), inter, area
 
-    def box_area(box):
-        return (box[2] - box[0]) * (box[3] - box[1])
-
-    def intersection_area(box1, box2):
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
-        return max(0, x2 - x1) * max(0, y2 - y1)
-
-    def IoU(box1, box2):
-        intersection = intersection_area(box1, box2)
-        union = box_area(box1) + box_area(box2) - intersection + 1e-6
-        if box_area(box1) > 0 and box_area(box2) > 0:
-            ratio1 = intersection / box_area(box1)
-            ratio2 = intersection / box_area(box2)
-        else:
-            ratio1, ratio2 = 0, 0
-        return max(intersection / union, ratio1, ratio2)
 
-    def is_inside(box1, box2):
-        # return box1[0] >= box2[0] and box1[1] >= box2[1] and box1[2] <= box2[2] and box1[3] <= box2[3]
-        intersection = intersection_area(box1, box2)
-        ratio1 = intersection / box_area(box1)
-        return ratio1 > 0.95
+def remove_overlap(boxes, iou_threshold, ocr_bbox=None):
+    assert ocr_bbox is None or isinstance(ocr_bbox, List)
 
     boxes = boxes.tolist()
     filtered_boxes = []
     if ocr_bbox:
         filtered_boxes.extend(ocr_bbox)
-    # print('ocr_bbox!!!', ocr_bbox)
-    for i, box1 in enumerate(boxes):
-        # if not any(IoU(box1, box2) > iou_threshold and box_area(box1) > box_area(box2) for j, box2 in enumerate(boxes) if i != j):
-        is_valid_box = True
-        for j, box2 in enumerate(boxes):
-            # keep the smaller box
-            if i != j and IoU(box1, box2) > iou_threshold and box_area(box1) > box_area(box2):
-                is_valid_box = False
-                break
-        if is_valid_box:
-            # add the following 2 lines to include ocr bbox
-            if ocr_bbox:
-                # only add the box if it does not overlap with any ocr bbox
-                if not any(IoU(box1, box3) > iou_threshold and not is_inside(box1, box3) for k, box3 in enumerate(ocr_bbox)):
-                    filtered_boxes.append(box1)
-            else:
-                filtered_boxes.append(box1)
+    if not boxes:
+        return torch.tensor(filtered_boxes)
+
+    valid, _, _ = _keep_smaller_boxes(boxes, iou_threshold)
+    if ocr_bbox:
+        # only add the box if it does not overlap with any ocr bbox (unless it lies inside that ocr bbox)
+        inter, area_box, area_ocr = _pairwise_overlap(boxes, ocr_bbox)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inside = inter / area_box[:, None] > 0.95
+        conflict = ((_overlap_iou(inter, area_box, area_ocr) > iou_threshold) & ~inside).any(axis=1)
+        valid &= ~conflict
+    filtered_boxes.extend(box for box, keep in zip(boxes, valid) if keep)
     return torch.tensor(filtered_boxes)
 
 
+def _ocr_elem_key(elem):
+    """OCR 元素的可哈希等价键（与 dict == 的判等一致）"""
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in elem.items()))
+
+
 def remove_overlap_new(boxes, iou_threshold, ocr_bbox=None):
     '''
     ocr_bbox format: [{'type': 'text', 'bbox':[x,y], 'interactivity':False, 'content':str }, ...]
     boxes format: [{'type': 'icon', 'bbox':[x,y], 'interactivity':True, 'content':None }, ...]
 
+    Pairwise IoU / containment matrices are computed once with NumPy; the keep/merge
+    semantics match the original nested-loop implementation:
+    - a YOLO box is dropped if it overlaps (IoU > iou_threshold) a smaller YOLO box
+    - scanning OCR boxes in order, OCR boxes inside the icon (>80%) are absorbed: their
+      text becomes the icon label and they are removed from the output
+    - the scan stops at the first OCR box that contains the icon (>80%); the icon is then
+      dropped (OCR boxes absorbed before that point stay removed)
     '''
     assert ocr_bbox is None or isinstance(ocr_bbox, List)
 
-    def box_area(box):
-        return (box[2] - box[0]) * (box[3] - box[1])
-
-    def intersection_area(box1, box2):
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
-        return max(0, x2 - x1) * max(0, y2 - y1)
-
-    def IoU(box1, box2):
-        intersection = intersection_area(box1, box2)
-        union = box_area(box1) + box_area(box2) - intersection + 1e-6
-        if box_area(box1) > 0 and box_area(box2) > 0:
-            ratio1 = intersection / box_area(box1)
-            ratio2 = intersection / box_area(box2)
-        else:
-            ratio1, ratio2 = 0, 0
-        return max(intersection / union, ratio1, ratio2)
-
-    def is_inside(box1, box2):
-        # return box1[0] >= box2[0] and box1[1] >= box2[1] and box1[2] <= box2[2] and box1[3] <= box2[3]
-        intersection = intersection_area(box1, box2)
-        ratio1 = intersection / box_area(box1)
-        return ratio1 > 0.80
-
-    # boxes = boxes.tolist()
     filtered_boxes = []
     if ocr_bbox:
         filtered_boxes.extend(ocr_bbox)
-    # print('ocr_bbox!!!', ocr_bbox)
-    for i, box1_elem in enumerate(boxes):
-        box1 = box1_elem['bbox']
-        is_valid_box = True
-        for j, box2_elem in enumerate(boxes):
-            # keep the smaller box
-            box2 = box2_elem['bbox']
-            if i != j and IoU(box1, box2) > iou_threshold and box_area(box1) > box_area(box2):
-                is_valid_box = False
-                break
-        if is_valid_box:
-            if ocr_bbox:
-                # keep yolo boxes + prioritize ocr label
-                box_added = False
-                ocr_labels = ''
-                for box3_elem in ocr_bbox:
-                    if not box_added:
-                        box3 = box3_elem['bbox']
-                        if is_inside(box3, box1): # ocr inside icon
-                            # box_added = True
-                            # delete the box3_elem from ocr_bbox
-                            try:
-                                # gather all ocr labels
-                                ocr_labels += box3_elem['content'] + ' '
-                                filtered_boxes.remove(box3_elem)
-                            except:
-                                continue
-                            # break
-                        elif is_inside(box1, box3): # icon inside ocr, don't added this icon box, no need to check other ocr bbox bc no overlap between ocr bbox, icon can only be in one ocr box
-                            box_added = True
-                            break
-                        else:
-                            continue
-                if not box_added:
-                    if ocr_labels:
-                        filtered_boxes.append({'type': 'icon', 'bbox': box1_elem['bbox'], 'interactivity': True, 'content': ocr_labels, 'source':'box_yolo_content_ocr'})
-                    else:
-                        filtered_boxes.append({'type': 'icon', 'bbox': box1_elem['bbox'], 'interactivity': True, 'content': None, 'source':'box_yolo_content_yolo'})
-            else:
-                filtered_boxes.append(box1)
+    if not boxes:
+        return filtered_boxes
+
+    icon_bboxes = [elem['bbox'] for elem in boxes]
+    valid, _, _ = _keep_smaller_boxes(icon_bboxes, iou_threshold)
+
+    if not ocr_bbox:
+        filtered_boxes.extend(elem['bbox'] for elem, keep in zip(boxes, valid) if keep)
+        return filtered_boxes
+
+    inter, area_icon, area_ocr = _pairwise_overlap(icon_bboxes, [elem['bbox'] for elem in ocr_bbox])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ocr_in_icon = inter / area_ocr[None, :] > 0.80   # (icon, ocr)
+        icon_in_ocr = inter / area_icon[:, None] > 0.80
+    # 第一个"图标在 OCR 框内"（且 OCR 框不在图标内）的位置即扫描终点
+    stops = icon_in_ocr & ~ocr_in_icon
+
+    # list.remove 总是删除第一个相等的元素：按等价键记录每类已删除的个数
+    ocr_keys = [_ocr_elem_key(elem) for elem in ocr_bbox]
+    counts = {}
+    for key in ocr_keys:
+        counts[key] = counts.get(key, 0) + 1
+    removed = {}
+
+    icons = []
+    for i in np.flatnonzero(valid):
+        stop_at = np.flatnonzero(stops[i])
+        end = stop_at[0] if len(stop_at) else len(ocr_bbox)
+        ocr_labels = ''
+        for k in np.flatnonzero(ocr_in_icon[i, :end]):
+            try:
+                # gather all ocr labels
+                ocr_labels += ocr_bbox[k]['content'] + ' '
+            except TypeError:
+                continue
+            key = ocr_keys[k]
+            if removed.get(key, 0) < counts[key]:
+                removed[key] = removed.get(key, 0) + 1
+        if len(stop_at):
+            # icon inside ocr, don't add this icon box
+            continue
+        box1_elem = boxes[i]
+        if ocr_labels:
+            icons.append({'type': 'icon', 'bbox': box1_elem['bbox'], 'interactivity': True, 'content': ocr_labels, 'source':'box_yolo_content_ocr'})
+        else:
+            icons.append({'type': 'icon', 'bbox': box1_elem['bbox'], 'interactivity': True, 'content': None, 'source':'box_yolo_content_yolo'})
+
+    filtered_boxes = []
+    skipped = {}
+    for elem, key in zip(ocr_bbox, ocr_keys):
+        if skipped.get(key, 0) < removed.get(key, 0):
+            skipped[key] = skipped.get(key, 0) + 1
+            continue
+        filtered_boxes.append(elem)
+    filtered_boxes.extend(icons)
     return filtered_boxes # torch.tensor(filtered_boxes)
 
 
@@ -489,12 +585,17 @@ def int_box_area(box, w, h):
     area = (int_box[2] - int_box[0]) * (int_box[3] - int_box[1])
     return area
 
-def get_som_labeled_img(image_source: Union[str, Image.Image], model=None, BOX_TRESHOLD=0.01, output_coord_in_ratio=False, ocr_bbox=None, text_scale=0.4, text_padding=5, draw_bbox_config=None, caption_model_processor=None, ocr_text=[], use_local_semantics=True, iou_threshold=0.9,prompt=None, scale_img=False, imgsz=None, batch_size=128):
+def get_som_labeled_img(image_source: Union[str, Image.Image], model=None, BOX_TRESHOLD=0.01, output_coord_in_ratio=False, ocr_bbox=None, text_scale=0.4, text_padding=5, draw_bbox_config=None, caption_model_processor=None, ocr_text=[], use_local_semantics=True, iou_threshold=0.9,prompt=None, scale_img=False, imgsz=None, batch_size=128, output_image='base64'):
     """Process either an image path or Image object
     
     Args:
         image_source: Either a file path (str) or PIL Image object
         ...
+        output_image: how the annotated frame is returned
+            'base64' - PNG encoded as base64 string (default, original behaviour)
+            'array'  - annotated RGB np.ndarray, no PNG/base64 round trip
+            None     - skip drawing entirely; first return value is None and
+                       label_coordinates are computed directly from the boxes
     """
     if isinstance(image_source, str):
         image_source = Image.open(image_source)
@@ -553,17 +654,28 @@ def get_som_labeled_img(image_source: Union[str, Image.Image], model=None, BOX_T
     filtered_boxes = box_convert(boxes=filtered_boxes, in_fmt="xyxy", out_fmt="cxcywh")
 
     phrases = [i for i in range(len(filtered_boxes))]
-    
+
+    if output_image is None:
+        # no visualization requested: same label_coordinates as annotate(), without drawing
+        xywh = box_convert(boxes=filtered_boxes * torch.Tensor([w, h, w, h]), in_fmt="cxcywh", out_fmt="xywh").numpy()
+        label_coordinates = {f"{phrase}": v for phrase, v in zip(phrases, xywh)}
+        if output_coord_in_ratio:
+            label_coordinates = {k: [v[0]/w, v[1]/h, v[2]/w, v[3]/h] for k, v in label_coordinates.items()}
+        return None, label_coordinates, filtered_boxes_elem
+
     # draw boxes
     if draw_bbox_config:
         annotated_frame, label_coordinates = annotate(image_source=image_source, boxes=filtered_boxes, logits=logits, phrases=phrases, **draw_bbox_config)
     else:
         annotated_frame, label_coordinates = annotate(image_source=image_source, boxes=filtered_boxes, logits=logits, phrases=phrases, text_scale=text_scale, text_padding=text_padding)
-    
-    pil_img = Image.fromarray(annotated_frame)
-    buffered = io.BytesIO()
-    pil_img.save(buffered, format="PNG")
-    encoded_image = base64.b64encode(buffered.getvalue()).decode('ascii')
+
+    if output_image == 'array':
+        encoded_image = annotated_frame
+    else:
+        pil_img = Image.fromarray(annotated_frame)
+        buffered = io.BytesIO()
+        pil_img.save(buffered, format="PNG")
+        encoded_image = base64.b64encode(buffered.getvalue()).decode('ascii')
     if output_coord_in_ratio:
         label_coordinates = {k: [v[0]/w, v[1]/h, v[2]/w, v[3]/h] for k, v in label_coordinates.items()}
         assert w == annotated_frame.shape[1] and h == annotated_frame.shape[0]
@@ -586,39 +698,52 @@ def get_xywh_yolo(input):
     x, y, w, h = int(x), int(y), int(w), int(h)
     return x, y, w, h
 
-def check_ocr_box(image_source: Union[str, Image.Image], display_img=False, output_bb_format='xywh', goal_filtering=None, easyocr_args=None, use_paddleocr=False):
-    """OCR 文本检测"""
+def check_ocr_box(image_source: Union[str, Image.Image], display_img=False, output_bb_format='xywh', goal_filtering=None, easyocr_args=None, use_paddleocr=False, return_confidence=False):
+    """OCR 文本检测
+
+    return_confidence=True returns ((text, bb, confidence, engine_info), goal_filtering) so callers can
+    publish the text-line layer (e.g. for downstream text renderers) without re-running OCR.
+    engine_info describes the engine that actually ran ({'engine', 'lang', 'rec_model'}),
+    which differs from the requested one when PaddleOCR falls back to EasyOCR.
+    """
     if isinstance(image_source, str):
         image_source = Image.open(image_source)
     if image_source.mode == 'RGBA':
         image_source = image_source.convert('RGB')
     image_np = np.array(image_source)
 
-    easy_reader = _get_easyocr_reader()
-
+    # only the selected engine is initialised; EasyOCR is loaded lazily as PaddleOCR's fallback
     if use_paddleocr:
         text_threshold = easyocr_args.get('text_threshold', 0.5) if easyocr_args else 0.5
         try:
-            paddle_ocr = _get_paddle_ocr()
-            result = paddle_ocr.ocr(image_np, cls=False)
-            if result and result[0]:
-                coord = [item[0] for item in result[0] if item[1][1] > text_threshold]
-                text = [item[1][0] for item in result[0] if item[1][1] > text_threshold]
-            else:
-                coord, text = [], []
+            det_model_dir, rec_model_dir, cls_model_dir = _paddle_model_dirs()
+            result = ocr_service.paddle_ocr(
+                image_np,
+                det_model_dir=det_model_dir, rec_model_dir=rec_model_dir,
+                cls_model_dir=cls_model_dir, lang='en',
+            )
+            result = [item for item in result if item[2] > text_threshold]
+            coord = [item[0] for item in result]
+            text = [item[1] for item in result]
+            engine_info = {
+                'engine': 'PaddleOCR', 'lang': 'en',
+                'rec_model': Path(rec_model_dir).name if rec_model_dir else _PADDLE_REC_MODEL_DIR.name,
+            }
         except Exception as e:
             print(f"[WARN] PaddleOCR failed: {e}, falling back to EasyOCR")
             if easyocr_args is None:
                 easyocr_args = {}
-            result = easy_reader.readtext(image_np, **easyocr_args)
+            result = ocr_service.easyocr_readtext(image_np, _get_easyocr_reader(), **easyocr_args)
             coord = [item[0] for item in result]
             text = [item[1] for item in result]
+            engine_info = _EASYOCR_ENGINE_INFO
     else:
         if easyocr_args is None:
             easyocr_args = {}
-        result = easy_reader.readtext(image_np, **easyocr_args)
+        result = ocr_service.easyocr_readtext(image_np, _get_easyocr_reader(), **easyocr_args)
         coord = [item[0] for item in result]
         text = [item[1] for item in result]
+        engine_info = _EASYOCR_ENGINE_INFO
 
     if output_bb_format == 'xywh':
         bb = [get_xywh(item) for item in coord]
@@ -627,4 +752,8 @@ def check_ocr_box(image_source: Union[str, Image.Image], display_img=False, outp
     else:
         bb = coord
 
+    if return_confidence:
+        # paragraph mode of EasyOCR yields (bbox, text) pairs without a score
+        confidence = [float(item[2]) if len(item) > 2 else 1.0 for item in result]
+        return (text, bb, confidence, dict(engine_info)), goal_filtering
     return (text, bb), goal_filtering